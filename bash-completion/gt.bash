@@ -4,7 +4,7 @@ _extract_language() {
     language="${words[1]}"
 
     case "$language" in 
-        java|kotlin|cpp|-)
+        java|kotlin|groovy|scala|cpp|-)
             echo "$language"
             ;;
     esac
@@ -51,6 +51,12 @@ _get_src_file_extension() {
         kotlin)
             echo ".kt"
             ;;
+        groovy)
+            echo ".groovy"
+            ;;
+        scala)
+            echo ".scala"
+            ;;
         cpp)
             echo ".cpp"
             ;;
@@ -106,7 +112,7 @@ _list_classes() {
         file_extension=$(_get_src_file_extension "$language")
         for classname in $(find "$src_dir" -name "*$file_extension" -printf "%P\n" | tr "/" ".")
         do
-            basename "$classname" ".$language"
+            basename "$classname" "$file_extension"
         done
     fi
 }
@@ -137,27 +143,31 @@ _list_pkgs() {
 
 
 _gt_completion() {
-    if gt >/dev/null 2>&1
+    if gt - root >/dev/null 2>&1
     then
         local cur prev words
-        _init_completion || return
+        # Subprojects of included builds are named <build>:<project>
+        _init_completion -n : || return
 
         case "$prev" in
             gt)
                 # Suggest all supported languages
-                readarray -t COMPREPLY < <(compgen -W "- java" -- "$cur")
+                readarray -t COMPREPLY < <(compgen -W "- java kotlin groovy scala batch shell watch" -- "$cur")
                 ;;
-            java|-)
+            java|kotlin|groovy|scala|-)
                 # Suggest available subcommands for the specified language
                 readarray -t COMPREPLY < <(compgen -W "$(gt "$prev" ls-cmd)" -- "$cur")
                 ;;
-            add-class|add-testclass|rm-class|rm-testclass|add-pkg|add-testpkg|rm-pkg|rm-testpkg|ls-pkg|reports)
+            add-class|add-testclass|rm-class|rm-testclass|add-pkg|add-testpkg|rm-pkg|rm-testpkg|ls-pkg|reports|dupes|check-packages|sync-tests|rm-project|stats|artifacts|rerun-failed|coverage|clone-project)
                 # Suggest all avaiable projects
                 readarray -t COMPREPLY < <(compgen -W "$(gt - projects --plain-format)" -- "$cur")
                 ;;
             add-project)
                 readarray -t COMPREPLY < <(compgen -W "--springboot --package-name" -- "$cur")
                 ;;
+            snapshot)
+                readarray -t COMPREPLY < <(compgen -W "save diff" -- "$cur")
+                ;;
             -p)
                 # Suggest available packages for subcommands that support the -p flag
                 local cmd="${words[2]}"
@@ -217,6 +227,7 @@ _gt_completion() {
                 esac
                 ;;
         esac
+        __ltrim_colon_completions "$cur"
     fi
     # No completion outside a gradle project
 }
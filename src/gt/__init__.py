@@ -1,83 +1,286 @@
 # Initialize application state
-import os, os.path
+import os, os.path, sys
+from .instrument import span, count
 
 # Obtain installation directory
 APP_HOME = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 
-# Locate the root project first
-CWD  = os.getcwd()
-HOME = os.path.expanduser("~")
-
-if (os.path.commonpath([CWD, HOME]) == HOME):
-    search_endpoint = HOME
-else:
-    search_endpoint = "/"
-
-search_dir = CWD
-ROOT_PROJECT = ""
-SETTINGS_FILE = ""
-SINGLE_PROJECT_BUILD = False
-
-while search_dir != search_endpoint:
-    settings_files = (
-        os.path.join(search_dir, "settings.gradle"),
-        os.path.join(search_dir, "settings.gradle.kts")
-    )
-    for sf in settings_files:
+
+class ProjectContext:
+    # Project discovery is deferred until a command actually asks for
+    # the project layout. Commands such as 'gt', 'gt - ls-cmd' and
+    # 'gt java ls-cmd' never touch the filesystem beyond this point.
+    def __init__(self, cwd: str = "") -> None:
+        self.cwd = cwd or os.getcwd()
+        self.refresh()
+
+    def refresh(self) -> None:
+        # Forget everything discovered so far
+        # The next access will trigger a fresh discovery
+        self._discovered = False
+        self._root_project = ""
+        self._settings_file = ""
+        self._single_project_build = False
+        self._projects: dict[str, str] = {}
+        self._builds: dict[str, "Build"] = {}
+        self._project_builds: dict[str, tuple["Build", str]] = {}
+
+    @property
+    def root_project(self) -> str:
+        self._ensure_discovered()
+        return self._root_project
+
+    @property
+    def settings_file(self) -> str:
+        self._ensure_discovered()
+        return self._settings_file
+
+    @property
+    def single_project_build(self) -> bool:
+        self._ensure_discovered()
+        return self._single_project_build
+
+    @property
+    def projects(self) -> dict[str, str]:
+        self._ensure_discovered()
+        return self._projects
+
+    @property
+    def builds(self) -> dict[str, "Build"]:
+        # The root build first, then the builds of the composite it includes
+        self._ensure_discovered()
+        return self._builds
+
+    def project_build(self, project: str) -> tuple["Build", str]:
+        # The build of a subproject and the name of the subproject within it
+        self._ensure_discovered()
+        return self._project_builds[project]
+
+    def _ensure_discovered(self) -> None:
+        if not self._discovered:
+            with span("discovery", cwd=self.cwd):
+                self._discover()
+            self._discovered = True
+
+    def _discover(self) -> None:
+        # Locate the root project first
+        home = os.path.expanduser("~")
+        if (os.path.commonpath([self.cwd, home]) == home):
+            search_endpoint = home
+        else:
+            search_endpoint = "/"
+
+        search_dir = self.cwd
+        root_project = ""
+        settings_file = ""
+        while search_dir != search_endpoint:
+            count("dirs_scanned")
+            settings_files = (
+                os.path.join(search_dir, "settings.gradle"),
+                os.path.join(search_dir, "settings.gradle.kts")
+            )
+            for sf in settings_files:
+                count("files_stated")
+                if os.path.isfile(sf):
+                    root_project = search_dir
+                    settings_file = sf
+                    break
+            if root_project:
+                break
+            else:
+                search_dir = os.path.dirname(search_dir)
+
+        if not root_project:
+            # Could be a single-project build with no settings file
+            # For such builds, the build script becomes the root marker
+            search_dir = self.cwd
+            while search_dir != search_endpoint:
+                count("dirs_scanned")
+                build_scripts = (
+                    os.path.join(search_dir, "build.gradle"),
+                    os.path.join(search_dir, "build.gradle.kts")
+                )
+                for script in build_scripts:
+                    count("files_stated")
+                    if os.path.isfile(script):
+                        root_project = search_dir
+                        break
+                if root_project:
+                    break
+                else:
+                    search_dir = os.path.dirname(search_dir)
+
+            if not root_project:
+                print("Not a gradle project.")
+                sys.exit(1)
+
+        builds = _discover_composite(root_project)
+        root_build = builds[os.path.basename(root_project)]
+
+        # Subprojects of the root build keep their names; those of included
+        # builds are namespaced as <build>:<project>, or <build> alone for
+        # single-project builds
+        projects = dict(root_build.projects)
+        project_builds = {project: (root_build, project) for project in projects}
+        for build in builds.values():
+            if build is root_build:
+                continue
+            for project, path in build.projects.items():
+                name = build.name if build.single_project_build and build.name not in projects else f"{build.name}:{project}"
+                projects[name] = path
+                project_builds[name] = (build, project)
+
+        self._root_project = root_project
+        self._settings_file = settings_file
+        self._single_project_build = root_build.single_project_build
+        self._projects = projects
+        self._builds = builds
+        self._project_builds = project_builds
+
+
+class Build:
+    # One build of a composite: the root build or a build it includes
+    def __init__(self, *, name: str, root: str, settings_file: str, single_project_build: bool,
+                 projects: dict[str, str], included_builds: list[str]) -> None:
+        self.name = name
+        self.root = root
+        self.settings_file = settings_file
+        self.single_project_build = single_project_build
+        self.projects = projects               # by their names within this build
+        self.included_builds = included_builds # absolute directories
+
+
+DISCOVERY_CACHE = "discovery"
+
+
+def _discover_composite(root_project: str) -> dict[str, Build]:
+    # Follows includeBuild(...) from the root build, one level of included
+    # builds at a time, discovering the builds of a level concurrently
+    # Every build is cached on its own, so a change to one build only
+    # rediscovers that build
+    from .cache import load_cache, save_cache
+
+    cache = load_cache(DISCOVERY_CACHE, {}, root=root_project)
+    entries = {}
+    builds: dict[str, Build] = {}
+    seen = {os.path.realpath(root_project)}
+    level = [root_project]
+    while level:
+        if len(level) == 1:
+            results = [_discover_build(level[0], cache.get(level[0]))]
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(16, len(level))) as executor:
+                results = list(executor.map(lambda root: _discover_build(root, cache.get(root)), level))
+        level = []
+        for build, entry in results:
+            if build.name in builds:
+                raise Exception(f"The builds in {builds[build.name].root} and {build.root} "
+                                f"have the same name '{build.name}'.")
+            builds[build.name] = build
+            if entry is not None:
+                entries[build.root] = entry
+            for directory in build.included_builds:
+                # Builds that include each other are only discovered once
+                real = os.path.realpath(directory)
+                if real not in seen and os.path.isdir(directory):
+                    seen.add(real)
+                    level.append(directory)
+    if entries != cache:
+        try:
+            save_cache(DISCOVERY_CACHE, entries, root=root_project)
+        except OSError:
+            pass
+    return builds
+
+
+def _build_signature(root: str) -> tuple | None:
+    # Discovery only depends on the settings file and on which directories of
+    # the build contain a build script; adding or removing a build script
+    # changes the mtime of its directory. None if the build must be rediscovered.
+    import time
+    from .cache import RACY_NS
+
+    now = time.time_ns()
+    try:
+        mtimes = [os.stat(root).st_mtime_ns]
+        for name in ("settings.gradle", "settings.gradle.kts"):
+            try:
+                mtimes.append(os.stat(os.path.join(root, name)).st_mtime_ns)
+            except FileNotFoundError:
+                mtimes.append(0)
+        with os.scandir(root) as it:
+            subdirs = sorted((e.name, e.stat().st_mtime_ns) for e in it
+                             if not e.name.startswith(".") and e.is_dir())
+    except OSError:
+        return None
+    count("dirs_scanned")
+    count("files_stated", len(subdirs) + 3)
+    if any(now - mtime < RACY_NS for mtime in mtimes + [mtime for _, mtime in subdirs]):
+        return None
+    return (tuple(mtimes), tuple(subdirs))
+
+
+def _discover_build(root: str, cached: tuple | None) -> tuple[Build, tuple | None]:
+    # Returns the build and its cache entry, or None if it cannot be cached
+    name = os.path.basename(root)
+    settings_file = ""
+    for sf in (os.path.join(root, "settings.gradle"), os.path.join(root, "settings.gradle.kts")):
         if os.path.isfile(sf):
-            ROOT_PROJECT = search_dir
-            SETTINGS_FILE = sf
+            settings_file = sf
             break
-    if ROOT_PROJECT:
-        break
+    signature = _build_signature(root)
+    if cached is not None and signature is not None and cached[0] == signature:
+        count("builds_cached")
+        _, single_project_build, projects, included_builds = cached
+        return Build(name=name, root=root, settings_file=settings_file, single_project_build=single_project_build,
+                     projects=projects, included_builds=included_builds), cached
+
+    count("builds_discovered")
+    included_builds = []
+    if settings_file:
+        from .settings import SettingsFile
+        try:
+            included_builds = [os.path.normpath(os.path.join(root, d)) for d in SettingsFile(settings_file).included_builds()]
+        except OSError:
+            pass
+
+    # Detect all subprojects first
+    projects: dict[str, str] = {}
+    single_project_build = False
+    _, subdirs, _ = next(os.walk(root))
+    count("dirs_scanned")
+
+    for dir in subdirs:
+        if (dir.startswith(".") or
+            dir in ("buildSrc", "gradle")):
+            continue
+        # dir is a subproject if and only if it has a build script
+        # Included builds nested in this one are builds of their own
+        dir_abs = os.path.join(root, dir)
+        if dir_abs in included_builds:
+            continue
+        count("files_stated", 2)
+        if ((os.path.isfile(os.path.join(dir_abs, "build.gradle.kts"))) or
+            (os.path.isfile(os.path.join(dir_abs, "build.gradle")))):
+            projects[dir] = dir_abs
+
+    if not projects:
+        # No subprojects detected
+        # Must be a single-project build
+        single_project_build = True
+        projects[name] = root
     else:
-        search_dir = os.path.dirname(search_dir)
-
-if not ROOT_PROJECT:
-    # Could be a single-project build with no settings file
-    # For such builds, the build script becomes the root marker
-    search_dir = CWD
-    while search_dir != search_endpoint:
-        build_scripts = (
-            os.path.join(search_dir, "build.gradle"),
-            os.path.join(search_dir, "build.gradle.kts")
-        ) 
-        for script in build_scripts:
-            if os.path.isfile(script):
-                ROOT_PROJECT = search_dir
-                break
-        if ROOT_PROJECT:
-            break
-        else:
-            search_dir = os.path.dirname(search_dir)
-
-    if not ROOT_PROJECT:
-        print("Not a gradle project.")
-        os._exit(1)
-
-# Detect all subprojects first
-PROJECTS = {}
-dir_iterator = os.walk(ROOT_PROJECT)
-_, subdirs, files = next(dir_iterator)
-
-for dir in subdirs:
-    if (dir.startswith(".") or
-        dir in ("buildSrc", "gradle")):
-        continue
-    # dir is a subproject if and only if it has a build script
-    dir_abs = os.path.join(ROOT_PROJECT, dir)
-    if ((os.path.isfile(os.path.join(dir_abs, "build.gradle.kts"))) or
-        (os.path.isfile(os.path.join(dir_abs, "build.gradle.")))):
-        PROJECTS[dir] = dir_abs
-
-if not PROJECTS:
-    # No subprojects detected
-    # Must be a single-project build
-    SINGLE_PROJECT_BUILD = True
-    PROJECTS[os.path.basename(ROOT_PROJECT)] = ROOT_PROJECT
-else:
-    # Include the root project in multi-project builds
-    # if and only if the root project has a src set
-    root_src_set = os.path.join(ROOT_PROJECT, "src")
-    if os.path.isdir(root_src_set):
-        PROJECTS[os.path.basename(ROOT_PROJECT)] = ROOT_PROJECT
+        # Include the root project in multi-project builds
+        # if and only if the root project has a src set
+        root_src_set = os.path.join(root, "src")
+        if os.path.isdir(root_src_set):
+            projects[name] = root
+
+    build = Build(name=name, root=root, settings_file=settings_file, single_project_build=single_project_build,
+                  projects=projects, included_builds=included_builds)
+    entry = (signature, single_project_build, projects, included_builds) if signature is not None else None
+    return build, entry
+
+
+CONTEXT = ProjectContext()
@@ -1,15 +1,35 @@
 import importlib
 
+from . import instrument
 from . import *
 from .utils import *
-from typing import List
 
-def start(args: List[str]):
+# Commands that are not tied to a language
+# Each module exposes a run(args) entry point
+TOP_LEVEL_COMMANDS = {
+    "batch" : "gt.batch",
+    "shell" : "gt.shell",
+    "watch" : "gt.watch",
+}
+
+def start(args: list[str]):
+    if args and args[0].startswith("--profile"):
+        # gt --profile[=<spec>] <language> <subcommand> ...
+        opt = args.pop(0)
+        if opt != "--profile" and not opt.startswith("--profile="):
+            raise Exception(f"'{opt}' is not a valid option for 'gt'")
+        instrument.enable(opt.partition("=")[2] or "jsonl")
+
     if not args:
         print_usage()
+    elif args[0] in TOP_LEVEL_COMMANDS:
+        command = args.pop(0)
+        mod = importlib.import_module(TOP_LEVEL_COMMANDS[command])
+        with span(command, args=list(args)):
+            mod.run(args)
     else:
         language = language_resolver(args.pop(0))
-        if language not in ("java", "all"):
+        if language not in ("java", "kotlin", "groovy", "scala", "all"):
             raise Exception("'{}' is not a supported language.".format(language))
         
         # Import the relevant modules based on the chosen language
@@ -29,11 +49,11 @@ def start(args: List[str]):
         
         # Each language module exposes a COMMAND mapping
         # The COMMAND mapping maps a string to a function
-        try:
+        if command not in mod.COMMANDS:
+            raise Exception(f"Invalid command: '{command}'\n"
+                            f"To get a list of all available commands, run gt <languge> without providing any arguments.")
+        with span(f"{language} {command}", args=list(args)):
             mod.COMMANDS[command](args)
-        except KeyError:
-            print(f"Invalid command: '{command}'")
-            print(f"To get a list of all available commands, run gt <languge> without providing any arguments.")
 
 def print_usage() -> None:
     help_file = os.path.join(APP_HOME, "src/resources/usage.txt")
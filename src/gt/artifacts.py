@@ -0,0 +1,141 @@
+# Jars, wars and distributions built by each subproject
+#
+# Artifacts are hashed with SHA-256 on a pool of threads: file reads and
+# hashlib both release the GIL for large buffers, so several files are
+# hashed at once without copying them between processes. Digests are
+# cached per file in <root>/.gradle/gt, keyed by (inode, mtime, size).
+import os, os.path, time
+from . import *
+from .cache import RACY_NS, load_cache, save_cache
+
+ARTIFACTS_CACHE = "artifacts"
+
+# Output directories of the jar, war, ear and distribution tasks
+ARTIFACT_DIRS = (os.path.join("build", "libs"), os.path.join("build", "distributions"))
+ARTIFACT_EXTENSIONS = (".jar", ".war", ".ear", ".aar", ".zip", ".tar", ".tgz", ".tar.gz", ".tbz2", ".tar.bz2", ".tar.xz")
+
+
+def sha256_file(path: str) -> str | None:
+    # Returns None if the file cannot be read
+    import hashlib
+
+    try:
+        with open(path, "rb") as file:
+            # Reads into one reusable buffer and hashes it in place
+            return hashlib.file_digest(file, "sha256").hexdigest()
+    except OSError:
+        return None
+
+
+def iter_artifacts(projects: list[str]):
+    # Streams (project, name, path) where name is relative to the root project
+    for project in projects:
+        for directory in ARTIFACT_DIRS:
+            directory = os.path.join(CONTEXT.projects[project], directory)
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted((e for e in it if e.is_file()), key=lambda e: e.name)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.endswith(ARTIFACT_EXTENSIONS):
+                    name = os.path.relpath(entry.path, CONTEXT.root_project).replace(os.sep, "/")
+                    yield project, name, entry.path
+
+
+def collect_artifacts(projects: list[str], *, jobs: int):
+    # Returns (records, unreadable) with one record per artifact
+    cache = load_cache(ARTIFACTS_CACHE, {})
+    now = time.time_ns()
+    records = []
+    pending = []
+    updated = False
+    with span("artifacts scan", projects=len(projects)):
+        for project, name, path in iter_artifacts(projects):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            count("files_stated")
+            mtime = st.st_mtime_ns if now - st.st_mtime_ns > RACY_NS else 0
+            record = {"type": "artifact", "project": project, "name": name, "path": path,
+                      "size": st.st_size, "sha256": None}
+            records.append(record)
+            entry = cache.get(path)
+            if entry and mtime and entry[:3] == (st.st_ino, mtime, st.st_size):
+                record["sha256"] = entry[3]
+            else:
+                pending.append((record, (st.st_ino, mtime, st.st_size)))
+
+    with span("artifacts hash", files=len(pending), jobs=jobs):
+        paths = [record["path"] for record, _ in pending]
+        if jobs == 1 or len(paths) < 2:
+            digests = [sha256_file(path) for path in paths]
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                digests = list(executor.map(sha256_file, paths))
+
+    unreadable = []
+    for (record, key), digest in zip(pending, digests):
+        count("files_hashed")
+        if digest is None:
+            unreadable.append(record["path"])
+            continue
+        record["sha256"] = digest
+        cache[record["path"]] = key + (digest,)
+        updated = True
+
+    # Forget artifacts that were deleted, for the selected projects only
+    seen = {record["path"] for record in records}
+    roots = tuple(os.path.join(CONTEXT.projects[p], d, "") for p in projects for d in ARTIFACT_DIRS)
+    for path in [p for p in cache if p.startswith(roots) and p not in seen]:
+        del cache[path]
+        updated = True
+
+    if updated:
+        save_cache(ARTIFACTS_CACHE, cache)
+    return [r for r in records if r["sha256"] is not None], unreadable
+
+
+def load_manifest(path: str) -> dict[str, str]:
+    # Maps artifact names to digests, from the json or jsonl output of
+    # 'gt - artifacts' or from the output of sha256sum
+    import json
+
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            text = file.read()
+    except OSError as e:
+        raise Exception(f"Unable to read the manifest '{path}': {e.strerror}")
+    stripped = text.lstrip()
+    try:
+        if stripped.startswith("["):
+            records = json.loads(stripped)
+        elif stripped.startswith("{"):
+            records = [json.loads(line) for line in stripped.splitlines() if line.strip()]
+        else:
+            records = []
+            for line in stripped.splitlines():
+                digest, _, name = line.strip().partition(" ")
+                if digest:
+                    records.append({"name": name.lstrip(" *"), "sha256": digest.lower()})
+        return {r["name"]: r["sha256"] for r in records if r.get("type", "artifact") == "artifact"}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise Exception(f"'{path}' is not a manifest written by 'gt - artifacts' or sha256sum.")
+
+
+def compare_artifacts(manifest: dict[str, str], records: list[dict]):
+    # Streams {"type", "change", "name", "expected", "actual"} records,
+    # where change is one of: identical, differs, missing, unexpected
+    actual = {record["name"]: record["sha256"] for record in records}
+    for name in sorted(manifest.keys() | actual.keys()):
+        expected = manifest.get(name)
+        digest = actual.get(name)
+        if expected is None:
+            change = "unexpected"
+        elif digest is None:
+            change = "missing"
+        else:
+            change = "identical" if expected == digest else "differs"
+        yield {"type": "comparison", "change": change, "name": name, "expected": expected, "actual": digest}
@@ -0,0 +1,41 @@
+# gt batch: run gt command lines read from a file or stdin in one process
+import sys
+from . import *
+from .utils import *
+from .session import Session
+
+
+def run(args: list[str]) -> None:
+    # Syntax: gt batch [<file>|-] [--fail-fast]
+    path = "-"
+    fail_fast = False
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt == "--fail-fast":
+            fail_fast = True
+        elif opt.startswith("-") and opt != "-":
+            unrecognized_opts.add(opt)
+        else:
+            path = opt
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt batch")
+
+    try:
+        file = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    except OSError as e:
+        raise Exception(f"Unable to read '{path}': {e.strerror}")
+
+    session = Session(fail_fast=fail_fast)
+    with span("batch", path=path):
+        with file:
+            for number, line in enumerate(file, 1):
+                if not session.execute(line) and fail_fast:
+                    print(f"✘ Stopped at line {number}: {line.strip()}")
+                    break
+
+    if session.failures:
+        print(f"✘ {session.failures} of {session.commands} command{'s' if session.commands != 1 else ''} failed")
+        sys.stdout.flush()
+        sys.exit(1)
@@ -0,0 +1,240 @@
+# Streaming analysis of Gradle build logs
+#
+# Logs are read as bytes in large chunks. The few interesting lines of a
+# chunk are located with bytes.find() for a handful of fixed substrings,
+# which runs at memchr speed instead of looping over every line in
+# Python, and only those lines are matched against precompiled patterns.
+# Everything kept is bounded by the build rather than by the log: counters
+# per subproject and outcome, a fixed-size heap of the slowest tasks, a few
+# samples of each kind of message, and lines cut at MAX_LINE_LENGTH.
+import heapq, os, os.path, re, sys
+from . import *
+
+READ_BUFFER_SIZE = 1 << 22
+# Longer lines are cut; nothing worth reporting needs more
+MAX_LINE_LENGTH = 1 << 16
+
+# Outcomes printed after '> Task :path'; no outcome means the task ran
+TASK_OUTCOMES = ("EXECUTED", "UP-TO-DATE", "FROM-CACHE", "NO-SOURCE", "SKIPPED", "FAILED")
+
+_ANSI_ESCAPE = re.compile(rb"\x1b\[[0-9;]*[A-Za-z]")
+# Every line any of the patterns below may match contains one of these
+_NEEDLES = (b"> Task :", b"completed. Took ", b": error: ", b".kt", b"[Error] ", b".groovy: ",
+            b"eprecat", b"scheduled to be removed", b"Build file '", b"BUILD ")
+_TASK = re.compile(rb"> Task (:[^\s]*)(?: (UP-TO-DATE|FROM-CACHE|NO-SOURCE|SKIPPED|FAILED))?\s*$")
+# --info prints ':app:compileJava (Thread[...]) completed. Took 1.2 secs.'
+_TASK_TIME = re.compile(rb"(:[^\s]+) \(Thread\[[^\]]*\]\) completed\. Took ([0-9.]+) (ms|secs?|mins?)")
+_BUILD_RESULT = re.compile(rb"BUILD (SUCCESSFUL|FAILED) in (.+?)\s*$")
+_BUILD_FILE = re.compile(rb"Build file '([^']+)'")
+# (substring every match contains, pattern capturing path, line and message)
+_COMPILER_ERRORS = (
+    (b": error: ", re.compile(rb"(\S+\.java):(\d+): error: (.*?)\s*$")),                 # javac
+    (b"e: ",       re.compile(rb"^e: (?:file://)?(\S+\.kts?):(\d+):\d+:? (.*?)\s*$")),   # kotlinc 1.8+
+    (b"e: ",       re.compile(rb"^e: (\S+\.kts?): \((\d+), \d+\): (.*?)\s*$")),          # older kotlinc
+    (b"[Error] ",  re.compile(rb"\[Error\] (\S+\.scala):(\d+):(?:\d+:)? (.*?)\s*$")),    # zinc
+    (b".groovy: ", re.compile(rb"(\S+\.groovy): (\d+): (.*?)\s*$")),                     # groovyc
+)
+_DEPRECATION = re.compile(rb"(?:has been deprecated|is deprecated|scheduled to be removed in Gradle|\[deprecation\])")
+
+_TIME_UNITS = {b"ms": 0.001, b"sec": 1.0, b"secs": 1.0, b"min": 60.0, b"mins": 60.0}
+
+
+class ProjectLogStats:
+    def __init__(self) -> None:
+        self.outcomes = dict.fromkeys(TASK_OUTCOMES, 0)
+        self.seconds = 0.0
+        self.deprecations = 0
+        self.errors = 0
+        self.error_samples: list[str] = []
+
+    def hit_ratio(self) -> float | None:
+        # Share of the tasks that had to produce outputs which came from the build cache
+        produced = self.outcomes["FROM-CACHE"] + self.outcomes["EXECUTED"] + self.outcomes["FAILED"]
+        return self.outcomes["FROM-CACHE"] / produced if produced else None
+
+    def avoidance_ratio(self) -> float | None:
+        # Share of those tasks and of the up-to-date ones that did not run at all
+        total = self.outcomes["UP-TO-DATE"] + self.outcomes["FROM-CACHE"] \
+                + self.outcomes["EXECUTED"] + self.outcomes["FAILED"]
+        return (self.outcomes["UP-TO-DATE"] + self.outcomes["FROM-CACHE"]) / total if total else None
+
+
+class LogAnalyzer:
+    def __init__(self, *, projects: dict[str, str], root_project: str, limit: int = 10) -> None:
+        self.limit = limit
+        self.root_name = os.path.basename(root_project)
+        self.projects: dict[str, ProjectLogStats] = {}
+        self.lines = 0
+        self.builds: list[tuple[str, str]] = []      # the last 'limit' build results
+        self.build_count = 0
+        self.slowest: list[tuple[float, str]] = []   # min-heap of the 'limit' slowest tasks
+        self.failed_tasks: list[str] = []
+        self.deprecations: dict[str, int] = {}
+        self.deprecated_features_used = 0
+        self.current_project = ""
+        self._last_deprecation_project = None
+        # Source paths are attributed to subprojects by their directories, either
+        # absolute or, for logs from another checkout, relative to the root
+        markers = []
+        for name, path in projects.items():
+            markers.append((os.path.join(path, "").encode(), name))
+            relpath = os.path.relpath(path, root_project)
+            if relpath != ".":
+                markers.append((("/" + os.path.join(relpath, "src", "")).encode(), name))
+        markers.sort(key=lambda marker: len(marker[0]), reverse=True)
+        self._markers = markers
+
+    def stats(self, project: str) -> ProjectLogStats:
+        stats = self.projects.get(project)
+        if stats is None:
+            stats = self.projects[project] = ProjectLogStats()
+        return stats
+
+    def task_project(self, task: str) -> str:
+        # ':app:compileJava' belongs to 'app', ':build' to the root project
+        project = task.rpartition(":")[0].lstrip(":")
+        return project if project else self.root_name
+
+    def path_project(self, path: bytes) -> str:
+        for marker, name in self._markers:
+            if marker in path:
+                return name
+        return self.current_project or self.root_name
+
+    def feed(self, stream) -> None:
+        pending = b""
+        truncated = False
+        while True:
+            chunk = stream.read(READ_BUFFER_SIZE)
+            if not chunk:
+                break
+            # Only complete lines are scanned; the rest waits for the next chunk
+            end = chunk.rfind(b"\n")
+            if end < 0:
+                if len(pending) + len(chunk) > MAX_LINE_LENGTH:
+                    pending = (pending + chunk)[:MAX_LINE_LENGTH]
+                    truncated = True
+                else:
+                    pending += chunk
+                continue
+            if truncated:
+                # The rest of a line that was cut is dropped
+                self._scan(pending + chunk[chunk.find(b"\n"):end + 1])
+            else:
+                self._scan(pending + chunk[:end + 1])
+            pending = chunk[end + 1:end + 1 + MAX_LINE_LENGTH]
+            truncated = len(chunk) - end - 1 > MAX_LINE_LENGTH
+        if pending:
+            self._scan(pending + b"\n")
+
+    def _scan(self, text: bytes) -> None:
+        self.lines += text.count(b"\n")
+        if b"\x1b" in text:
+            text = _ANSI_ESCAPE.sub(b"", text)
+        find = text.find
+        starts = set()
+        for needle in _NEEDLES:
+            i = find(needle)
+            while i >= 0:
+                starts.add(text.rfind(b"\n", 0, i) + 1)
+                i = find(needle, find(b"\n", i))
+        # Lines are fed in order: task context carries over to the lines that follow
+        # Long lines are cut here too, so that the result does not depend on where the chunks end
+        for start in sorted(starts):
+            self._feed_line(text[start:min(find(b"\n", start) + 1, start + MAX_LINE_LENGTH)])
+
+    def _feed_line(self, line: bytes) -> None:
+        if b"> Task :" in line:
+            match = _TASK.search(line)
+            if match:
+                task = match.group(1).decode("utf-8", "replace")
+                outcome = (match.group(2) or b"EXECUTED").decode()
+                self.current_project = self.task_project(task)
+                self.stats(self.current_project).outcomes[outcome] += 1
+                if outcome == "FAILED" and len(self.failed_tasks) < self.limit:
+                    self.failed_tasks.append(task)
+                return
+        if b"completed. Took " in line:
+            match = _TASK_TIME.search(line)
+            if match:
+                task = match.group(1).decode("utf-8", "replace")
+                seconds = float(match.group(2)) * _TIME_UNITS[match.group(3)]
+                self.stats(self.task_project(task)).seconds += seconds
+                entry = (seconds, task)
+                if len(self.slowest) < self.limit:
+                    heapq.heappush(self.slowest, entry)
+                elif entry > self.slowest[0]:
+                    heapq.heapreplace(self.slowest, entry)
+                return
+        if self._match_compiler_error(line):
+            return
+        if b"eprecat" in line or b"scheduled to be removed" in line:
+            if b"Deprecated Gradle features were used" in line:
+                self.deprecated_features_used += 1
+                return
+            if _DEPRECATION.search(line):
+                self._add_deprecation(line)
+                return
+        if b"Build file '" in line and self._last_deprecation_project is not None:
+            # Configuration-time deprecations are followed by the offending build file
+            match = _BUILD_FILE.search(line)
+            if match:
+                project = self.path_project(os.path.join(os.path.dirname(match.group(1)), b"src", b""))
+                self.stats(self._last_deprecation_project).deprecations -= 1
+                self.stats(project).deprecations += 1
+            self._last_deprecation_project = None
+            return
+        if b"BUILD " in line:
+            match = _BUILD_RESULT.search(line)
+            if match:
+                self.build_count += 1
+                self.builds.append((match.group(1).decode(), match.group(2).decode("utf-8", "replace")))
+                self.current_project = ""
+                if len(self.builds) > self.limit:
+                    del self.builds[0]
+
+    def _match_compiler_error(self, line: bytes) -> bool:
+        for needle, pattern in _COMPILER_ERRORS:
+            match = pattern.search(line) if needle in line else None
+            if match:
+                path, lineno, message = match.groups()
+                stats = self.stats(self.path_project(path))
+                stats.errors += 1
+                if len(stats.error_samples) < self.limit:
+                    stats.error_samples.append(f"{path.decode('utf-8', 'replace')}:{lineno.decode()}: "
+                                               f"{message.decode('utf-8', 'replace')}")
+                return True
+        return False
+
+    def _add_deprecation(self, line: bytes) -> None:
+        project = self.path_project(line) if b"/" in line else (self.current_project or self.root_name)
+        self.stats(project).deprecations += 1
+        self._last_deprecation_project = project
+        # The first sentence identifies the deprecation; only a bounded number are told apart
+        message = line.decode("utf-8", "replace").strip()
+        message = message.split(". ", 1)[0].rstrip(".")
+        if message in self.deprecations:
+            self.deprecations[message] += 1
+        elif len(self.deprecations) < 100 * self.limit:
+            self.deprecations[message] = 1
+        else:
+            self.deprecations["(other deprecations)"] = self.deprecations.get("(other deprecations)", 0) + 1
+
+    def totals(self) -> ProjectLogStats:
+        total = ProjectLogStats()
+        for stats in self.projects.values():
+            for outcome, n in stats.outcomes.items():
+                total.outcomes[outcome] += n
+            total.seconds += stats.seconds
+            total.deprecations += stats.deprecations
+            total.errors += stats.errors
+        return total
+
+
+def open_log(path: str):
+    if path == "-":
+        return open(sys.stdin.fileno(), "rb", buffering=READ_BUFFER_SIZE, closefd=False)
+    if path.endswith(".gz"):
+        import gzip
+        return gzip.open(path, "rb")
+    return open(path, "rb", buffering=READ_BUFFER_SIZE)
@@ -0,0 +1,54 @@
+# On-disk caches kept under <root project>/.gradle/gt
+#
+# Gradle already keeps its per-build state in .gradle, which is ignored
+# by version control, so the caches never show up as untracked files.
+# Every cache is versioned; a version mismatch or an unreadable file is
+# treated as an empty cache. Caches are written with marshal, limited to
+# builtin types: unlike pickle, loading a cache from a repository that is
+# not trusted cannot run code.
+import marshal, os, os.path
+from . import *
+
+CACHE_VERSION = 1
+
+# Files and directories modified this recently may still change within the
+# same mtime tick: entries keyed by such an mtime must not be trusted later
+RACY_NS = 2_000_000_000
+
+
+def cache_dir(root: str = "") -> str:
+    # 'root' is only given by discovery itself, before CONTEXT knows the root project
+    return os.path.join(root or CONTEXT.root_project, ".gradle", "gt")
+
+
+def cache_path(name: str, root: str = "") -> str:
+    return os.path.join(cache_dir(root), name)
+
+
+def load_cache(name: str, default=None, *, root: str = ""):
+    try:
+        # marshal.load() reads file objects in small pieces; one read is much faster
+        with open(cache_path(name, root), "rb") as file:
+            version, data = marshal.loads(file.read())
+    except Exception:
+        # Missing, truncated or written by an incompatible version
+        return default
+    if version != CACHE_VERSION:
+        return default
+    return data
+
+
+def save_cache(name: str, data, *, root: str = "") -> None:
+    path = cache_path(name, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write under a private name and rename, so that concurrent
+    # readers only ever see complete caches
+    partial = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(partial, "wb") as file:
+            file.write(marshal.dumps((CACHE_VERSION, data)))
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
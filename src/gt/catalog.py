@@ -0,0 +1,205 @@
+# Usage of the version catalog gradle/libs.versions.toml
+#
+# Every build script of the root build is tokenized once, in a single
+# regex pass that skips comments and picks up 'libs.*' accessors and
+# quoted 'group:name[:version]' coordinates. The raw tokens are cached per
+# script in <root>/.gradle/gt, keyed by (mtime, size), and resolved
+# against the catalog afterwards, so that editing the catalog never
+# forces the scripts to be read again.
+import os, os.path, re, time
+from . import *
+from .cache import RACY_NS, load_cache, save_cache
+
+CATALOG_INDEX_CACHE = "catalog-index"
+BUILD_SCRIPT_NAMES = ("build.gradle.kts", "build.gradle")
+
+_TOKENS = re.compile(r"""
+      (?P<comment>//[^\n]*|/\*.*?\*/)
+    | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+    | \blibs\.(?P<accessor>[A-Za-z_][A-Za-z0-9_]*(?:\s*\.\s*[A-Za-z_][A-Za-z0-9_]*)*)
+""", re.S | re.X)
+_COORDINATE = re.compile(r"^([\w.\-]+):([\w.\-]+)(?::([^:@\s]+))?(?:@\w+)?$")
+
+
+class VersionCatalog:
+    def __init__(self, path: str) -> None:
+        import tomllib
+
+        self.path = path
+        try:
+            with open(path, "rb") as file:
+                data = tomllib.load(file)
+        except OSError as e:
+            raise Exception(f"Unable to read the version catalog {path}: {e.strerror}")
+        except tomllib.TOMLDecodeError as e:
+            raise Exception(f"Invalid version catalog {path}: {e}")
+
+        self.versions: dict[str, str] = {alias: _version_text(v) for alias, v in data.get("versions", {}).items()}
+        # alias -> (group:name, version, version.ref)
+        self.libraries: dict[str, tuple[str, str, str]] = {}
+        for alias, spec in data.get("libraries", {}).items():
+            if isinstance(spec, str):
+                group, _, rest = spec.partition(":")
+                name, _, version = rest.partition(":")
+                self.libraries[alias] = (f"{group}:{name}", version, "")
+            elif isinstance(spec, dict):
+                module = spec.get("module") or f"{spec.get('group', '')}:{spec.get('name', '')}"
+                version, ref = _version_of(spec)
+                self.libraries[alias] = (module, self.versions.get(ref, version), ref)
+        self.bundles: dict[str, list[str]] = {alias: list(v) for alias, v in data.get("bundles", {}).items()}
+        # alias -> (plugin id, version, version.ref)
+        self.plugins: dict[str, tuple[str, str, str]] = {}
+        for alias, spec in data.get("plugins", {}).items():
+            if isinstance(spec, str):
+                plugin_id, _, version = spec.partition(":")
+                self.plugins[alias] = (plugin_id, version, "")
+            elif isinstance(spec, dict):
+                version, ref = _version_of(spec)
+                self.plugins[alias] = (spec.get("id", ""), self.versions.get(ref, version), ref)
+
+        # Accessor (e.g. 'bundles.testing') -> (kind, alias)
+        self.accessors: dict[str, tuple[str, str]] = {}
+        for kind, prefix, aliases in (("library", "", self.libraries), ("bundle", "bundles.", self.bundles),
+                                      ("plugin", "plugins.", self.plugins), ("version", "versions.", self.versions)):
+            for alias in aliases:
+                self.accessors[prefix + accessor_of(alias)] = (kind, alias)
+
+    def resolve(self, accessor: str) -> tuple[str, str] | None:
+        # libs.foo.bar.get() and libs.foo.asProvider() refer to 'foo-bar' and 'foo'
+        parts = accessor.split(".")
+        for end in range(len(parts), 0, -1):
+            found = self.accessors.get(".".join(parts[:end]))
+            if found:
+                return found
+        return None
+
+
+def accessor_of(alias: str) -> str:
+    # '-', '_' and '.' all separate the segments of the generated accessors
+    return re.sub(r"[-_.]", ".", alias)
+
+
+def _version_text(version) -> str:
+    if isinstance(version, dict):
+        for key in ("strictly", "require", "prefer"):
+            if key in version:
+                return str(version[key])
+        return ""
+    return str(version)
+
+
+def _version_of(spec: dict) -> tuple[str, str]:
+    # Returns (version, version.ref); tomllib turns 'version.ref' into a nested table
+    version = spec.get("version", "")
+    if isinstance(version, dict) and "ref" in version:
+        return ("", version["ref"])
+    return (_version_text(version), "")
+
+
+def scan_build_script(path: str) -> tuple[list[str], list[tuple[str, str, str, int]]] | None:
+    # Returns (accessors, coordinates) where coordinates are (group:name, version, text, line)
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            text = file.read()
+    except OSError:
+        return None
+    accessors = []
+    coordinates = []
+    for match in _TOKENS.finditer(text):
+        if match.lastgroup == "accessor":
+            accessors.append(re.sub(r"\s+", "", match.group("accessor")))
+        elif match.lastgroup == "string":
+            literal = match.group("string")[1:-1]
+            coordinate = _COORDINATE.match(literal) if ":" in literal else None
+            if coordinate:
+                group, name, version = coordinate.groups()
+                coordinates.append((f"{group}:{name}", version or "", literal, text.count("\n", 0, match.start()) + 1))
+    return sorted(set(accessors)), coordinates
+
+
+def build_scripts() -> dict[str, str]:
+    # Build scripts of the root build by subproject, including the root project's own
+    scripts = {}
+    root_build = CONTEXT.builds[os.path.basename(CONTEXT.root_project)]
+    directories = dict(root_build.projects)
+    directories.setdefault(root_build.name, root_build.root)
+    for project, directory in directories.items():
+        for name in BUILD_SCRIPT_NAMES:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                scripts[path] = project
+                break
+    return scripts
+
+
+def load_catalog_index() -> dict[str, tuple[str, list[str], list]]:
+    # Maps every build script to (project, accessors, coordinates)
+    cache = load_cache(CATALOG_INDEX_CACHE, {})
+    now = time.time_ns()
+    index = {}
+    entries = {}
+    for path, project in build_scripts().items():
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        count("files_stated")
+        entry = cache.get(path)
+        if entry is None or entry[:2] != (st.st_mtime_ns, st.st_size):
+            count("files_read")
+            scanned = scan_build_script(path)
+            if scanned is None:
+                continue
+            mtime = st.st_mtime_ns if now - st.st_mtime_ns > RACY_NS else 0
+            entry = (mtime, st.st_size) + scanned
+        entries[path] = entry
+        index[path] = (project, entry[2], entry[3])
+    if entries != cache:
+        save_cache(CATALOG_INDEX_CACHE, entries)
+    return index
+
+
+def analyze_catalog(catalog: VersionCatalog, index: dict) -> dict:
+    # Returns {"usage": {(kind, alias): [projects]}, "unresolved": [(project, accessor)],
+    #          "hardcoded": [(project, path, line, text, alias)]}
+    usage: dict[tuple[str, str], set[str]] = {}
+    unresolved = []
+    hardcoded = []
+    modules = {}
+    for alias, (module, _, _) in catalog.libraries.items():
+        modules.setdefault(module, alias)
+    for path, (project, accessors, coordinates) in index.items():
+        for accessor in accessors:
+            found = catalog.resolve(accessor)
+            if found is None:
+                unresolved.append((project, accessor))
+                continue
+            usage.setdefault(found, set()).add(project)
+            if found[0] == "bundle":
+                # The libraries of a bundle are used through it
+                for alias in catalog.bundles[found[1]]:
+                    usage.setdefault(("library", alias), set()).add(project)
+        for module, version, text, line in coordinates:
+            if module in modules:
+                hardcoded.append((project, path, line, text, modules[module]))
+    return {"usage": {key: sorted(projects) for key, projects in usage.items()},
+            "unresolved": sorted(set(unresolved)), "hardcoded": hardcoded}
+
+
+def bump_impact(catalog: VersionCatalog, usage: dict, version: str) -> tuple[list[tuple[str, str]], list[str]]:
+    # Returns the catalog entries that follow 'version' (a [versions] key, or
+    # a library or plugin alias) and the subprojects that use any of them
+    if version in catalog.versions:
+        entries = [("version", version)]
+        entries += [("library", a) for a, (_, _, ref) in catalog.libraries.items() if ref == version]
+        entries += [("plugin", a) for a, (_, _, ref) in catalog.plugins.items() if ref == version]
+    elif version in catalog.libraries:
+        entries = [("library", version)]
+    elif version in catalog.plugins:
+        entries = [("plugin", version)]
+    else:
+        raise Exception(f"'{version}' is neither a version nor a library or plugin alias of {catalog.path}.")
+    libraries = {alias for kind, alias in entries if kind == "library"}
+    entries += [("bundle", a) for a, members in catalog.bundles.items() if libraries.intersection(members)]
+    projects = sorted({p for entry in entries for p in usage.get(entry, [])})
+    return entries, projects
@@ -0,0 +1,342 @@
+# On-disk index of the Java classes of every subproject, for 'gt java find'
+#
+# Classes are stored as (source set, package, simple name) triples over
+# two vocabularies, the distinct package names and the distinct simple
+# names, which are far smaller than the number of classes. Trigram
+# posting lists over the simple names narrow substring queries down to a
+# few candidates; all integer tables are kept as packed arrays so that a
+# warm index loads with a single read.
+#
+# The index is refreshed by directory mtime: a directory is listed again
+# only when its mtime changed, which is exactly when entries were added,
+# removed or renamed in it.
+import os, os.path, re, time
+from array import array
+from . import *
+from .cache import RACY_NS, load_cache, save_cache
+
+INDEX_CACHE = "find-index"
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _initials(name: str) -> str:
+    # 'PaymentClientService' -> 'PCS'
+    return name[0].upper() + "".join(c for c in name[1:] if c.isupper())
+
+
+def _pack(values) -> bytes:
+    return array("I", values).tobytes()
+
+
+def _unpack(data: bytes) -> array:
+    values = array("I")
+    values.frombytes(data)
+    return values
+
+
+class ClassIndex:
+    def __init__(self, data: dict) -> None:
+        self.segments: list[tuple[str, str]] = data["segments"]
+        self.packages: list[str] = data["packages"]
+        self.names: list[str] = data["names"]
+        self.grams: dict[str, bytes] = data["grams"]
+        self.initials: dict[str, bytes] = data["initials"]
+        # Flat (segment, package, name) triples ordered by name, with the
+        # offsets of each name's run and a package-ordered permutation
+        self.classes = _unpack(data["classes"])
+        self.name_start = _unpack(data["name_start"])
+        self.by_package = _unpack(data["by_package"])
+        self.package_start = _unpack(data["package_start"])
+
+    def __len__(self) -> int:
+        return len(self.classes) // 3
+
+    def name_classes(self, name_id: int):
+        classes = self.classes
+        for i in range(self.name_start[name_id], self.name_start[name_id + 1]):
+            yield classes[3 * i], classes[3 * i + 1], name_id
+
+    def package_classes(self, pkg_id: int):
+        classes = self.classes
+        for i in self.by_package[self.package_start[pkg_id]:self.package_start[pkg_id + 1]]:
+            yield classes[3 * i], pkg_id, classes[3 * i + 2]
+
+    def fqn(self, pkg_id: int, name_id: int) -> str:
+        pkgname = self.packages[pkg_id]
+        return f"{pkgname}.{self.names[name_id]}" if pkgname else self.names[name_id]
+
+    def path(self, segment_id: int, pkg_id: int, name_id: int) -> str:
+        project, src_type = self.segments[segment_id]
+        pkgname = self.packages[pkg_id]
+        return os.path.join(CONTEXT.projects[project], "src", src_type, "java",
+                            *(pkgname.split(".") if pkgname else ()), self.names[name_id] + ".java")
+
+    def search(self, query: str, limit: int) -> list[tuple[int, int, int]]:
+        # Returns (segment, package, name) triples, best match first
+        # Tiers: 0 exact name, 1 name prefix, 2 camel humps, 3 name substring,
+        #        4 package or qualified name substring, 5 fuzzy subsequence
+        query = query.strip()
+        if query.endswith(".java"):
+            query = query[:-5]
+        query = query.replace(os.sep, ".").replace("/", ".").strip(".")
+        if not query:
+            return []
+        lowered = query.lower()
+
+        # Matches are ranked per name or per package first, and only the best
+        # groups are expanded into classes: a short query may match a name
+        # shared by thousands of classes
+        best: dict[int, tuple[int, int]] = {}
+        groups: list[tuple[tuple, str, object]] = []
+
+        def add_name(name_id: int, tier: int, score: int = 0) -> None:
+            if name_id not in best or (tier, score) < best[name_id]:
+                best[name_id] = (tier, score)
+
+        if "." in lowered:
+            self._search_qualified(lowered, groups)
+        else:
+            for name_id in self._substring_candidates(lowered):
+                name = self.names[name_id].lower()
+                if lowered in name:
+                    tier = 0 if name == lowered else 1 if name.startswith(lowered) else 3
+                    add_name(name_id, tier, 0 if self.names[name_id] == query else 1)
+            if any(c.isupper() for c in query[1:]) or (len(query) > 1 and query.isupper()):
+                for name_id in self._camel_hump_matches(query):
+                    add_name(name_id, 2)
+            if self._group_sizes(best, groups) < limit:
+                for pkg_id, pkgname in enumerate(self.packages):
+                    if lowered in pkgname.lower():
+                        groups.append(((4, 0, 0, pkgname), "package", pkg_id))
+
+        # Fuzzy matches only fill up what the stricter tiers left
+        if self._group_sizes(best, groups) < limit:
+            for name_id, score in self._fuzzy_matches(lowered.rpartition(".")[2]):
+                add_name(name_id, 5, score)
+
+        for name_id, (tier, score) in best.items():
+            name = self.names[name_id]
+            groups.append(((tier, score, len(name), name), "name", name_id))
+        groups.sort(key=lambda group: group[0])
+
+        results = []
+        seen = set()
+        for _, kind, ident in groups:
+            if kind == "name":
+                triples = sorted(self.name_classes(ident), key=lambda t: (t[1], t[0]))
+            elif kind == "package":
+                triples = sorted(self.package_classes(ident), key=lambda t: (t[2], t[0]))
+            else:
+                triples = [ident]
+            for triple in triples:
+                if triple not in seen:
+                    seen.add(triple)
+                    results.append(triple)
+                    if len(results) == limit:
+                        return results
+        return results
+
+    def _group_sizes(self, best: dict[int, tuple[int, int]], groups: list) -> int:
+        size = sum(self.name_start[i + 1] - self.name_start[i] for i in best)
+        for _, kind, ident in groups:
+            size += self.package_start[ident + 1] - self.package_start[ident] if kind == "package" else 1
+        return size
+
+    def _substring_candidates(self, lowered: str):
+        if len(lowered) < 3:
+            return range(len(self.names))
+        ids = None
+        for gram in _trigrams(lowered):
+            postings = self.grams.get(gram)
+            if postings is None:
+                return ()
+            ids = set(_unpack(postings)) if ids is None else ids.intersection(_unpack(postings))
+            if not ids:
+                return ()
+        return ids
+
+    def _camel_hump_matches(self, query: str):
+        # Every hump of the query must start a hump of the name, in order;
+        # humps of the name may be skipped, e.g. 'PS' -> 'PaymentClientService'
+        humps = re.findall(r"[A-Z][^A-Z]*|[^A-Z]+", query)
+        pattern = re.compile("".join(r"(?:[A-Z][^A-Z]*)*?" + re.escape(h[0].upper() + h[1:]) + r"[^A-Z]*"
+                                     for h in humps))
+        # Initials are a much smaller vocabulary to pre-filter on
+        initials = re.compile(".*?".join(re.escape(h[0].upper()) for h in humps))
+        for name_initials, postings in self.initials.items():
+            if initials.search(name_initials):
+                for name_id in _unpack(postings):
+                    if pattern.match(self.names[name_id]):
+                        yield name_id
+
+    def _fuzzy_matches(self, lowered: str):
+        # Every character of the query appears in order; tighter matches score lower
+        if not lowered:
+            return
+        pattern = re.compile(".*?".join(f"({re.escape(c)})" for c in lowered), re.IGNORECASE)
+        for name_id, name in enumerate(self.names):
+            match = pattern.search(name)
+            if match:
+                gaps = match.end() - match.start() - len(lowered)
+                # Matches on hump boundaries read as abbreviations
+                boundaries = sum(1 for i in range(1, len(lowered) + 1)
+                                 if match.start(i) == 0 or name[match.start(i)].isupper())
+                yield name_id, gaps + match.start() - 2 * boundaries
+
+    def _search_qualified(self, lowered: str, groups: list) -> None:
+        # A dot of the query either falls inside the package name, or is the
+        # one separating the package from the class name
+        head, _, tail = lowered.rpartition(".")
+        for pkg_id, pkgname in enumerate(self.packages):
+            pkgname = pkgname.lower()
+            if lowered in pkgname:
+                groups.append(((4, 0, 0, pkgname), "package", pkg_id))
+            elif pkgname.endswith(head):
+                for triple in self.package_classes(pkg_id):
+                    name = self.names[triple[2]]
+                    if name.lower().startswith(tail):
+                        exact = name.lower() == tail
+                        tier = 0 if exact and pkgname == head else 1 if exact else 3
+                        groups.append(((tier, 0, len(name), name, pkg_id, triple[0]), "class", triple))
+
+
+def _walk(java_root: str, cached: dict[str, tuple[int, tuple, int]], now: int):
+    # Returns the refreshed directory table, mapping packages to
+    # (mtime, subdirectories, signature of the classes), and the classes
+    # of every directory that had to be listed again
+    import zlib
+
+    dirs: dict[str, tuple[int, tuple, int]] = {}
+    listed: dict[str, list[str]] = {}
+    pending = [(java_root, "")]
+    while pending:
+        directory, pkgname = pending.pop()
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            continue
+        entry = cached.get(pkgname)
+        if entry and entry[0] == mtime:
+            _, subdirs, signature = entry
+        else:
+            count("dirs_scanned")
+            subdirs = []
+            classes = []
+            try:
+                with os.scandir(directory) as it:
+                    for e in it:
+                        if e.is_dir(follow_symlinks=False):
+                            subdirs.append(e.name)
+                        elif e.name.endswith(".java"):
+                            classes.append(e.name[:-5])
+            except OSError:
+                continue
+            subdirs = tuple(sorted(subdirs))
+            signature = zlib.crc32("/".join(sorted(classes)).encode())
+            listed[pkgname] = classes
+        dirs[pkgname] = (mtime if now - mtime > RACY_NS else 0, subdirs, signature)
+        for name in subdirs:
+            pending.append((os.path.join(directory, name), f"{pkgname}.{name}" if pkgname else name))
+    return dirs, listed
+
+
+def _contents(dirs: dict) -> dict:
+    # The directory tables without their mtimes
+    return {segment: {pkgname: entry[1:] for pkgname, entry in table.items()} for segment, table in dirs.items()}
+
+
+def _build(segment_classes: dict[tuple[str, str], dict[str, list[str]]]) -> dict:
+    segments = sorted(segment_classes)
+    packages = sorted({pkgname for dirs in segment_classes.values() for pkgname in dirs})
+    names = sorted({name for dirs in segment_classes.values() for classes in dirs.values() for name in classes})
+    pkg_ids = {pkgname: i for i, pkgname in enumerate(packages)}
+    name_ids = {name: i for i, name in enumerate(names)}
+
+    triples = sorted((name_ids[name], seg_id, pkg_ids[pkgname])
+                     for seg_id, segment in enumerate(segments)
+                     for pkgname, classes in segment_classes[segment].items()
+                     for name in classes)
+    classes = array("I")
+    name_start = array("I", [0] * (len(names) + 1))
+    package_sizes = [0] * len(packages)
+    for name_id, seg_id, pkg_id in triples:
+        classes.extend((seg_id, pkg_id, name_id))
+        name_start[name_id + 1] += 1
+        package_sizes[pkg_id] += 1
+    for i in range(len(names)):
+        name_start[i + 1] += name_start[i]
+    package_start = array("I", [0] * (len(packages) + 1))
+    for i, size in enumerate(package_sizes):
+        package_start[i + 1] = package_start[i] + size
+    by_package = sorted(range(len(triples)), key=lambda i: classes[3 * i + 1])
+
+    grams: dict[str, list[int]] = {}
+    initials: dict[str, list[int]] = {}
+    for name_id, name in enumerate(names):
+        for gram in _trigrams(name.lower()):
+            grams.setdefault(gram, []).append(name_id)
+        initials.setdefault(_initials(name), []).append(name_id)
+
+    return {
+        "segments"      : segments,
+        "packages"      : packages,
+        "names"         : names,
+        "grams"         : {gram: _pack(ids) for gram, ids in grams.items()},
+        "initials"      : {key: _pack(ids) for key, ids in initials.items()},
+        "classes"       : classes.tobytes(),
+        "name_start"    : name_start.tobytes(),
+        "by_package"    : _pack(by_package),
+        "package_start" : package_start.tobytes(),
+    }
+
+
+def load_class_index(*, refresh: bool = True) -> ClassIndex:
+    # Imported here to keep the module free of project-specific helpers
+    from .languages.java import java_src_types
+
+    data = load_cache(INDEX_CACHE, None)
+    if data is not None and not refresh:
+        return ClassIndex(data)
+    # The directory table is stored along with the classes it describes
+    dirs_cache = data["dirs"] if data is not None else {}
+
+    with span("class index refresh"):
+        now = time.time_ns()
+        new_dirs = {}
+        listed = {}
+        for project in CONTEXT.projects:
+            for src_type in java_src_types(project):
+                segment = (project, src_type)
+                java_root = os.path.join(CONTEXT.projects[project], "src", src_type, "java")
+                new_dirs[segment], listed[segment] = _walk(java_root, dirs_cache.get(segment, {}), now)
+
+        if data is not None and _contents(new_dirs) == _contents(dirs_cache):
+            # Directories were listed again, but none of them changed
+            if new_dirs != dirs_cache:
+                data["dirs"] = new_dirs
+                save_cache(INDEX_CACHE, data)
+            return ClassIndex(data)
+
+    with span("class index build"):
+        # Classes of directories that were not listed again come from the old index
+        previous: dict[tuple[str, str], dict[str, list[str]]] = {}
+        if data is not None:
+            index = ClassIndex(data)
+            classes = index.classes
+            for i in range(0, len(classes), 3):
+                segment = index.segments[classes[i]]
+                pkgname = index.packages[classes[i + 1]]
+                previous.setdefault(segment, {}).setdefault(pkgname, []).append(index.names[classes[i + 2]])
+
+        segment_classes = {}
+        for segment, dirs in new_dirs.items():
+            old = previous.get(segment, {})
+            segment_classes[segment] = {pkgname: listed[segment][pkgname] if pkgname in listed[segment]
+                                        else old.get(pkgname, []) for pkgname in dirs}
+        data = _build(segment_classes)
+        data["dirs"] = new_dirs
+        save_cache(INDEX_CACHE, data)
+    return ClassIndex(data)
@@ -0,0 +1,140 @@
+# Copying a subproject into a new one
+#
+# Files are cloned with the FICLONE ioctl where the filesystem can share
+# extents between files (btrfs, XFS, bcachefs), so an untouched file costs
+# no data blocks, and copied by the kernel elsewhere. With a package rename,
+# the directory of the old package is moved as a whole in every source set
+# and only the files that mention the old package are rewritten. The copy
+# is assembled under a private name and renamed into place at the end.
+import os, os.path, re, shutil
+from . import *
+from .utils import *
+
+# Left out of the copy, at the top of the subproject only
+EXCLUDED_DIRS = ("build", ".gradle")
+
+_FICLONE = 0x40049409
+
+
+def scan_project(directory: str) -> tuple[list[str], list[str], list[str]]:
+    # Returns the (directories, files, symlinks) below 'directory', as relative paths, parents first
+    dirs, files, links = [], [], []
+    pending = [""]
+    while pending:
+        rel = pending.pop()
+        with os.scandir(os.path.join(directory, rel)) as it:
+            for entry in it:
+                if not rel and entry.name in EXCLUDED_DIRS:
+                    continue
+                path = os.path.join(rel, entry.name)
+                if entry.is_symlink():
+                    links.append(path)
+                elif entry.is_dir():
+                    dirs.append(path)
+                    pending.append(path)
+                elif entry.is_file():
+                    files.append(path)
+    count("dirs_scanned", len(dirs) + 1)
+    return dirs, files, links
+
+
+def package_pattern(package: str) -> re.Pattern:
+    # 'com.acme' matches in 'com.acme.App' and 'com.acme;', but not in 'com.acmecorp' or 'org.com.acme'
+    return re.compile(rb"(?<![\w.$])" + re.escape(package.encode()) + rb"(?![\w$])")
+
+
+def clone_file(source: str, target: str, *, pattern: re.Pattern | None = None, replacement: bytes = b"",
+               hardlink: bool = False) -> str:
+    # Returns how the file got there: rewritten, linked, cloned or copied
+    if pattern is not None:
+        with open(source, "rb") as file:
+            data = file.read()
+        count("files_read")
+        # Binary files are never rewritten
+        if b"\0" not in data[:8192]:
+            data, replaced = pattern.subn(replacement, data)
+            if replaced:
+                with open(target, "xb") as file:
+                    file.write(data)
+                shutil.copymode(source, target)
+                return "rewritten"
+    if hardlink:
+        os.link(source, target)
+        return "linked"
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    with open(source, "rb") as src, open(target, "xb") as dst:
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            except OSError:
+                pass
+            else:
+                shutil.copymode(source, target)
+                return "cloned"
+    shutil.copyfile(source, target)
+    shutil.copymode(source, target)
+    return "copied"
+
+
+def move_package(directory: str, old: str, new: str) -> list[str]:
+    # Moves src/<source set>/java/<old> to <new> in every source set of the
+    # subproject at 'directory'; returns the source sets where it was found
+    moved = []
+    src = os.path.join(directory, "src")
+    src_sets = sorted(os.listdir(src)) if os.path.isdir(src) else []
+    for src_set in src_sets:
+        java = os.path.join(src, src_set, "java")
+        old_dir = os.path.join(java, *old.split("."))
+        if not os.path.isdir(old_dir):
+            continue
+        new_dir = os.path.join(java, *new.split("."))
+        # Through a temporary name, as one package may contain the other
+        temp = os.path.join(java, f".gt-clone-{os.getpid()}")
+        os.rename(old_dir, temp)
+        parent = os.path.dirname(old_dir)
+        while parent != java and not os.listdir(parent):
+            os.rmdir(parent)
+            parent = os.path.dirname(parent)
+        os.makedirs(os.path.dirname(new_dir), exist_ok=True)
+        if not os.path.exists(new_dir):
+            os.rename(temp, new_dir)
+        else:
+            for name in os.listdir(temp):
+                if os.path.lexists(os.path.join(new_dir, name)):
+                    raise Exception(f"Both '{old}' and '{new}' contain '{name}' in src/{src_set}/java.")
+                os.rename(os.path.join(temp, name), os.path.join(new_dir, name))
+            os.rmdir(temp)
+        moved.append(src_set)
+    return moved
+
+
+def clone_project(source_dir: str, target_dir: str, *, package: tuple[str, str] | None = None,
+                  hardlink: bool = False) -> tuple[dict[str, int], list[str]]:
+    # Returns ({how: number of files}, source sets where the package moved)
+    staging = os.path.join(os.path.dirname(target_dir), f".{os.path.basename(target_dir)}.gt-clone-{os.getpid()}")
+    pattern = package_pattern(package[0]) if package else None
+    replacement = package[1].encode() if package else b""
+    try:
+        with span("clone scan", source=source_dir):
+            dirs, files, links = scan_project(source_dir)
+        os.mkdir(staging)
+        for rel in dirs:
+            os.mkdir(os.path.join(staging, rel))
+        for rel in links:
+            os.symlink(os.readlink(os.path.join(source_dir, rel)), os.path.join(staging, rel))
+        with span("clone files", files=len(files)):
+            results = run_batch(dict.fromkeys(files), lambda rel, _: clone_file(
+                os.path.join(source_dir, rel), os.path.join(staging, rel),
+                pattern=pattern, replacement=replacement, hardlink=hardlink))
+        moved = move_package(staging, *package) if package else []
+        os.rename(staging, target_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    counts = {}
+    for how in results.values():
+        counts[how] = counts.get(how, 0) + 1
+    return counts, moved
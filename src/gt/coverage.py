@@ -0,0 +1,120 @@
+# Line and branch coverage from the XML reports of the JaCoCo plugin
+#
+# The jacocoTestReport task writes build/reports/jacoco/test/jacocoTestReport.xml.
+# Reports are streamed with iterparse: only the counters of each package
+# are kept, and every class, method and source file is dropped from the
+# tree as soon as it ends, so memory stays flat however large the report.
+# The counters are cached per report in <root>/.gradle/gt, keyed by
+# (mtime, size).
+import os, os.path, time
+from . import *
+from .cache import RACY_NS, load_cache, save_cache
+from .utils import map_jobs
+
+COVERAGE_CACHE = "coverage"
+REPORT_NAME = "jacocoTestReport.xml"
+COUNTERS = ("LINE", "BRANCH")
+
+
+def find_report(project: str) -> str | None:
+    # The most recent report of the subproject, wherever the task put it below build/reports/jacoco
+    found = []
+    for directory, _, files in os.walk(os.path.join(CONTEXT.projects[project], "build", "reports", "jacoco")):
+        if REPORT_NAME in files:
+            path = os.path.join(directory, REPORT_NAME)
+            try:
+                found.append((os.stat(path).st_mtime_ns, path))
+            except OSError:
+                continue
+    return max(found)[1] if found else None
+
+
+def parse_coverage_report(path: str) -> dict[str, dict[str, tuple[int, int]]] | None:
+    # Returns {package: {counter type: (missed, covered)}} for the LINE and BRANCH
+    # counters, or None if the file cannot be read
+    import xml.etree.ElementTree as ET
+
+    packages = {}
+    stack = []
+    try:
+        for event, element in ET.iterparse(path, events=("start", "end")):
+            if event == "start":
+                stack.append(element)
+                continue
+            stack.pop()
+            parent = stack[-1] if stack else None
+            if element.tag == "counter":
+                if parent is not None and parent.tag == "package" and element.get("type") in COUNTERS:
+                    counters = packages.setdefault(parent.get("name", "").replace("/", "."), {})
+                    counters[element.get("type")] = (int(element.get("missed", 0)), int(element.get("covered", 0)))
+            # Drop whatever has ended; its counters were taken above
+            element.clear()
+            if parent is not None and len(parent) and parent[-1] is element:
+                del parent[-1]
+    except (OSError, ET.ParseError, ValueError):
+        return None
+    return packages
+
+
+def load_coverage(projects: list[str], *, jobs: int):
+    # Returns ({project: {package: {counter type: (missed, covered)}}}, unreadable)
+    reports = {}
+    for project in projects:
+        path = find_report(project)
+        if path:
+            reports[project] = path
+
+    cache = load_cache(COVERAGE_CACHE, {})
+    now = time.time_ns()
+    coverage = {}
+    pending = []
+    for project, path in reports.items():
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        count("files_stated")
+        # Recent reports are cached with mtime 0, so they are parsed again next time
+        mtime = st.st_mtime_ns if now - st.st_mtime_ns > RACY_NS else 0
+        entry = cache.get(path)
+        if entry and mtime and entry[:2] == (mtime, st.st_size):
+            coverage[project] = entry[2]
+        else:
+            pending.append((project, path, (mtime, st.st_size)))
+
+    with span("coverage parse", files=len(pending), jobs=jobs):
+        paths = [path for _, path, _ in pending]
+        # A single report can take seconds to parse
+        parsed = map_jobs(parse_coverage_report, paths, jobs=jobs, min_items=2)
+
+    unreadable = []
+    for (project, path, key), packages in zip(pending, parsed):
+        count("files_read")
+        if packages is None:
+            unreadable.append(path)
+            continue
+        coverage[project] = packages
+        cache[path] = key + (packages,)
+
+    # Forget reports that were deleted, for the selected projects only
+    roots = tuple(os.path.join(CONTEXT.projects[p], "build", "") for p in projects)
+    stale = [path for path in cache if path.startswith(roots) and path not in reports.values()]
+    for path in stale:
+        del cache[path]
+    if pending or stale:
+        save_cache(COVERAGE_CACHE, cache)
+    return {project: coverage[project] for project in projects if project in coverage}, unreadable
+
+
+def add_counters(totals: dict[str, list[int]], counters: dict[str, tuple[int, int]]) -> None:
+    for counter in COUNTERS:
+        missed, covered = counters.get(counter, (0, 0))
+        sums = totals.setdefault(counter, [0, 0])
+        sums[0] += missed
+        sums[1] += covered
+
+
+def ratio(counters: dict, counter: str) -> float | None:
+    # Covered fraction, None when there is nothing to cover
+    missed, covered = counters.get(counter, (0, 0))
+    return covered / (missed + covered) if missed + covered else None
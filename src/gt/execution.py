@@ -0,0 +1,176 @@
+# Running a command in the directory of every subproject
+#
+# Commands run as child processes, at most 'jobs' at a time, each driven
+# by a thread that forwards or collects its output. With dependency order,
+# a subproject only starts once every subproject its build script refers
+# to has succeeded.
+import os, os.path, re, subprocess, sys, threading, time
+from . import *
+
+# project(':lib'), project(path: ':lib') and the type-safe projects.lib
+_PROJECT_REFERENCE = re.compile(r"""\bproject\s*\(\s*(?:path\s*[:=]\s*)?["']:([^"']+)["']""")
+_TYPESAFE_REFERENCE = re.compile(r"\bprojects\.([A-Za-z_][A-Za-z0-9_]*)")
+
+
+class ProjectRun:
+    def __init__(self, project: str) -> None:
+        self.project = project
+        self.status = "pending"     # ok, failed, cancelled or skipped once done
+        self.returncode: int | None = None
+        self.seconds = 0.0
+        self.output = b""
+
+
+def project_dependencies(projects: list[str]) -> dict[str, set[str]]:
+    # Maps every subproject to the ones among 'projects' its build script refers to
+    # Type-safe accessors turn 'my-lib' into 'myLib'
+    accessors = {re.sub(r"[-_](\w)", lambda m: m.group(1).upper(), p): p for p in projects}
+    dependencies = {}
+    for project in projects:
+        found = set()
+        for script in ("build.gradle.kts", "build.gradle"):
+            try:
+                with open(os.path.join(CONTEXT.projects[project], script), "r", errors="replace") as file:
+                    text = file.read()
+            except OSError:
+                continue
+            count("files_read")
+            # Subprojects are the directories below the root, so ':app:api' belongs to 'app'
+            found.update(path.split(":")[0] for path in _PROJECT_REFERENCE.findall(text))
+            for accessor in _TYPESAFE_REFERENCE.findall(text):
+                if accessor in accessors:
+                    found.add(accessors[accessor])
+        dependencies[project] = {p for p in found if p in projects and p != project}
+    return dependencies
+
+
+def _check_acyclic(dependencies: dict[str, set[str]]) -> None:
+    pending = {project: set(deps) for project, deps in dependencies.items()}
+    while pending:
+        ready = [project for project, deps in pending.items() if not deps]
+        if not ready:
+            raise Exception(f"The build scripts of {', '.join(sorted(pending))} depend on each other in a cycle.")
+        for project in ready:
+            del pending[project]
+        for deps in pending.values():
+            deps.difference_update(ready)
+
+
+class ProjectExecutor:
+    def __init__(self, command: list[str], *, jobs: int, grouped: bool = False, fail_fast: bool = False) -> None:
+        # A single argument is a shell command line, so that pipes and globs work
+        self.command = command[0] if len(command) == 1 else command
+        self.shell = len(command) == 1
+        self.jobs = jobs
+        self.grouped = grouped
+        self.fail_fast = fail_fast
+        self._lock = threading.Lock()
+        self._running: dict[str, subprocess.Popen] = {}
+        self._stopping = False
+        self._prefix_width = 0
+
+    def run(self, projects: list[str], *, dependencies: dict[str, set[str]] | None = None) -> list[ProjectRun]:
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+        if dependencies is not None:
+            _check_acyclic(dependencies)
+        runs = {project: ProjectRun(project) for project in projects}
+        self._prefix_width = max((len(p) for p in projects), default=0)
+        waiting = list(projects)
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            try:
+                while waiting or futures:
+                    # Start whatever is ready, in the order of 'projects'
+                    for project in list(waiting):
+                        deps = dependencies.get(project, set()) if dependencies is not None else set()
+                        if any(runs[d].status in ("failed", "cancelled", "skipped") for d in deps):
+                            runs[project].status = "skipped"
+                            waiting.remove(project)
+                        elif self._stopping:
+                            runs[project].status = "cancelled"
+                            waiting.remove(project)
+                        elif all(runs[d].status == "ok" for d in deps) and len(futures) < self.jobs:
+                            runs[project].status = "running"
+                            futures[executor.submit(self._run_one, runs[project])] = project
+                            waiting.remove(project)
+                    if not futures:
+                        continue
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del futures[future]
+                        run = future.result()
+                        if self.grouped:
+                            self._print_group(run)
+                        if run.status == "failed" and self.fail_fast:
+                            self._stop()
+            except KeyboardInterrupt:
+                self._stop()
+                raise
+        return [runs[project] for project in projects]
+
+    def _stop(self) -> None:
+        with self._lock:
+            self._stopping = True
+            for process in self._running.values():
+                process.terminate()
+
+    def _run_one(self, run: ProjectRun) -> ProjectRun:
+        start = time.perf_counter()
+        env = dict(os.environ, GT_PROJECT=run.project, GT_PROJECT_DIR=CONTEXT.projects[run.project])
+        count("subprocesses_spawned")
+        with self._lock:
+            if self._stopping:
+                run.status = "cancelled"
+                return run
+            try:
+                process = subprocess.Popen(self.command, shell=self.shell, cwd=CONTEXT.projects[run.project], env=env,
+                                           stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            except OSError as e:
+                process = None
+                error = e.strerror
+            else:
+                self._running[run.project] = process
+        if process is None:
+            run.status = "failed"
+            run.returncode = 127
+            message = f"✘ Unable to run the command: {error}\n".encode()
+            if self.grouped:
+                run.output = message
+            else:
+                self._write_line(run.project, message)
+            return run
+        chunks = []
+        for line in process.stdout:
+            if self.grouped:
+                chunks.append(line)
+            else:
+                self._write_line(run.project, line)
+        process.stdout.close()
+        run.returncode = process.wait()
+        with self._lock:
+            del self._running[run.project]
+            cancelled = self._stopping and run.returncode < 0
+        run.output = b"".join(chunks)
+        run.seconds = time.perf_counter() - start
+        run.status = "cancelled" if cancelled else "ok" if run.returncode == 0 else "failed"
+        return run
+
+    def _write_line(self, project: str, line: bytes) -> None:
+        if not line.endswith(b"\n"):
+            line += b"\n"
+        prefix = f"{project.ljust(self._prefix_width)} │ ".encode()
+        with self._lock:
+            sys.stdout.buffer.write(prefix + line)
+            sys.stdout.buffer.flush()
+
+    def _print_group(self, run: ProjectRun) -> None:
+        # Groups are printed whole, in the order the commands finish
+        mark = "✔" if run.status == "ok" else "✘"
+        header = f"{mark} {run.project} ({run.seconds:.2f}s"
+        header += ")" if run.status == "ok" else f", {run.status}, exit code {run.returncode})"
+        output = run.output if not run.output or run.output.endswith(b"\n") else run.output + b"\n"
+        with self._lock:
+            sys.stdout.flush()
+            sys.stdout.buffer.write(header.encode() + b"\n" + output)
+            sys.stdout.buffer.flush()
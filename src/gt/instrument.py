@@ -0,0 +1,148 @@
+# Lightweight timing spans and counters
+#
+# Enabled with GT_PROFILE=<format>[:<path>][,<format>[:<path>]...]
+# or 'gt --profile[=<spec>] ...', where <format> is one of:
+#   jsonl    - one JSON object per span (stderr unless a path is given)
+#   chrome   - Chrome trace event format (default path: gt-trace.json)
+#   cprofile - cProfile dump (default path: gt.prof)
+#
+# When disabled, span() hands back a shared no-op context manager and
+# count() returns immediately, so the instrumentation can stay in place.
+import os, sys, time
+
+ENABLED = False
+
+_outputs: list[tuple[str, str]] = []
+_counters: dict[str, int] = {}
+_events: list[dict] = []
+_depth = 0
+_origin = 0.0
+_profiler = None
+
+
+class _NullSpan:
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, name: str, args: dict) -> None:
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> "_Span":
+        global _depth
+        self.counters = dict(_counters)
+        self.depth = _depth
+        _depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        global _depth
+        end = time.perf_counter()
+        _depth -= 1
+        delta = {}
+        for counter, value in _counters.items():
+            diff = value - self.counters.get(counter, 0)
+            if diff:
+                delta[counter] = diff
+        _events.append({
+            "name"     : self.name,
+            "start_ms" : round((self.start - _origin) * 1000, 3),
+            "dur_ms"   : round((end - self.start) * 1000, 3),
+            "depth"    : self.depth,
+            "args"     : self.args,
+            "counters" : delta,
+            "error"    : exc_info[0].__name__ if exc_info[0] else None,
+        })
+        return False
+
+
+def span(name: str, **args) -> _Span | _NullSpan:
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def count(counter: str, n: int = 1) -> None:
+    if ENABLED:
+        _counters[counter] = _counters.get(counter, 0) + n
+
+
+def enable(spec: str) -> None:
+    global ENABLED, _origin, _profiler
+    if ENABLED:
+        return
+
+    for entry in spec.split(","):
+        fmt, _, path = entry.strip().partition(":")
+        if fmt in ("", "1", "true", "json"):
+            fmt = "jsonl"
+        if fmt not in ("jsonl", "chrome", "cprofile"):
+            raise Exception(f"'{fmt}' is not a valid profile format. Valid formats: jsonl, chrome, cprofile")
+        if not path and fmt == "chrome":
+            path = "gt-trace.json"
+        elif not path and fmt == "cprofile":
+            path = "gt.prof"
+        # Commands are free to chdir, so pin the output location now
+        if path:
+            path = os.path.abspath(path)
+        _outputs.append((fmt, path))
+
+    ENABLED = True
+    _origin = time.perf_counter()
+
+    if any(fmt == "cprofile" for fmt, _ in _outputs):
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+    import atexit
+    atexit.register(_emit)
+
+
+def _emit() -> None:
+    import json
+
+    if _profiler:
+        _profiler.disable()
+
+    for fmt, path in _outputs:
+        if fmt == "cprofile":
+            _profiler.dump_stats(path)
+        elif fmt == "chrome":
+            pid = os.getpid()
+            trace_events = []
+            for e in _events:
+                trace_events.append({
+                    "name" : e["name"],
+                    "ph"   : "X",
+                    "ts"   : e["start_ms"] * 1000,
+                    "dur"  : e["dur_ms"] * 1000,
+                    "pid"  : pid,
+                    "tid"  : 0,
+                    "args" : {**e["args"], **e["counters"]},
+                })
+            trace_events.append({"name": "counters", "ph": "C", "ts": 0, "pid": pid, "tid": 0, "args": _counters})
+            with open(path, "w") as file:
+                json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, file)
+        else:
+            file = open(path, "w") if path else sys.stderr
+            try:
+                for e in _events:
+                    file.write(json.dumps({"type": "span", **e}) + "\n")
+                file.write(json.dumps({"type": "counters", "counters": _counters}) + "\n")
+            finally:
+                if path:
+                    file.close()
+
+
+if os.environ.get("GT_PROFILE"):
+    enable(os.environ["GT_PROFILE"])
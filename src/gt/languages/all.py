@@ -1,28 +1,591 @@
-import os.path, subprocess
+import os.path, sys, time
 from .. import *
 from ..utils import *
+from ..output import *
+from .jvm import tree
 
 
-def _add_project(args: List[str]) -> None:
+def _add_project(args: list[str]) -> None:
     pass
 
 
-def _ls_cmd(args: List[str]) -> None:
+def _artifacts(args: list[str]) -> None:
+    # Syntax: gt - artifacts [subprojects] [--compare <manifest>] [-j <jobs>] [--format json|jsonl|nul]
+    from ..artifacts import collect_artifacts, compare_artifacts, load_manifest
+
+    projects = []
+    manifest_path = ""
+    jobs = os.cpu_count() or 1
+    output_format = ""
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt == "--compare":
+            ensure_sufficient_args(args=args, err_msg="The '--compare' option must be followed by a manifest file.")
+            manifest_path = args.pop(0)
+        elif opt == "-j":
+            jobs = extract_jobs_from_opt(args=args, cmd="gt - artifacts")
+        elif opt == "--format" or opt.startswith("--format="):
+            output_format = extract_format_from_opt(opt=opt, args=args, cmd="gt - artifacts")
+        elif opt.startswith("-"):
+            unrecognized_opts.add(opt)
+        else:
+            projects.append(opt)
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt - artifacts")
+    if output_format == "nul" and manifest_path:
+        raise Exception("'gt - artifacts --compare' supports the json and jsonl formats only.")
+
+    manifest = load_manifest(manifest_path) if manifest_path else None
+    projects_dne = [p for p in projects if p not in CONTEXT.projects]
+    selected = [p for p in dict.fromkeys(projects or CONTEXT.projects) if p in CONTEXT.projects]
+
+    records, unreadable = collect_artifacts(selected, jobs=jobs)
+    diagnostics = sys.stderr if output_format else sys.stdout
+
+    if manifest is None:
+        if output_format:
+            emit_records(records, output_format)
+        else:
+            for record in records:
+                print(f"{record['sha256']}  {record['size']:>14,}  {record['name']}")
+            total = sum(record["size"] for record in records)
+            print(f"{len(records)} artifact{'s' if len(records) != 1 else ''}, {total:,} bytes")
+    else:
+        if projects:
+            # Only the artifacts of the selected subprojects are expected
+            prefixes = tuple(os.path.join(os.path.relpath(CONTEXT.projects[p], CONTEXT.root_project), "")
+                             .replace(os.sep, "/").removeprefix("./") for p in selected)
+            manifest = {name: digest for name, digest in manifest.items() if name.startswith(prefixes)}
+        comparisons = list(compare_artifacts(manifest, records))
+        if output_format:
+            emit_records(comparisons, output_format)
+        else:
+            for record in comparisons:
+                if record["change"] == "identical":
+                    print(f"✔ {record['name']}")
+                elif record["change"] == "differs":
+                    print(f"✘ {record['name']}: expected {record['expected']}, got {record['actual']}")
+                else:
+                    print(f"✘ {record['name']}: {record['change']}")
+        mismatches = sum(1 for record in comparisons if record["change"] != "identical")
+
+    for path in unreadable:
+        print(f"✘ Unable to read {path}", file=diagnostics)
+    if projects_dne:
+        report_nonexisting_projects(projects_dne, file=diagnostics)
+    if manifest is not None and mismatches:
+        print(f"✘ {mismatches} of {len(comparisons)} artifact{'s' if len(comparisons) != 1 else ''} "
+              f"do not match '{manifest_path}'", file=diagnostics)
+        sys.stdout.flush()
+        sys.exit(1)
+
+
+def _ls_cmd(args: list[str]) -> None:
     if args:
         raise Exception("The 'gt - ls-cmd' command does not accept any argument.")
     for cmd in COMMANDS:
         print(cmd)
 
 
-def _projects(args: List[str]) -> None:
+def _catalog(args: list[str]) -> None:
+    # Syntax: gt - catalog [--index] [--bump <version|alias>] [--format json|jsonl]
+    from ..catalog import VersionCatalog, accessor_of, analyze_catalog, bump_impact, load_catalog_index
+
+    show_index = False
+    bump = ""
+    output_format = ""
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt == "--index":
+            show_index = True
+        elif opt == "--bump":
+            ensure_sufficient_args(args=args, err_msg="The '--bump' option must be followed by a version or an alias.")
+            bump = args.pop(0)
+        elif opt == "--format" or opt.startswith("--format="):
+            output_format = extract_format_from_opt(opt=opt, args=args, cmd="gt - catalog")
+        else:
+            unrecognized_opts.add(opt)
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt - catalog")
+    if output_format == "nul":
+        raise Exception("'gt - catalog' supports the json and jsonl formats only.")
+
+    catalog_path = os.path.join(CONTEXT.root_project, "gradle", "libs.versions.toml")
+    if not os.path.isfile(catalog_path):
+        raise Exception(f"The build does not have a version catalog at {catalog_path}.")
+    catalog = VersionCatalog(catalog_path)
+    with span("catalog index"):
+        index = load_catalog_index()
+    analysis = analyze_catalog(catalog, index)
+    usage = analysis["usage"]
+
+    def accessor(kind: str, alias: str) -> str:
+        prefix = {"library": "", "bundle": "bundles.", "plugin": "plugins.", "version": "versions."}[kind]
+        return f"libs.{prefix}{accessor_of(alias)}"
+
+    if bump:
+        entries, projects = bump_impact(catalog, usage, bump)
+        if output_format:
+            emit_records([{"type": "affected_entry", "kind": kind, "name": alias, "accessor": accessor(kind, alias)}
+                          for kind, alias in entries] +
+                         [{"type": "affected_project", "name": project} for project in projects], output_format)
+            return
+        print(f"Bumping '{bump}' changes {len(entries)} catalog entr{'ies' if len(entries) != 1 else 'y'}:")
+        for kind, alias in entries:
+            print(f"  {kind:8} {accessor(kind, alias)}")
+        print(f"and affects {len(projects)} subproject{'s' if len(projects) != 1 else ''}:")
+        for project in projects:
+            print(f"  {project}")
+        return
+
+    # Versions are used directly, or through the used libraries and plugins that refer to them
+    referenced = {ref for kind, aliases in (("library", catalog.libraries), ("plugin", catalog.plugins))
+                  for alias, (_, _, ref) in aliases.items() if ref and (kind, alias) in usage}
+    entries = [("library", a) for a in catalog.libraries] + [("bundle", a) for a in catalog.bundles] \
+              + [("plugin", a) for a in catalog.plugins] + [("version", a) for a in catalog.versions]
+    unused = [(kind, alias) for kind, alias in entries if (kind, alias) not in usage
+              and not (kind == "version" and alias in referenced)]
+
+    if output_format:
+        records = []
+        if show_index:
+            records += [{"type": "alias", "kind": kind, "name": alias, "accessor": accessor(kind, alias),
+                         "projects": usage.get((kind, alias), [])} for kind, alias in entries]
+        records += [{"type": "unused", "kind": kind, "name": alias, "accessor": accessor(kind, alias)}
+                    for kind, alias in unused]
+        records += [{"type": "hardcoded", "project": project, "path": path, "line": line, "coordinates": text,
+                     "alias": alias, "accessor": accessor("library", alias)}
+                    for project, path, line, text, alias in analysis["hardcoded"]]
+        records += [{"type": "unresolved", "project": project, "accessor": f"libs.{name}"}
+                    for project, name in analysis["unresolved"]]
+        emit_records(records, output_format)
+        return
+
+    print(f"{os.path.relpath(catalog_path, CONTEXT.root_project)}: {len(catalog.libraries)} libraries, "
+          f"{len(catalog.bundles)} bundles, {len(catalog.plugins)} plugins, {len(catalog.versions)} versions; "
+          f"{len(index)} build script{'s' if len(index) != 1 else ''} checked")
+    if show_index:
+        print()
+        width = max((len(accessor(kind, alias)) for kind, alias in entries), default=0)
+        for kind, alias in entries:
+            projects = usage.get((kind, alias), [])
+            print(f"{accessor(kind, alias).ljust(width)}  {', '.join(projects) if projects else '-'}")
+    if unused:
+        print()
+        print("Unused entries:")
+        for kind, alias in unused:
+            print(f"✘ {kind:8} {accessor(kind, alias)}")
+    if analysis["hardcoded"]:
+        print()
+        print("Hard-coded coordinates with a catalog entry:")
+        for project, path, line, text, alias in analysis["hardcoded"]:
+            print(f"✘ {os.path.relpath(path, CONTEXT.root_project)}:{line}: '{text}' is {accessor('library', alias)}")
+    if analysis["unresolved"]:
+        print()
+        print("Accessors without a catalog entry:")
+        for project, name in analysis["unresolved"]:
+            print(f"✘ {project}: libs.{name}")
+    if not unused and not analysis["hardcoded"] and not analysis["unresolved"]:
+        print("✔ Every catalog entry is used and no build script bypasses the catalog.")
+
+
+def _coverage(args: list[str]) -> None:
+    # Syntax: gt - coverage [subprojects] [-p] [--min <percent>] [--min-branch <percent>] [-j <jobs>] [--format json|jsonl]
+    from ..coverage import COUNTERS, add_counters, load_coverage, ratio
+
+    projects = []
+    by_package = False
+    thresholds = {}
+    jobs = os.cpu_count() or 1
+    output_format = ""
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt in ("-p", "--packages"):
+            by_package = True
+        elif opt in ("--min", "--min-branch"):
+            try:
+                percent = float(args.pop(0)) if args else -1.0
+            except ValueError:
+                percent = -1.0
+            if not 0 <= percent <= 100:
+                raise Exception(f"The '{opt}' option must be followed by a percentage between 0 and 100.")
+            thresholds["LINE" if opt == "--min" else "BRANCH"] = percent
+        elif opt == "-j":
+            jobs = extract_jobs_from_opt(args=args, cmd="gt - coverage")
+        elif opt == "--format" or opt.startswith("--format="):
+            output_format = extract_format_from_opt(opt=opt, args=args, cmd="gt - coverage")
+        elif opt.startswith("-"):
+            unrecognized_opts.add(opt)
+        else:
+            projects.append(opt)
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt - coverage")
+    if output_format == "nul":
+        raise Exception("'gt - coverage' supports the json and jsonl formats only.")
+
+    projects_dne = [p for p in projects if p not in CONTEXT.projects]
+    explicit = bool(projects)
+    projects = [p for p in dict.fromkeys(projects or CONTEXT.projects) if p in CONTEXT.projects]
+
+    coverage, unreadable = load_coverage(projects, jobs=jobs)
+
+    # Aggregate per project, or per package of each project
+    groups: dict[tuple, dict[str, list[int]]] = {}
+    per_project: dict[str, dict[str, list[int]]] = {}
+    total: dict[str, list[int]] = {}
+    for project, packages in coverage.items():
+        for package, counters in sorted(packages.items()):
+            if by_package:
+                add_counters(groups.setdefault((project, package or "(default)"), {}), counters)
+            add_counters(per_project.setdefault(project, {}), counters)
+            add_counters(total, counters)
+    if not by_package:
+        groups = {(project,): counters for project, counters in per_project.items()}
+
+    fields = ("project", "package") if by_package else ("project",)
+    if output_format:
+        def counts(counters: dict) -> dict:
+            names = {"LINE": "lines", "BRANCH": "branches"}
+            return {f"{names[c]}_{k}": counters.get(c, [0, 0])[i]
+                    for c in COUNTERS for i, k in enumerate(("missed", "covered"))}
+
+        records = [{"type": "coverage", **dict(zip(fields, key)), **counts(counters)} for key, counters in groups.items()]
+        if total:
+            records.append({"type": "total", **counts(total)})
+        emit_records(records, output_format)
+    elif groups:
+        def cells(counters: dict) -> tuple:
+            row = ()
+            for counter in COUNTERS:
+                missed, covered = counters.get(counter, [0, 0])
+                value = ratio(counters, counter)
+                row += (f"{covered:,}/{missed + covered:,}", "-" if value is None else f"{value * 100:.1f}%")
+            return row
+
+        header = (("Project", "Package") if by_package else ("Project",)) + ("Lines", "%", "Branches", "%")
+        table = [header] + [key + cells(counters) for key, counters in groups.items()]
+        table.append(("Total",) + ("",) * (len(fields) - 1) + cells(total))
+        widths = [max(len(row[i]) for row in table) for i in range(len(header))]
+        for index, row in enumerate(table):
+            if index == len(table) - 1:
+                print()
+            text = "  ".join(cell.ljust(width) if i < len(fields) else cell.rjust(width)
+                             for i, (cell, width) in enumerate(zip(row, widths)))
+            print(text.rstrip())
+
+    diagnostics = sys.stderr if output_format else sys.stdout
+    # Named subprojects must have a report; among all subprojects, at least one
+    missing = [p for p in projects if p not in coverage] if explicit else []
+    if projects and not coverage and not explicit:
+        print("✘ No JaCoCo reports found; run the jacocoTestReport task first", file=diagnostics)
+    for project in missing:
+        print(f"✘ No JaCoCo report for '{project}'", file=diagnostics)
+    for path in unreadable:
+        print(f"✘ Unable to read {path}", file=diagnostics)
+    if projects_dne:
+        report_nonexisting_projects(projects_dne, file=diagnostics)
+
+    # Every subproject with a report must reach the thresholds
+    below = []
+    for project, counters in per_project.items():
+        for counter, percent in thresholds.items():
+            value = ratio(counters, counter)
+            if value is not None and value * 100 < percent:
+                below.append(f"✘ {project}: {counter.lower()} coverage {value * 100:.1f}% is below {percent:g}%")
+    if below:
+        print("\n".join(below), file=diagnostics)
+    if thresholds and (below or missing or projects_dne or not coverage):
+        sys.stdout.flush()
+        sys.exit(1)
+
+
+def _exec(args: list[str]) -> None:
+    # Syntax: gt - exec [-j <jobs>] [--projects a,b] [--group] [--fail-fast] [--ordered] -- <command...>
+    from ..execution import ProjectExecutor, project_dependencies
+
+    usage = "Usage: gt - exec [-j <jobs>] [--projects a,b] [--group] [--fail-fast] [--ordered] -- <command...>"
+    projects = []
+    jobs = os.cpu_count() or 1
+    grouped = False
+    fail_fast = False
+    ordered = False
+    command = []
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt == "--":
+            command = args[:]
+            break
+        elif opt == "-j":
+            jobs = extract_jobs_from_opt(args=args, cmd="gt - exec")
+        elif opt == "--projects" or opt.startswith("--projects="):
+            value = opt.partition("=")[2] if "=" in opt else (args.pop(0) if args else "")
+            if not value:
+                raise Exception("The '--projects' option must be followed by a comma-separated list of subprojects.")
+            projects.extend(p for p in value.split(",") if p)
+        elif opt in ("-g", "--group"):
+            grouped = True
+        elif opt == "--fail-fast":
+            fail_fast = True
+        elif opt == "--ordered":
+            ordered = True
+        elif opt.startswith("-"):
+            unrecognized_opts.add(opt)
+        else:
+            # Without '--', the command starts at the first argument that is not an option
+            command = [opt] + args
+            break
+    args.clear()
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt - exec")
+    ensure_sufficient_args(args=command, err_msg=usage)
+
+    projects_dne = [p for p in projects if p not in CONTEXT.projects]
+    if projects_dne:
+        report_nonexisting_projects(projects_dne)
+        return
+    projects = list(dict.fromkeys(projects or CONTEXT.projects))
+
+    dependencies = project_dependencies(projects) if ordered else None
+    executor = ProjectExecutor(command, jobs=jobs, grouped=grouped, fail_fast=fail_fast)
+    start = time.perf_counter()
+    with span("exec run", projects=len(projects), jobs=jobs):
+        runs = executor.run(projects, dependencies=dependencies)
+    elapsed = time.perf_counter() - start
+
+    # Timings in the order of the subprojects
+    if not grouped:
+        print()
+    width = max(len(run.project) for run in runs)
+    for run in runs:
+        if run.status == "ok":
+            print(f"✔ {run.project.ljust(width)}  {run.seconds:8.2f}s")
+        elif run.status == "failed":
+            print(f"✘ {run.project.ljust(width)}  {run.seconds:8.2f}s  exit code {run.returncode}")
+        else:
+            print(f"✘ {run.project.ljust(width)}  {'':9}  {run.status}")
+    statuses = [run.status for run in runs]
+    summary = ", ".join(f"{statuses.count(status)} {label}" for status, label in
+                        (("ok", "succeeded"), ("failed", "failed"), ("cancelled", "cancelled"), ("skipped", "skipped"))
+                        if status in statuses)
+    print(f"{summary} in {elapsed:.2f}s")
+
+    # The exit code of the first subproject that failed, in the order of the subprojects
+    failed = [run for run in runs if run.status != "ok"]
+    if failed:
+        codes = [run.returncode for run in failed if run.returncode and run.returncode > 0]
+        sys.stdout.flush()
+        sys.exit(min(codes[0], 255) if codes else 1)
+
+
+def _log(args: list[str]) -> None:
+    # Syntax: gt - log <file|-> [-n <limit>] [--format json|jsonl]
+    from ..buildlog import LogAnalyzer, open_log
+
+    paths = []
+    limit = 10
+    output_format = ""
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt == "-n":
+            if not args or not args[0].isdigit() or int(args[0]) < 1:
+                raise Exception("The '-n' option must be followed by a positive number of entries.")
+            limit = int(args.pop(0))
+        elif opt == "--format" or opt.startswith("--format="):
+            output_format = extract_format_from_opt(opt=opt, args=args, cmd="gt - log")
+        elif opt.startswith("-") and opt != "-":
+            unrecognized_opts.add(opt)
+        else:
+            paths.append(opt)
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt - log")
+    if len(paths) != 1:
+        raise Exception("Usage: gt - log <file|-> [-n <limit>] [--format json|jsonl]")
+    if output_format == "nul":
+        raise Exception("'gt - log' supports the json and jsonl formats only.")
+
+    analyzer = LogAnalyzer(projects=CONTEXT.projects, root_project=CONTEXT.root_project, limit=limit)
+    try:
+        with open_log(paths[0]) as stream, span("log analyze", path=paths[0]):
+            analyzer.feed(stream)
+    except OSError as e:
+        raise Exception(f"Unable to read '{paths[0]}': {e.strerror}")
+
+    def ratio(value: float | None) -> str:
+        return "-" if value is None else f"{value:.0%}"
+
+    # Worst offenders first: failures, then the tasks that had to run
+    projects = sorted(analyzer.projects.items(),
+                      key=lambda item: (-item[1].errors, -item[1].outcomes["FAILED"],
+                                        -item[1].outcomes["EXECUTED"], -item[1].seconds, item[0]))
+    total = analyzer.totals()
+
+    if output_format:
+        records = [{"type": "build", "outcome": outcome, "duration": duration} for outcome, duration in analyzer.builds]
+        for name, stats in projects + [("", total)]:
+            records.append({"type": "project" if name else "total", "name": name or None,
+                            **{outcome.lower().replace("-", "_"): n for outcome, n in stats.outcomes.items()},
+                            "hit_ratio": stats.hit_ratio(), "avoidance_ratio": stats.avoidance_ratio(),
+                            "seconds": round(stats.seconds, 3), "deprecations": stats.deprecations,
+                            "errors": stats.errors, "error_samples": stats.error_samples})
+        records += [{"type": "task", "name": task, "seconds": seconds}
+                    for seconds, task in sorted(analyzer.slowest, reverse=True)]
+        records += [{"type": "failed_task", "name": task} for task in analyzer.failed_tasks]
+        records += [{"type": "deprecation", "message": message, "count": n}
+                    for message, n in sorted(analyzer.deprecations.items(), key=lambda item: -item[1])[:limit]]
+        emit_records(records, output_format)
+        return
+
+    for outcome, duration in analyzer.builds:
+        print(f"{'✔' if outcome == 'SUCCESSFUL' else '✘'} BUILD {outcome} in {duration}")
+    if analyzer.build_count > len(analyzer.builds):
+        print(f"  ... and {analyzer.build_count - len(analyzer.builds)} earlier builds")
+    tasks = sum(total.outcomes.values())
+    print(f"{analyzer.lines:,} lines, {tasks:,} tasks: "
+          + ", ".join(f"{n:,} {outcome.lower()}" for outcome, n in total.outcomes.items() if n))
+    print(f"Build cache hit ratio {ratio(total.hit_ratio())}, "
+          f"work avoided for {ratio(total.avoidance_ratio())} of the tasks with outputs")
+    print()
+
+    if projects:
+        header = ("Project", "Executed", "From cache", "Up-to-date", "Failed", "Hit ratio", "Time", "Deprecations", "Errors")
+        table = [header]
+        for name, stats in projects:
+            table.append((name, f"{stats.outcomes['EXECUTED']:,}", f"{stats.outcomes['FROM-CACHE']:,}",
+                          f"{stats.outcomes['UP-TO-DATE']:,}", f"{stats.outcomes['FAILED']:,}",
+                          ratio(stats.hit_ratio()), f"{stats.seconds:.1f}s" if stats.seconds else "-",
+                          f"{stats.deprecations:,}", f"{stats.errors:,}"))
+        widths = [max(len(row[i]) for row in table) for i in range(len(header))]
+        for row in table:
+            print("  ".join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                            for i, (cell, width) in enumerate(zip(row, widths))).rstrip())
+        print()
+
+    if analyzer.slowest:
+        print("Slowest tasks:")
+        for seconds, task in sorted(analyzer.slowest, reverse=True):
+            print(f"  {seconds:8.1f}s  {task}")
+        print()
+    if analyzer.failed_tasks:
+        print("Failed tasks:")
+        for task in analyzer.failed_tasks:
+            print(f"✘ {task}")
+        print()
+    for name, stats in projects:
+        if stats.error_samples:
+            print(f"Compiler errors in {name}:")
+            for sample in stats.error_samples:
+                print(f"✘ {sample}")
+            if stats.errors > len(stats.error_samples):
+                print(f"  ... and {stats.errors - len(stats.error_samples)} more")
+            print()
+    if analyzer.deprecations or analyzer.deprecated_features_used:
+        print("Deprecations:")
+        for message, n in sorted(analyzer.deprecations.items(), key=lambda item: -item[1])[:limit]:
+            print(f"  {n:6,}  {message}")
+        if analyzer.deprecated_features_used:
+            print(f"  Deprecated Gradle features were used in {analyzer.deprecated_features_used} "
+                  f"build{'s' if analyzer.deprecated_features_used != 1 else ''}")
+
+
+def _profile_reports(args: list[str]) -> None:
+    # Syntax: gt - profile-reports [-n <limit>] [--runs <count>] [-j <jobs>] [--format json|jsonl]
+    from ..profilereport import aggregate, load_profile_reports, profile_dir
+
+    limit = 10
+    runs = 0
+    jobs = os.cpu_count() or 1
+    output_format = ""
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt == "-n":
+            if not args or not args[0].isdigit() or int(args[0]) < 1:
+                raise Exception("The '-n' option must be followed by a positive number of entries.")
+            limit = int(args.pop(0))
+        elif opt == "--runs":
+            if not args or not args[0].isdigit() or int(args[0]) < 1:
+                raise Exception("The '--runs' option must be followed by a positive number of builds.")
+            runs = int(args.pop(0))
+        elif opt == "-j":
+            jobs = extract_jobs_from_opt(args=args, cmd="gt - profile-reports")
+        elif opt == "--format" or opt.startswith("--format="):
+            output_format = extract_format_from_opt(opt=opt, args=args, cmd="gt - profile-reports")
+        else:
+            unrecognized_opts.add(opt)
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt - profile-reports")
+    if output_format == "nul":
+        raise Exception("'gt - profile-reports' supports the json and jsonl formats only.")
+
+    reports = load_profile_reports(jobs=jobs)
+    if not reports:
+        raise Exception(f"There are no profile reports in {profile_dir()}. Run a build with 'gradle --profile' first.")
+    if runs:
+        reports = reports[-runs:]
+
+    # Phases keep the order of the reports; subprojects and tasks are ranked by p90
+    phases = aggregate(reports, "phases")
+    sections = (
+        ("phase", "Build phase", list(phases.items())),
+        ("configuration", "Project configuration",
+         sorted(aggregate(reports, "configuration").items(), key=lambda item: (-item[1]["p90"], item[0]))[:limit]),
+        ("task", "Task", sorted(aggregate(reports, "tasks").items(), key=lambda item: (-item[1]["p90"], item[0]))[:limit]),
+    )
+
+    if output_format:
+        records = [{"type": "report", "name": name, "started": report["started"]} for name, report in reports]
+        records += [{"type": kind, "name": name, **{k: round(v, 3) if v is not None else None for k, v in summary.items()}}
+                    for kind, _, items in sections for name, summary in items]
+        emit_records(records, output_format)
+        return
+
+    def seconds(value: float) -> str:
+        return f"{value:.2f}s" if value < 60 else f"{int(value // 60)}m{value % 60:05.2f}s"
+
+    def trend(value: float | None) -> str:
+        return "-" if value is None or abs(value) < 0.005 else f"{value:+.0%}"
+
+    first = reports[0][1]["started"] or reports[0][0]
+    last = reports[-1][1]["started"] or reports[-1][0]
+    print(f"{len(reports)} profiled build{'s' if len(reports) != 1 else ''}, {first} to {last}")
+    for _, title, items in sections:
+        if not items:
+            continue
+        print()
+        header = (title, "Runs", "p50", "p90", "Max", "Last", "Trend")
+        table = [header]
+        for name, summary in items:
+            table.append((name, f"{summary['runs']:,}", seconds(summary["p50"]), seconds(summary["p90"]),
+                          seconds(summary["max"]), seconds(summary["last"]), trend(summary["trend"])))
+        widths = [max(len(row[i]) for row in table) for i in range(len(header))]
+        for row in table:
+            print("  ".join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                            for i, (cell, width) in enumerate(zip(row, widths))).rstrip())
+
+
+def _projects(args: list[str]) -> None:
     # Collect options
     plain_format = False
+    output_format = ""
     unrecognized_opts = set()
     while args:
         opt = args.pop(0)
         if opt.startswith("-"):
             if opt == "--plain-format":
                 plain_format = True
+            elif opt == "--format" or opt.startswith("--format="):
+                output_format = extract_format_from_opt(opt=opt, args=args, cmd="gt - projects")
             else:
                 unrecognized_opts.add(opt)
         else:
@@ -35,30 +598,52 @@ def _projects(args: List[str]) -> None:
     if unrecognized_opts:
         raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt - projects")
 
-    if not plain_format:
-        if SINGLE_PROJECT_BUILD:
+    if output_format:
+        emit_project_listing([p for p in CONTEXT.projects], output_format, included=get_included_subprojects())
+    elif not plain_format:
+        if CONTEXT.single_project_build and len(CONTEXT.builds) == 1:
             raise Exception("A single-project build does not contain any subprojects.")
         
         included_projects = get_included_subprojects()
         
         print("Projects list:")
         
-        for project in PROJECTS:
+        for project in CONTEXT.projects:
             if project in included_projects:
                 symbol = "+"
-            elif project == os.path.basename(ROOT_PROJECT):
+            elif CONTEXT.projects[project] == CONTEXT.project_build(project)[0].root:
+                # The root project of the build or of an included build
                 symbol = "∗"
             else:
                 symbol = "-"
             print(f"{symbol} {project}")
     else:
-        for project in PROJECTS:
+        for project in CONTEXT.projects:
             print(project)
 
 
-def _reports(args: List[str]) -> None:
-    if SINGLE_PROJECT_BUILD:
-        projects = [os.path.basename(ROOT_PROJECT)]
+def _reports(args: list[str]) -> None:
+    import subprocess
+
+    # Detect options
+    output_format = ""
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt.startswith("-"):
+            if opt == "--format" or opt.startswith("--format="):
+                output_format = extract_format_from_opt(opt=opt, args=args, cmd="gt - reports")
+            else:
+                unrecognized_opts.add(opt)
+        else:
+            args.insert(0, opt)
+            break
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt - reports")
+
+    if CONTEXT.single_project_build:
+        projects = [os.path.basename(CONTEXT.root_project)]
     else:
         if not args:
             # No subprojects specified
@@ -70,17 +655,30 @@ def _reports(args: List[str]) -> None:
     nonexistent_subprojects = []
     subprojects_without_reports = []
     reports_to_open     = []
+    records = []
     for s in projects:
-        if s not in PROJECTS:
+        if s not in CONTEXT.projects:
             nonexistent_subprojects.append(s)
         else:
-            index_html = os.path.join(PROJECTS[s], "build/reports/tests/test/index.html")
-            if not os.path.isfile(index_html):
+            index_html = os.path.join(CONTEXT.projects[s], "build/reports/tests/test/index.html")
+            available = os.path.isfile(index_html)
+            records.append({"type": "report", "project": s, "available": available,
+                            "path": index_html if available else None})
+            if not available:
                 subprojects_without_reports.append(s)
             else:
                 reports_to_open.append(index_html)
 
+    if output_format:
+        # List the reports instead of opening them
+        # Diagnostics go to stderr so that stdout stays parseable
+        emit_records(records, output_format)
+        for s in nonexistent_subprojects:
+            print(f"✘ Invalid subproject '{s}'", file=sys.stderr)
+        return
+
     for report in reports_to_open:
+        count("subprocesses_spawned")
         subprocess.Popen(args=["xdg-open", report])
 
     for s in subprojects_without_reports:
@@ -90,95 +688,296 @@ def _reports(args: List[str]) -> None:
         print(f"✘ Invalid subproject '{s}'")
 
 
-def _root(args:List[str]) -> None:
+def _rerun_failed(args: list[str]) -> None:
+    # Syntax: gt - rerun-failed [subprojects] [--run] [-j <jobs>] [--format json|jsonl] [-- <gradle args...>]
+    import shlex, subprocess
+    from ..testresults import collect_failures, build_invocations
+
+    projects = []
+    run = False
+    jobs = os.cpu_count() or 1
+    output_format = ""
+    gradle_args = []
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt == "--":
+            # Passed on to every Gradle invocation, e.g. '--info' or '--offline'
+            gradle_args = args[:]
+            args.clear()
+        elif opt == "--run":
+            run = True
+        elif opt == "-j":
+            jobs = extract_jobs_from_opt(args=args, cmd="gt - rerun-failed")
+        elif opt == "--format" or opt.startswith("--format="):
+            output_format = extract_format_from_opt(opt=opt, args=args, cmd="gt - rerun-failed")
+        elif opt.startswith("-"):
+            unrecognized_opts.add(opt)
+        else:
+            projects.append(opt)
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt - rerun-failed")
+    if output_format == "nul":
+        raise Exception("'gt - rerun-failed' supports the json and jsonl formats only.")
+    if run and output_format:
+        raise Exception("The '--run' and '--format' options cannot be used together.")
+
+    projects_dne = [p for p in projects if p not in CONTEXT.projects]
+    if not projects:
+        projects = [os.path.basename(CONTEXT.root_project)] if CONTEXT.single_project_build \
+            else get_included_subprojects()
+    projects = [p for p in dict.fromkeys(projects) if p in CONTEXT.projects]
+
+    failures, unreadable = collect_failures(projects, jobs=jobs)
+    invocations = build_invocations(failures, extra_args=gradle_args)
+
+    diagnostics = sys.stderr if output_format else sys.stdout
+    if output_format:
+        records = [{"type": "failure", "project": project, "task": task, "class": classname, "method": method}
+                   for (project, task), classes in sorted(failures.items())
+                   for classname in sorted(classes) for method in (sorted(classes[classname]) or [None])]
+        records += [{"type": "command", "argv": argv} for argv in invocations]
+        emit_records(records, output_format)
+    elif not invocations:
+        print("✔ No failed tests", file=diagnostics)
+    elif not run:
+        for argv in invocations:
+            print(shlex.join(argv))
+
+    for path in unreadable:
+        print(f"✘ Unable to read {path}", file=diagnostics)
+    if projects_dne:
+        report_nonexisting_projects(projects_dne, file=diagnostics)
+
+    if run and invocations:
+        # Every invocation runs, so that all failed tests get their new result
+        codes = []
+        for argv in invocations:
+            print(f"$ {shlex.join(argv)}")
+            sys.stdout.flush()
+            count("subprocesses_spawned")
+            with span("rerun-failed gradle", arguments=len(argv)):
+                try:
+                    codes.append(subprocess.run(argv, cwd=CONTEXT.root_project).returncode)
+                except OSError as e:
+                    raise Exception(f"Unable to run {argv[0]}: {e.strerror}")
+        failed = [code for code in codes if code != 0]
+        if failed:
+            sys.exit(min(failed[0], 255) if failed[0] > 0 else 1)
+
+
+def _rm_project(args: list[str]) -> None:
+    from ..settings import update_settings_file
+
+    ensure_sufficient_args(args=args, err_msg="Usage: gt - rm-project <subprojects>")
+    unrecognized_opts = {opt for opt in args if opt.startswith("-")}
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt - rm-project")
+
+    # Subprojects of included builds are removed from the settings files of their own builds
+    by_build: dict[str, list[str]] = {}
+    for project in dict.fromkeys(args):
+        build = CONTEXT.project_build(project)[0] if project in CONTEXT.projects else None
+        by_build.setdefault(build.settings_file if build else CONTEXT.settings_file, []).append(project)
+    if "" in by_build:
+        raise Exception("The current build does not have a settings file.")
+
+    # All includes of one settings file are removed in one atomic rewrite
+    # The subproject directories themselves are left untouched
+    for settings_file, projects in by_build.items():
+        local = {project: CONTEXT.project_build(project)[1] if project in CONTEXT.projects else project
+                 for project in projects}
+        _, removed = update_settings_file(settings_file, excludes=list(local.values()))
+        for project in projects:
+            if local[project] in removed:
+                print(f"✔ Removed subproject '{project}' from {os.path.basename(settings_file)}")
+            else:
+                print(f"✘ Skipped subproject '{project}' that is not included in {os.path.basename(settings_file)}")
+
+
+def _root(args:list[str]) -> None:
     if args:
         raise Exception("The 'gt - root' command does not accept any arguments.")
 
     # Return the full path of the root project
-    print(ROOT_PROJECT)
+    print(CONTEXT.root_project)
 
 
-def _tree(args: List[str]) -> None:
-    # Syntax: gt - tree [subprojects] [options]
-    projects = []
-    if SINGLE_PROJECT_BUILD:
-        if args:
-            print("All non-option arguments will be ignored for single-project builds.")
-            print()
-        projects.append(os.path.basename(ROOT_PROJECT))
-    else:
-        # Consume entries until the first option is encountered
-        while args:
-            entry = args.pop(0)
-            if not entry.startswith("-"):
-                if not SINGLE_PROJECT_BUILD:
-                    projects.append(entry)
-                # For single-project builds, all non-option arguments will be ignored
-            else:
-                args.insert(0, entry)
-                break
-        if not projects:
-            # List all projects if none are specified
-            projects = [p for p in PROJECTS]
-
-    # Process options
-    m_flag_present = False
-    t_flag_present = False
+def _snapshot(args: list[str]) -> None:
+    # Syntax: gt - snapshot save [<name>]
+    #         gt - snapshot diff [<name> [<other name>]] [--format json|jsonl]
+    from ..snapshot import build_snapshot, diff_snapshots, load_snapshot, save_snapshot, snapshot_size
+
+    ensure_sufficient_args(args=args, err_msg="Usage: gt - snapshot save|diff [<name>]")
+    action = args.pop(0)
+    names = []
+    output_format = ""
     unrecognized_opts = set()
     while args:
         opt = args.pop(0)
-        if opt.startswith("-"):
-            if opt == "-m":
-                m_flag_present = True
-            elif opt == "-t":
-                t_flag_present = True
-            else:
-                unrecognized_opts.add(opt)
+        if opt == "--format" or opt.startswith("--format="):
+            output_format = extract_format_from_opt(opt=opt, args=args, cmd="gt - snapshot")
+        elif opt.startswith("-"):
+            unrecognized_opts.add(opt)
         else:
-            args.insert(0, opt)
-            break
+            names.append(opt)
 
     if unrecognized_opts:
-        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt - tree")
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt - snapshot")
+    if action not in ("save", "diff"):
+        raise Exception(f"Invalid action '{action}': 'gt - snapshot' supports save and diff.")
+    if output_format == "nul" or (output_format and action == "save"):
+        raise Exception("'gt - snapshot diff' supports the json and jsonl formats only.")
+    if len(names) > (1 if action == "save" else 2):
+        raise Exception(f"Too many snapshot names for 'gt - snapshot {action}'.")
+
+    name = names[0] if names else "default"
+    previous = load_snapshot(name)
+    if action == "save":
+        # Unchanged files keep the hashes of the snapshot being replaced
+        tree = build_snapshot(previous)
+        save_snapshot(name, tree)
+        files = snapshot_size(tree)
+        print(f"✔ Saved snapshot '{name}' of {files} file{'s' if files != 1 else ''} "
+              f"in {len(tree[1])} subproject{'s' if len(tree[1]) != 1 else ''}")
+        return
+
+    if previous is None:
+        raise Exception(f"There is no snapshot named '{name}'. Create it with 'gt - snapshot save {name}'.")
+    if len(names) == 2:
+        current = load_snapshot(names[1])
+        if current is None:
+            raise Exception(f"There is no snapshot named '{names[1]}'.")
+    else:
+        current = build_snapshot(previous)
 
-    projects_dne = []
-    projects_without_src_set = []
-    for p in projects:
-        if p not in PROJECTS:
-            projects_dne.append(p)
+    with span("snapshot diff"):
+        records = list(diff_snapshots(previous, current))
+    if output_format:
+        emit_records(records, output_format)
+        return
+
+    symbols = {"added": "+", "removed": "-", "modified": "~"}
+    location = None
+    for record in records:
+        if record["type"] == "project":
+            print(f"{symbols[record['change']]} project {record['name']}")
+            continue
+        if (record["project"], record["src_type"]) != location:
+            location = (record["project"], record["src_type"])
+            print(f"{record['project']} ({record['src_type']}):")
+        kind = "source set" if record["type"] == "source_set" else record["type"]
+        print(f"  {symbols[record['change']]} {kind} {record['name']}")
+    changes = {change: sum(1 for r in records if r["change"] == change) for change in symbols}
+    print(f"{changes['added']} added, {changes['removed']} removed, {changes['modified']} modified "
+          f"since snapshot '{name}'.")
+
+
+def _stats(args: list[str]) -> None:
+    # Syntax: gt - stats [subprojects] [-p] [--sort name|files|lines|bytes] [-j <jobs>] [--format json|jsonl]
+    from ..stats import collect_source_stats
+
+    projects = []
+    by_package = False
+    sort_key = "name"
+    jobs = os.cpu_count() or 1
+    output_format = ""
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt in ("-p", "--packages"):
+            by_package = True
+        elif opt == "--sort":
+            if not args or args[0] not in ("name", "files", "lines", "bytes"):
+                raise Exception("The '--sort' option must be followed by one of: name, files, lines, bytes")
+            sort_key = args.pop(0)
+        elif opt == "-j":
+            jobs = extract_jobs_from_opt(args=args, cmd="gt - stats")
+        elif opt == "--format" or opt.startswith("--format="):
+            output_format = extract_format_from_opt(opt=opt, args=args, cmd="gt - stats")
+        elif opt.startswith("-"):
+            unrecognized_opts.add(opt)
         else:
-            src_root = os.path.join(PROJECTS[p], "src")
-            if not os.path.isdir(src_root):
-                projects_without_src_set.append(p)
-            else:
-                os.chdir(src_root)
-                basedirs = []
-                if m_flag_present:
-                    basedirs.append("main")
-                if t_flag_present:
-                    basedirs.append("test")
-                if not basedirs:
-                    basedirs = ["main", "test"]
-                for basedir in basedirs:
-                    if not os.path.isdir(basedir):
-                        projects_without_src_set.append(p)
-                        break
-                else:
-                    print(f"{p}:")
-                    for basedir in basedirs:
-                        os.system(f"tree --noreport {basedir}")
+            projects.append(opt)
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt - stats")
+    if output_format == "nul":
+        raise Exception("'gt - stats' supports the json and jsonl formats only.")
+
+    projects_dne = [p for p in projects if p not in CONTEXT.projects]
+    projects = [p for p in dict.fromkeys(projects or CONTEXT.projects) if p in CONTEXT.projects]
+
+    rows, unreadable = collect_source_stats(projects, jobs=jobs)
+
+    # Aggregate per project and language, or per package of each source set
+    groups: dict[tuple, list[int]] = {}
+    totals: dict[str, list[int]] = {}
+    for project, src_type, language, package, lines, size in rows:
+        key = (project, src_type, language, package or "(default)") if by_package else (project, language)
+        for sums in (groups.setdefault(key, [0, 0, 0]), totals.setdefault(language, [0, 0, 0])):
+            sums[0] += 1
+            sums[1] += lines
+            sums[2] += size
+    languages = sorted(totals.items())
+    languages.append(("all", [sum(sums[i] for sums in totals.values()) for i in range(3)]))
+
+    keys = sorted(groups)
+    if sort_key != "name":
+        column = ("files", "lines", "bytes").index(sort_key)
+        keys.sort(key=lambda k: groups[k][column], reverse=True)
+
+    fields = ("project", "src_type", "language", "package") if by_package else ("project", "language")
+    if output_format:
+        records = [{"type": "stats", **dict(zip(fields, key)),
+                    "files": groups[key][0], "lines": groups[key][1], "bytes": groups[key][2]} for key in keys]
+        records += [{"type": "total", "language": language, "files": sums[0], "lines": sums[1], "bytes": sums[2]}
+                    for language, sums in languages]
+        emit_records(records, output_format)
+    else:
+        header = ("Project", "Source set", "Language", "Package") if by_package else ("Project", "Language")
+        table = [header + ("Files", "Lines", "Bytes")]
+        table += [key + tuple(f"{n:,}" for n in groups[key]) for key in keys]
+        for language, sums in languages:
+            row = ["Total"] + [""] * (len(header) - 1)
+            if language != "all":
+                row[header.index("Language")] = language
+            table.append(tuple(row) + tuple(f"{n:,}" for n in sums))
+        widths = [max(len(row[i]) for row in table) for i in range(len(header) + 3)]
+        for index, row in enumerate(table):
+            if index == len(keys) + 1:
                 print()
+            text = "  ".join(cell.ljust(width) if i < len(header) else cell.rjust(width)
+                             for i, (cell, width) in enumerate(zip(row, widths)))
+            print(text.rstrip())
 
-    if projects_without_src_set:
-        report_incomplete_or_missing_src_sets(projects_without_src_set, src_language="all")
+    diagnostics = sys.stderr if output_format else sys.stdout
+    for path in unreadable:
+        print(f"✘ Unable to read {path}", file=diagnostics)
     if projects_dne:
-        report_nonexisting_projects(projects_dne)
+        report_nonexisting_projects(projects_dne, file=diagnostics)
+
+
+def _tree(args: list[str]) -> None:
+    tree(args, language="all")
+
 
 COMMANDS = {
-    "add-project" : _add_project,
-    "ls-cmd"      : _ls_cmd,
-    "projects"    : _projects,
-    "reports"     : _reports,
-    "root"        : _root,
-    "tree"        : _tree
+    "add-project"     : _add_project,
+    "artifacts"       : _artifacts,
+    "catalog"         : _catalog,
+    "coverage"        : _coverage,
+    "exec"            : _exec,
+    "log"             : _log,
+    "ls-cmd"          : _ls_cmd,
+    "profile-reports" : _profile_reports,
+    "projects"        : _projects,
+    "reports"         : _reports,
+    "rerun-failed"    : _rerun_failed,
+    "rm-project"      : _rm_project,
+    "root"            : _root,
+    "snapshot"        : _snapshot,
+    "stats"           : _stats,
+    "tree"            : _tree
 }
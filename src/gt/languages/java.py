@@ -1,11 +1,14 @@
-import os.path, re
-from typing import List, Tuple
+import os.path, sys
 from .. import *
 from ..utils import *
+from ..output import *
+from .jvm import ls_pkg, tree
 
 
 class JavaSourceFile(SourceFile):
     # For java, each source file is associated with one public class
+    __slots__ = ("package",)
+
     def __init__(self, *, classname: str, project: str, src_type: str = "main") -> None:
 
         # Separate package and file names
@@ -19,18 +22,32 @@ class JavaSourceFile(SourceFile):
         if not pkgname:
             self.package = None
         else:
-            self.package = JavaPackage(pkgname=pkgname, project=self.project, src_type=self.src_type)
+            self.package = JavaPackage.interned(pkgname=pkgname, project=self.project, src_type=self.src_type)
 
     def directory(self) -> str:
-        rel_path = os.sep.join(["src", self.src_type, "java"])
+        # Classes of one package share the path of its interned package
         if self.package:
-            rel_path = os.path.join(rel_path, self.package.name_to_rel_path())
-        return os.path.join(PROJECTS[self.project], rel_path)
+            return self.package.path()
+        return super().directory()
 
     def create(self) -> None:
         # The package needs to exist first before the file can be created
         super().create()
 
+    @staticmethod
+    def batch(classnames: list[str], *, project: str, src_type: str = "main") -> SourceFileBatch:
+        # Validates like the constructor, without an object per class
+        batch = SourceFileBatch(language="java")
+        default_directory = os.path.join(CONTEXT.projects[project], "src", src_type, "java")
+        for classname in classnames:
+            pkgname, name = JavaPackage.split_qualified_classname(classname)
+            JavaSourceFile.validate_classname(name)
+            if pkgname:
+                batch.add(JavaPackage.interned(pkgname=pkgname, project=project, src_type=src_type).path(), name)
+            else:
+                batch.add(default_directory, name)
+        return batch
+
     @staticmethod
     def validate_classname(classname: str) -> None:
         if not classname:
@@ -46,6 +63,11 @@ class JavaSourceFile(SourceFile):
 
 
 class JavaPackage(Package):
+    __slots__ = ()
+
+    # One shared, validated instance per (project, src_type, package)
+    _interned: dict[tuple[str, str, str], "JavaPackage"] = {}
+
     def __init__(self, *, pkgname: str, project: str, src_type: str) -> None:
 
         # Make sure the package name obeys Java rules
@@ -55,7 +77,15 @@ class JavaPackage(Package):
         super().__init__(name=pkgname, project=project, language="java", src_type=src_type)
 
     @staticmethod
-    def split_qualified_classname(classname: str) -> Tuple[str, str]:
+    def interned(*, pkgname: str, project: str, src_type: str) -> "JavaPackage":
+        key = (project, src_type, pkgname)
+        package = JavaPackage._interned.get(key)
+        if package is None:
+            package = JavaPackage._interned[key] = JavaPackage(pkgname=pkgname, project=project, src_type=src_type)
+        return package
+
+    @staticmethod
+    def split_qualified_classname(classname: str) -> tuple[str, str]:
         # p1.p2.classname will yield ("p1.p2", "classname")
         components = classname.rsplit(".", 1)
         if len(components) == 1:
@@ -76,8 +106,152 @@ class JavaPackage(Package):
             if str.isdigit(name[0]):
                 raise Exception("Package names cannot begin with a digit.")
 
+
+def java_src_types(project: str) -> list[str]:
+    # Every source set with a java directory, e.g. main, test, integrationTest
+    src_root = os.path.join(CONTEXT.projects[project], "src")
+    try:
+        with os.scandir(src_root) as it:
+            return sorted(e.name for e in it if os.path.isdir(os.path.join(e.path, "java")))
+    except OSError:
+        return []
+
+
+def iter_java_sources(project: str, src_types: list[str] | None = None):
+    # Streams (src_type, pkgname, classname, path) for every .java file
+    # The package is derived from the directory, mirroring JavaPackage.name_to_rel_path()
+    for src_type in (src_types if src_types is not None else java_src_types(project)):
+        pending = [(os.path.join(CONTEXT.projects[project], "src", src_type, "java"), "")]
+        while pending:
+            directory, pkgname = pending.pop()
+            count("dirs_scanned")
+            try:
+                it = os.scandir(directory)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    name = entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append((entry.path, f"{pkgname}.{name}" if pkgname else name))
+                    elif name.endswith(".java"):
+                        yield src_type, pkgname, name[:-5], entry.path
+
+
+# Most package declarations sit within the first few KB of a file
+PACKAGE_HEADER_BYTES = 4096
+
+
+def find_package_declaration(header: bytes, *, complete: bool) -> tuple[str, int, int] | None:
+    # Returns (package, start, end) where header[start:end] is the whole
+    # 'package ...;' statement, ("", 0, 0) if the file has no declaration,
+    # or None if the header was cut off before the answer was known.
+    text = header.decode("latin-1") # one character per byte keeps offsets valid
+    n = len(text)
+    i = 0
+    while True:
+        while i < n and text[i].isspace():
+            i += 1
+        if i >= n:
+            return ("", 0, 0) if complete else None
+        if text.startswith("//", i):
+            i = text.find("\n", i)
+            if i < 0:
+                return ("", 0, 0) if complete else None
+        elif text.startswith("/*", i):
+            i = text.find("*/", i + 2)
+            if i < 0:
+                return ("", 0, 0) if complete else None
+            i += 2
+        elif text[i] == "@":
+            # Package annotations, as found in package-info.java
+            i += 1
+            while i < n and (text[i].isalnum() or text[i] in "_$."):
+                i += 1
+            j = i
+            while j < n and text[j].isspace():
+                j += 1
+            if j < n and text[j] == "(":
+                depth = 0
+                quote = ""
+                while j < n:
+                    c = text[j]
+                    if quote:
+                        if c == "\\":
+                            j += 1
+                        elif c == quote:
+                            quote = ""
+                    elif c in "\"'":
+                        quote = c
+                    elif c == "(":
+                        depth += 1
+                    elif c == ")":
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    j += 1
+                if j >= n:
+                    return ("", 0, 0) if complete else None
+                i = j + 1
+        elif not complete and n - i <= 7 and "package".startswith(text[i:]):
+            # Cut off within or right after the keyword
+            return None
+        elif text.startswith("package", i) and (i + 7 < n and not (text[i + 7].isalnum() or text[i + 7] in "_$")):
+            end = text.find(";", i)
+            if end < 0:
+                return ("", 0, 0) if complete else None
+            # Comments inside the name are legal but never seen in practice
+            name = "".join(text[i + 7:end].split())
+            return (name.encode("latin-1").decode("utf-8", "replace"), i, end + 1)
+        else:
+            # 'import', 'class', ... : there is no package declaration
+            return ("", 0, 0)
+
+
+def check_package_header(path: str, expected: str, fix: bool) -> tuple[str, str, str | None, bool]:
+    # Returns (path, expected, declared, fixed); declared is None if unreadable
+    try:
+        with open(path, "rb") as file:
+            header = file.read(PACKAGE_HEADER_BYTES)
+            complete = len(header) < PACKAGE_HEADER_BYTES
+            found = find_package_declaration(header, complete=complete)
+            if found is None:
+                header += file.read()
+                found = find_package_declaration(header, complete=True)
+    except OSError:
+        return (path, expected, None, False)
+
+    if not header.strip():
+        # Empty files, e.g. fresh from 'add-class', have nothing to disagree with
+        return (path, expected, expected, False)
+
+    declared, start, end = found
+    if declared == expected or not fix:
+        return (path, expected, declared, False)
+
+    with open(path, "rb") as file:
+        content = file.read()
+    statement = f"package {expected};".encode("utf-8") if expected else b""
+    if end:
+        if not statement and content[end:end + 1] == b"\n":
+            end += 1
+        content = content[:start] + statement + content[end:]
+    else:
+        content = statement + b"\n\n" + content
+    # Replaced by rename, so that readers never see a partial file
+    partial = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        with open(partial, "wb") as file:
+            file.write(content)
+        os.chmod(partial, os.stat(path).st_mode & 0o7777)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return (path, expected, declared, True)
+
 # Command handlers
-def _add_class(args: List[str]) -> None:
+def _add_class(args: list[str]) -> None:
     ensure_sufficient_args(args=args,
                            err_msg="Usage: gt java add-class [project] [-t] [-p <package_prefix>] <classes>") 
     project = extract_and_validate_project_from_args(args=args)
@@ -85,12 +259,15 @@ def _add_class(args: List[str]) -> None:
     # Detect options and their arguments
     include_test_tree = False
     package_flag_present = False
+    quiet = False
     unrecognized_opts = set()
     prefix_package = ""
     while args:
         opt = args.pop(0)
         if opt.startswith("-"):
-            if opt == "-t":
+            if opt in ("-q", "--quiet"):
+                quiet = True
+            elif opt == "-t":
                 include_test_tree = True
             elif opt == "-p":
                 package_flag_present = True
@@ -126,24 +303,27 @@ def _add_class(args: List[str]) -> None:
     else:
         test_classes = []
     
-    main_sources = [JavaSourceFile(classname=classname, project=project, src_type="main") for classname in main_classes]
-    test_sources = [JavaSourceFile(classname=classname, project=project, src_type="test") for classname in test_classes]
-    SourceFile.create_all(main_sources + test_sources)
+    sources = JavaSourceFile.batch(main_classes, project=project, src_type="main")
+    sources.extend(JavaSourceFile.batch(test_classes, project=project, src_type="test"))
+    SourceFile.create_all(sources, quiet=quiet)
 
 
-def _add_testclass(args: List[str]) -> None:
+def _add_testclass(args: list[str]) -> None:
     ensure_sufficient_args(args=args,
                            err_msg="Usage: gt java add-testclass [project] [-p <package_prefix>] <testclasses>")
     project = extract_and_validate_project_from_args(args=args)
     
     # Detect options and their arguments
     package_flag_present = False
+    quiet = False
     unrecognized_opts = set()
     prefix_package = ""
     while args:
         opt = args.pop(0)
         if opt.startswith("-"):
-            if opt == "-p":
+            if opt in ("-q", "--quiet"):
+                quiet = True
+            elif opt == "-p":
                 package_flag_present = True
                 if args:
                     value = args.pop(0)
@@ -167,11 +347,11 @@ def _add_testclass(args: List[str]) -> None:
         if not prefix_package:
             raise Exception("The '-p' option must be followed by a package name.")
         test_classes = [".".join([prefix_package, classname]) for classname in test_classes]
-    test_sources = [JavaSourceFile(classname=classname, project=project, src_type="test") for classname in test_classes]
-    SourceFile.create_all(test_sources)
+    test_sources = JavaSourceFile.batch(test_classes, project=project, src_type="test")
+    SourceFile.create_all(test_sources, quiet=quiet)
 
 
-def _add_pkg(args: List[str]) -> None:
+def _add_pkg(args: list[str]) -> None:
     ensure_sufficient_args(args=args, err_msg="Usage: gt java add-pkg [project] [-p <package_prefix>] [-t] <packages>")
     project = extract_and_validate_project_from_args(args=args)
 
@@ -179,11 +359,14 @@ def _add_pkg(args: List[str]) -> None:
     include_test = False
     include_prefix = False
     prefix_package = ""
+    quiet = False
     unrecognized_opts = set()
     while args:
         opt = args.pop(0)
         if opt.startswith("-"):
-            if opt == "-t":
+            if opt in ("-q", "--quiet"):
+                quiet = True
+            elif opt == "-t":
                 include_test = True
             elif opt == "-p":
                 include_prefix = True
@@ -215,13 +398,15 @@ def _add_pkg(args: List[str]) -> None:
     else:
         test_packages = []
     main_packages = [JavaPackage(pkgname=pkgname, project=project, src_type="main") for pkgname in pkgnames]
-    Package.create_all(main_packages + test_packages)
+    Package.create_all(main_packages + test_packages, quiet=quiet)
+
 
+def _add_project(args: list[str]) -> None:
+    import re
 
-def _add_project(args: List[str]) -> None:
     ensure_sufficient_args(args=args, err_msg="Usage: gt java add-project [--springboot [springboot options]] <project_names>\n\n"
                                               "For a full list of available springboot options, run 'curl https://start.spring.io'")
-    if SINGLE_PROJECT_BUILD:
+    if CONTEXT.single_project_build:
         response = input("The current build is a single-project build. "
                          "Do you still wish to add a new subproject? (y/n): ")
         response = response.lower()
@@ -239,7 +424,7 @@ def _add_project(args: List[str]) -> None:
     unrecognized_opts = set()
     package_specified = False
     springboot_project = False
-    springboot_parameters: Dict[str, str] = {}
+    springboot_parameters: dict[str, str] = {}
     while args:
         opt = args.pop(0)
         if opt.startswith("-"):
@@ -290,18 +475,21 @@ def _add_project(args: List[str]) -> None:
                 generate_subprojects(project_names=subprojects_specified, project_type="java-application")
 
 
-def _add_testpkg(args: List[str]) -> None:
+def _add_testpkg(args: list[str]) -> None:
     ensure_sufficient_args(args=args, err_msg="Usage: gt java add-testpkg [project] [-p <package_prefix>] <testpackages>")
     project = extract_and_validate_project_from_args(args=args)
 
     # Detect options
     include_prefix = False
     prefix_package = ""
+    quiet = False
     unrecognized_opts = set()
     while args:
         opt = args.pop(0)
         if opt.startswith("-"):
-            if opt == "-p":
+            if opt in ("-q", "--quiet"):
+                quiet = True
+            elif opt == "-p":
                 include_prefix = True
                 if args:
                     value = args.pop(0)
@@ -326,98 +514,288 @@ def _add_testpkg(args: List[str]) -> None:
         pkgnames = [".".join([prefix_package, name]) for name in pkgnames]
 
     test_packages = [JavaPackage(pkgname=pkgname, project=project, src_type="test") for pkgname in pkgnames]
-    Package.create_all(test_packages)
+    Package.create_all(test_packages, quiet=quiet)
 
 
-def _ls_cmd(args: List[str]) -> None:
-    if args:
-        raise Exception("'gt java ls-cmd' does not take any arguments.")
+def _dupes(args: list[str]) -> None:
+    # Syntax: gt java dupes [subprojects] [--format json|jsonl]
+    projects = []
+    output_format = ""
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt == "--format" or opt.startswith("--format="):
+            output_format = extract_format_from_opt(opt=opt, args=args, cmd="gt java dupes")
+        elif opt.startswith("-"):
+            unrecognized_opts.add(opt)
+        else:
+            projects.append(opt)
 
-    for cmd in COMMANDS:
-        print(cmd)
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt java dupes")
+    if output_format == "nul":
+        raise Exception("'gt java dupes' supports the json and jsonl formats only.")
+
+    projects_dne = [p for p in projects if p not in CONTEXT.projects]
+    projects = [p for p in (projects or CONTEXT.projects) if p in CONTEXT.projects]
+
+    # Hash join over every source file, keyed by fully qualified name
+    # Locations are small integers indexing 'locations' to keep entries compact
+    locations: list[tuple[str, str]] = []
+    location_ids: dict[tuple[str, str], int] = {}
+    first_seen: dict[str, int] = {}
+    collisions: dict[str, list[int]] = {}
+    pkg_owner: dict[str, str] = {}
+    split_pkgs: dict[str, set[str]] = {}
+    scanned = 0
+    with span("java dupes scan", projects=len(projects)):
+        for project in projects:
+            for src_type, pkgname, classname, _ in iter_java_sources(project):
+                # Every module and package may have its own descriptor
+                if classname in ("package-info", "module-info"):
+                    continue
+                scanned += 1
+                location = location_ids.get((project, src_type))
+                if location is None:
+                    location = location_ids[(project, src_type)] = len(locations)
+                    locations.append((project, src_type))
+                fqn = f"{pkgname}.{classname}" if pkgname else classname
+                seen = first_seen.setdefault(fqn, location)
+                if seen != location:
+                    if fqn in collisions:
+                        collisions[fqn].append(location)
+                    else:
+                        collisions[fqn] = [seen, location]
+
+                # A package is split when several subprojects contribute classes to it
+                owner = pkg_owner.setdefault(pkgname, project)
+                if owner != project:
+                    split_pkgs.setdefault(pkgname, {owner}).add(project)
+
+    duplicate_classes = [{"type": "class", "name": fqn,
+                          "locations": [{"project": locations[l][0], "src_type": locations[l][1]} for l in ids]}
+                         for fqn, ids in sorted(collisions.items())]
+    split_packages = [{"type": "package", "name": pkgname or "(default)", "projects": sorted(owners)}
+                      for pkgname, owners in sorted(split_pkgs.items())]
 
+    if output_format:
+        emit_records(duplicate_classes + split_packages, output_format)
+    else:
+        if duplicate_classes:
+            print("Duplicate classes:")
+            for record in duplicate_classes:
+                print(f"✘ {record['name']}")
+                for location in record["locations"]:
+                    print(f"    {location['project']} ({location['src_type']})")
+            print()
+        if split_packages:
+            print("Split packages:")
+            for record in split_packages:
+                print(f"✘ {record['name']}: {', '.join(record['projects'])}")
+            print()
+        print(f"Scanned {scanned} classes in {len(projects)} subproject{'s' if len(projects) != 1 else ''}: "
+              f"{len(duplicate_classes)} duplicate class{'es' if len(duplicate_classes) != 1 else ''}, "
+              f"{len(split_packages)} split package{'s' if len(split_packages) != 1 else ''}.")
+
+    if projects_dne:
+        report_nonexisting_projects(projects_dne, file=sys.stderr if output_format else sys.stdout)
 
-def _ls_pkg(args: List[str]) -> None:
-    # Detect options:
-    list_test = False
-    list_main = False
+
+def _find(args: list[str]) -> None:
+    # Syntax: gt java find <query> [-n <limit>] [--no-refresh] [--format json|jsonl|nul]
+    queries = []
+    limit = 20
+    refresh = True
+    output_format = ""
     unrecognized_opts = set()
     while args:
         opt = args.pop(0)
-        if opt.startswith("-"):
-            if opt == "-t":
-                list_test = True
-            elif opt == "-m":
-                list_main = True
-            else:
-                unrecognized_opts.add(opt)
+        if opt == "-n":
+            if not args or not args[0].isdigit() or int(args[0]) < 1:
+                raise Exception("The '-n' option must be followed by a positive number of results.")
+            limit = int(args.pop(0))
+        elif opt == "--no-refresh":
+            refresh = False
+        elif opt == "--format" or opt.startswith("--format="):
+            output_format = extract_format_from_opt(opt=opt, args=args, cmd="gt java find")
+        elif opt.startswith("-"):
+            unrecognized_opts.add(opt)
         else:
-            args.insert(0, opt)
-            break
+            queries.append(opt)
 
     if unrecognized_opts:
-        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt java ls-pkg")
-
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt java find")
+    if len(queries) != 1:
+        raise Exception("'gt java find' takes exactly one query, e.g. 'gt java find PaymentClient' or 'gt java find PCS'.")
+
+    from ..classindex import load_class_index
+    index = load_class_index(refresh=refresh)
+    with span("java find query", classes=len(index)):
+        matches = index.search(queries[0], limit)
+
+    records = []
+    for segment_id, pkg_id, name_id in matches:
+        project, src_type = index.segments[segment_id]
+        records.append({"type": "class", "project": project, "src_type": src_type, "language": "java",
+                        "name": index.fqn(pkg_id, name_id), "path": index.path(segment_id, pkg_id, name_id)})
+
+    if output_format:
+        emit_records(records, output_format)
+        return
+    for record in records:
+        print(f"{record['name']} ({record['project']}, {record['src_type']})")
+        print(f"    {record['path']}")
+    if not records:
+        print(f"✘ No classes matching '{queries[0]}'.")
+
+
+def _check_packages(args: list[str]) -> None:
+    # Syntax: gt java check-packages [subprojects] [--fix] [-j <jobs>]
     projects = []
-    projects_dne = []
-    projects_with_missing_src = []
-    if SINGLE_PROJECT_BUILD:
-        if args:
-            print("All non-option arguments will be ignored for single-project builds.")
-            print()
-        projects = [p for p in PROJECTS]
-    else:
-        source = PROJECTS if not projects else args
-        projects = [p for p in source]
-    
-    for p in projects:
-        if p not in PROJECTS:
-            projects_dne.append(p)
+    fix = False
+    jobs = os.cpu_count() or 1
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt == "--fix":
+            fix = True
+        elif opt == "-j":
+            jobs = extract_jobs_from_opt(args=args, cmd="gt java check-packages")
+        elif opt.startswith("-"):
+            unrecognized_opts.add(opt)
         else:
-            src_root = os.path.join(PROJECTS[p], "src")
-            if not os.path.isdir(src_root):
-                projects_dne.append(src_root)
+            projects.append(opt)
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt java check-packages")
+
+    projects_dne = [p for p in projects if p not in CONTEXT.projects]
+    projects = [p for p in (projects or CONTEXT.projects) if p in CONTEXT.projects]
+
+    paths = []
+    expected = []
+    for project in projects:
+        for _, pkgname, _, path in iter_java_sources(project):
+            paths.append(path)
+            expected.append(pkgname)
+
+    with span("java check-packages", files=len(paths), jobs=jobs):
+        results = map_jobs(check_package_header, paths, expected, [fix] * len(paths), jobs=jobs)
+
+    mismatches = 0
+    unreadable = 0
+    for path, expected, declared, fixed in results:
+        if declared is None:
+            unreadable += 1
+            print(f"✘ Unable to read {path}")
+        elif declared != expected:
+            mismatches += 1
+            found = f"'{declared}'" if declared else "no package"
+            wanted = f"'{expected}'" if expected else "the default package"
+            if fixed:
+                print(f"✔ Fixed {path}: declared {found}, now {wanted}")
             else:
-                os.chdir(src_root)
-                basedirs = []
-
-                if list_main:
-                    basedirs.append("main/java")
-                if list_test:
-                    basedirs.append("test/java")
-                if not basedirs:
-                    basedirs = ["main/java", "test/java"]
-
-                for basedir in basedirs:
-                    if not os.path.isdir(basedir):
-                        projects_with_missing_src.append(p)
-                        break
-                else:
-                    print(f"{p}:")
-                    for basedir in basedirs:
-                        os.system(f"tree --noreport -d {basedir}")
-                    print()
+                print(f"✘ {path}: declares {found}, expected {wanted}")
+
+    print(f"Checked {len(results)} file{'s' if len(results) != 1 else ''}: "
+          f"{mismatches} mismatch{'es' if mismatches != 1 else ''}"
+          f"{' fixed' if fix and mismatches else ''}"
+          f"{f', {unreadable} unreadable' if unreadable else ''}.")
 
     if projects_dne:
         report_nonexisting_projects(projects_dne)
 
-    if projects_with_missing_src:
-        report_incomplete_or_missing_src_sets(projects=projects_with_missing_src, src_language="java")
+
+def _clone_project(args: list[str]) -> None:
+    # Syntax: gt java clone-project <subproject> <new subproject> [--package <old>=<new>] [--hardlink]
+    import re
+    from ..clone import clone_project
+
+    usage = "Usage: gt java clone-project <subproject> <new subproject> [--package <old>=<new>] [--hardlink]"
+    names = []
+    package = None
+    hardlink = False
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt == "--package" or opt.startswith("--package="):
+            value = opt.partition("=")[2] if opt.startswith("--package=") else (args.pop(0) if args else "")
+            old, _, new = value.partition("=")
+            pkgname = r"[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*"
+            if not re.fullmatch(pkgname, old) or not re.fullmatch(pkgname, new):
+                raise Exception("The '--package' option must be followed by <old package>=<new package>.")
+            package = (old, new) if old != new else None
+        elif opt == "--hardlink":
+            # Files that are not rewritten share their inode with the original
+            hardlink = True
+        elif opt.startswith("-"):
+            unrecognized_opts.add(opt)
+        else:
+            names.append(opt)
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt java clone-project")
+    if len(names) != 2:
+        raise Exception(usage)
+
+    source, target = names
+    if source not in CONTEXT.projects:
+        report_nonexisting_projects([source])
+        return
+    if CONTEXT.projects[source] == CONTEXT.root_project:
+        raise Exception("The root project cannot be cloned into a subproject of itself.")
+    target_dir = os.path.join(CONTEXT.root_project, target)
+    if not is_valid_project_name(target):
+        raise Exception(f"'{target}' is not a valid subproject name.")
+    if target in CONTEXT.projects or os.path.lexists(target_dir):
+        raise Exception(f"✘ Skipped existing subproject '{target}'")
+
+    try:
+        with span("java clone-project", source=source, target=target):
+            counts, moved = clone_project(CONTEXT.projects[source], target_dir, package=package, hardlink=hardlink)
+    except OSError as e:
+        raise Exception(f"✘ Unable to clone '{source}': {e.strerror or e}")
+    include_subproject_in_settings_file(target)
+
+    files = sum(counts.values())
+    summary = ", ".join(f"{counts[how]:,} {how}" for how in ("rewritten", "cloned", "linked", "copied") if how in counts)
+    print(f"✔ Created subproject '{target}' from '{source}' ({files:,} file{'s' if files != 1 else ''}"
+          + (f": {summary})" if summary else ")"))
+    if package:
+        if moved:
+            print(f"✔ Moved package {package[0]} to {package[1]} in {', '.join(f'src/{s}/java' for s in moved)}")
+        else:
+            print(f"✘ No source set of '{source}' has the package {package[0]}")
+
+
+def _ls_cmd(args: list[str]) -> None:
+    if args:
+        raise Exception("'gt java ls-cmd' does not take any arguments.")
+
+    for cmd in COMMANDS:
+        print(cmd)
+
+
+def _ls_pkg(args: list[str]) -> None:
+    ls_pkg(args, language="java")
 
 
-def _rm_class(args: List[str]) -> None:
+def _rm_class(args: list[str]) -> None:
     ensure_sufficient_args(args=args, err_msg="Usage: gt java rm-class [project] [-t] [-p <package_prefix>] <classes>")
     project = extract_and_validate_project_from_args(args=args)
 
     # Detect options and their arguments
     include_test_tree = False
     package_flag_present = False
+    quiet = False
     unrecognized_opts = set()
     prefix_package = ""
     while args:
         opt = args.pop(0)
         if opt.startswith("-"):
-            if opt == "-t":
+            if opt in ("-q", "--quiet"):
+                quiet = True
+            elif opt == "-t":
                 include_test_tree = True
             elif opt == "-p":
                 package_flag_present = True
@@ -451,23 +829,26 @@ def _rm_class(args: List[str]) -> None:
     else:
         test_classes = []
     
-    test_sources = [JavaSourceFile(classname=classname, project=project, src_type="test") for classname in test_classes]
-    main_sources = [JavaSourceFile(classname=classname, project=project, src_type="main") for classname in main_classes]
-    SourceFile.remove_all(main_sources + test_sources)
+    sources = JavaSourceFile.batch(main_classes, project=project, src_type="main")
+    sources.extend(JavaSourceFile.batch(test_classes, project=project, src_type="test"))
+    SourceFile.remove_all(sources, quiet=quiet)
     
 
-def _rm_testclass(args: List[str]) -> None:
+def _rm_testclass(args: list[str]) -> None:
     ensure_sufficient_args(args=args, err_msg="Usage: gt java rm-testclass [project] [-p <package_prefix>] <testclasses>")
     project = extract_and_validate_project_from_args(args=args)
 
     # Detect options and their arguments
     package_flag_present = False
+    quiet = False
     unrecognized_opts = set()
     prefix_package = ""
     while args:
         opt = args.pop(0)
         if opt.startswith("-"):
-            if opt == "-p":
+            if opt in ("-q", "--quiet"):
+                quiet = True
+            elif opt == "-p":
                 package_flag_present = True
                 if args:
                     value = args.pop(0)
@@ -493,11 +874,11 @@ def _rm_testclass(args: List[str]) -> None:
             raise Exception("The '-p' option must be followed by a package name.")
         test_classes = [".".join([prefix_package, classname]) for classname in test_classes]
 
-    test_sources = [JavaSourceFile(classname=classname, project=project, src_type="test") for classname in test_classes]
-    SourceFile.remove_all(test_sources)
+    test_sources = JavaSourceFile.batch(test_classes, project=project, src_type="test")
+    SourceFile.remove_all(test_sources, quiet=quiet)
 
 
-def _rm_pkg(args: List[str]) -> None:
+def _rm_pkg(args: list[str]) -> None:
     ensure_sufficient_args(args=args, err_msg="Usage: gt java rm-pkg [project] [-p <package_prefix>] <packages>")
     project = extract_and_validate_project_from_args(args=args)
 
@@ -505,11 +886,14 @@ def _rm_pkg(args: List[str]) -> None:
     include_test = False
     include_prefix = False
     prefix_package = ""
+    quiet = False
     unrecognized_opts = set()
     while args:
         opt = args.pop(0)
         if opt.startswith("-"):
-            if opt == "-t":
+            if opt in ("-q", "--quiet"):
+                quiet = True
+            elif opt == "-t":
                 include_test = True
             elif opt == "-p":
                 include_prefix = True
@@ -541,21 +925,24 @@ def _rm_pkg(args: List[str]) -> None:
     else:
         test_packages = []
     main_packages = [JavaPackage(pkgname=pkgname, project=project, src_type="main") for pkgname in pkgnames]
-    Package.remove_all(main_packages + test_packages)
+    Package.remove_all(main_packages + test_packages, quiet=quiet)
 
 
-def _rm_testpkg(args: List[str]) -> None:
+def _rm_testpkg(args: list[str]) -> None:
     ensure_sufficient_args(args=args, err_msg="Usage: gt java rm-testpkg [project] <testpackages>")
     project = extract_and_validate_project_from_args(args=args)
 
     # Detect options
     include_prefix = False
     prefix_package = ""
+    quiet = False
     unrecognized_opts = set()
     while args:
         opt = args.pop(0)
         if opt.startswith("-"):
-            if opt == "-p":
+            if opt in ("-q", "--quiet"):
+                quiet = True
+            elif opt == "-p":
                 include_prefix = True
                 if args:
                     value = args.pop(0)
@@ -581,82 +968,76 @@ def _rm_testpkg(args: List[str]) -> None:
         pkgnames = [".".join([prefix_package, name]) for name in pkgnames]
 
     test_packages = [JavaPackage(pkgname=pkgname, project=project, src_type="test") for pkgname in pkgnames]
-    Package.remove_all(test_packages)
+    Package.remove_all(test_packages, quiet=quiet)
 
 
-def _tree(args: List[str]) -> None:
-    # Syntax: gt java tree [subprojects] [options]
+def _sync_tests(args: list[str]) -> None:
+    # Syntax: gt java sync-tests [subprojects] [--create] [-q]
     projects = []
-    if SINGLE_PROJECT_BUILD:
-        if args:
-            print("All non-option arguments will be ignored for single-project builds.")
-            print()
-        projects.append(os.path.basename(ROOT_PROJECT))
-    else:
-        # Consume entries until the first option is encountered
-        while args:
-            entry = args.pop(0)
-            if not entry.startswith("-"):
-                if not SINGLE_PROJECT_BUILD:
-                    projects.append(entry)
-                # For single-project builds, all non-option arguments will be ignored
-            else:
-                args.insert(0, entry)
-                break
-        if not projects:
-            # List all projects if none are specified
-            projects = [p for p in PROJECTS]
-
-    # Detect options
-    m_flag_present = False
-    t_flag_present = False
-    unrecognized_opt = set()
+    create = False
+    quiet = False
+    unrecognized_opts = set()
     while args:
         opt = args.pop(0)
-        if opt == "-m":
-            m_flag_present = True
-        elif opt == "-t":
-            t_flag_present = True
+        if opt == "--create":
+            create = True
+        elif opt in ("-q", "--quiet"):
+            quiet = True
+        elif opt.startswith("-"):
+            unrecognized_opts.add(opt)
         else:
-            unrecognized_opt.add(opt)
-
-    if unrecognized_opt:
-        raise_unrecognized_opts_error(opts=unrecognized_opt, cmd="gt java tree")
+            projects.append(opt)
 
-    projects_dne = []
-    projects_without_java_src_set = []
-
-    for p in projects:
-        if p not in PROJECTS:
-            projects_dne.append(p)
-        else:
-            src_root = os.path.join(PROJECTS[p], "src")
-            if not os.path.isdir(src_root):
-                projects_without_java_src_set.append(p)
-            else:
-                os.chdir(src_root)
-                basedirs = []
-                if m_flag_present:
-                    basedirs.append("main/java")
-                if t_flag_present:
-                    basedirs.append("test/java")
-                if not basedirs:
-                    basedirs = ["main/java", "test/java"]
-                for basedir in basedirs:
-                    if not os.path.isdir(basedir):
-                        projects_without_java_src_set.append(p)
-                        break
-                else:
-                    print(f"{p}:")
-                    for basedir in basedirs:
-                        os.system(f"tree --noreport {basedir}")
-                print()
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt java sync-tests")
+
+    projects_dne = [p for p in projects if p not in CONTEXT.projects]
+    projects = [p for p in (projects or CONTEXT.projects) if p in CONTEXT.projects]
+
+    total_missing = 0
+    total_orphaned = 0
+    test_sources = SourceFileBatch(language="java")
+    for project in projects:
+        with span("java sync-tests diff", project=project):
+            main_classes = set()
+            test_classes = set()
+            for src_type, pkgname, classname, _ in iter_java_sources(project, ["main", "test"]):
+                if classname in ("package-info", "module-info"):
+                    continue
+                fqn = f"{pkgname}.{classname}" if pkgname else classname
+                (main_classes if src_type == "main" else test_classes).add(fqn)
+
+            # Tests are expected to follow the '<Class>Test' convention of 'add-class -t'
+            expected_tests = {fqn + "Test" for fqn in main_classes}
+            missing = sorted(expected_tests - test_classes)
+            orphaned = sorted({fqn for fqn in test_classes if fqn.endswith("Test")} - expected_tests)
+
+        if not missing and not orphaned:
+            continue
+        print(f"{project}:")
+        for fqn in missing:
+            print(f"✘ Missing test for {fqn[:-4]}")
+        for fqn in orphaned:
+            print(f"✘ Orphaned test {fqn}")
+        print()
+        total_missing += len(missing)
+        total_orphaned += len(orphaned)
+        if create:
+            test_sources.extend(JavaSourceFile.batch(missing, project=project, src_type="test"))
+
+    if test_sources:
+        SourceFile.create_all(test_sources, quiet=quiet)
+        print()
+
+    print(f"{total_missing} main class{'es' if total_missing != 1 else ''} without tests, "
+          f"{total_orphaned} orphaned test{'s' if total_orphaned != 1 else ''}.")
 
     if projects_dne:
         report_nonexisting_projects(projects_dne)
 
-    if projects_without_java_src_set:
-        report_incomplete_or_missing_src_sets(projects_without_java_src_set, src_language="java")
+
+def _tree(args: list[str]) -> None:
+    tree(args, language="java")
 
 
 COMMANDS = {
@@ -665,11 +1046,16 @@ COMMANDS = {
     "add-pkg"       : _add_pkg,
     "add-testpkg"   : _add_testpkg,
     "add-project"   : _add_project,
+    "check-packages": _check_packages,
+    "clone-project" : _clone_project,
+    "dupes"         : _dupes,
+    "find"          : _find,
     "ls-cmd"        : _ls_cmd,
     "ls-pkg"        : _ls_pkg,
     "rm-class"      : _rm_class,
     "rm-pkg"        : _rm_pkg,
     "rm-testclass"  : _rm_testclass,
     "rm-testpkg"    : _rm_testpkg,
+    "sync-tests"    : _sync_tests,
     "tree"          : _tree
 }
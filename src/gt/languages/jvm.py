@@ -0,0 +1,124 @@
+import os.path, sys
+from .. import *
+from ..utils import *
+from ..output import *
+from ..scanner import scan_source_set, print_source_tree
+
+# Listing commands shared by the language modules, served straight
+# from the single-pass source set scanner; "all" lists every language
+
+
+def _command(language: str, name: str) -> str:
+    return f"gt {'-' if language == 'all' else language} {name}"
+
+
+def ls_pkg(args: list[str], *, language: str) -> None:
+    # Syntax: gt <language> ls-pkg [-m] [-t] [--format <fmt>] [subprojects]
+    list_test = False
+    list_main = False
+    output_format = ""
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt.startswith("-"):
+            if opt == "-t":
+                list_test = True
+            elif opt == "-m":
+                list_main = True
+            elif opt == "--format" or opt.startswith("--format="):
+                output_format = extract_format_from_opt(opt=opt, args=args, cmd=_command(language, "ls-pkg"))
+            else:
+                unrecognized_opts.add(opt)
+        else:
+            args.insert(0, opt)
+            break
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd=_command(language, "ls-pkg"))
+
+    _list_source_sets(args, language=language, list_main=list_main, list_test=list_test,
+                      output_format=output_format, dirs_only=True)
+
+
+def tree(args: list[str], *, language: str) -> None:
+    # Syntax: gt <language> tree [subprojects] [-m] [-t] [--format <fmt>]
+    projects = []
+    while args:
+        entry = args.pop(0)
+        if not entry.startswith("-"):
+            projects.append(entry)
+        else:
+            args.insert(0, entry)
+            break
+
+    m_flag_present = False
+    t_flag_present = False
+    output_format = ""
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt == "-m":
+            m_flag_present = True
+        elif opt == "-t":
+            t_flag_present = True
+        elif opt == "--format" or opt.startswith("--format="):
+            output_format = extract_format_from_opt(opt=opt, args=args, cmd=_command(language, "tree"))
+        else:
+            unrecognized_opts.add(opt)
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd=_command(language, "tree"))
+
+    _list_source_sets(projects, language=language, list_main=m_flag_present, list_test=t_flag_present,
+                      output_format=output_format, dirs_only=False)
+
+
+def _list_source_sets(args: list[str], *, language: str, list_main: bool, list_test: bool,
+                      output_format: str, dirs_only: bool) -> None:
+    # Diagnostics go to stderr when machine-readable output is requested
+    diagnostics = sys.stderr if output_format else sys.stdout
+
+    if CONTEXT.single_project_build:
+        if args:
+            print("All non-option arguments will be ignored for single-project builds.", file=diagnostics)
+            print(file=diagnostics)
+        projects = [p for p in CONTEXT.projects]
+    else:
+        projects = [p for p in (args if args else CONTEXT.projects)]
+
+    src_types = []
+    if list_main:
+        src_types.append("main")
+    if list_test:
+        src_types.append("test")
+    if not src_types:
+        src_types = ["main", "test"]
+
+    projects_dne = []
+    projects_with_missing_src = []
+    projects_to_list = []
+    for p in projects:
+        if p not in CONTEXT.projects:
+            projects_dne.append(p)
+            continue
+        listings = [scan_source_set(p, src_type) for src_type in src_types]
+        if any(not listing.has_language(language) for listing in listings):
+            projects_with_missing_src.append(p)
+        elif output_format:
+            projects_to_list.append(p)
+        else:
+            print(f"{p}:")
+            for listing in listings:
+                print_source_tree(listing, language, dirs_only=dirs_only)
+            print()
+
+    if output_format:
+        emit_project_listing(projects_to_list, output_format, included=get_included_subprojects(),
+                             src_types=src_types, languages=None if language == "all" else [language],
+                             contents=True, classes=not dirs_only)
+
+    if projects_dne:
+        report_nonexisting_projects(projects_dne, file=diagnostics)
+
+    if projects_with_missing_src:
+        report_incomplete_or_missing_src_sets(projects_with_missing_src, src_language=language, file=diagnostics)
@@ -0,0 +1,27 @@
+from .. import *
+from ..utils import *
+from .jvm import ls_pkg, tree
+
+
+# Command handlers
+def _ls_cmd(args: list[str]) -> None:
+    if args:
+        raise Exception("'gt scala ls-cmd' does not take any arguments.")
+
+    for cmd in COMMANDS:
+        print(cmd)
+
+
+def _ls_pkg(args: list[str]) -> None:
+    ls_pkg(args, language="scala")
+
+
+def _tree(args: list[str]) -> None:
+    tree(args, language="scala")
+
+
+COMMANDS = {
+    "ls-cmd" : _ls_cmd,
+    "ls-pkg" : _ls_pkg,
+    "tree"   : _tree
+}
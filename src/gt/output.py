@@ -0,0 +1,105 @@
+# Machine-readable output for listing commands
+#
+#   json  - a single JSON document with nested project records
+#   jsonl - a stream of flat records, one JSON object per line
+#   nul   - NUL-delimited names (projects) or paths (packages, classes, files)
+import os, os.path, sys
+from . import *
+from .scanner import scan_source_set
+
+OUTPUT_FORMATS = ("json", "jsonl", "nul")
+
+# Keys under which each kind of entry is collected in a source set record
+_ENTRY_KEYS = {"package": "packages", "class": "classes", "file": "files"}
+
+
+def extract_format_from_opt(*, opt: str, args: list[str], cmd: str) -> str:
+    # Accepts both '--format <fmt>' and '--format=<fmt>'
+    if opt.startswith("--format="):
+        fmt = opt.partition("=")[2]
+    elif args and not args[0].startswith("-"):
+        fmt = args.pop(0)
+    else:
+        fmt = ""
+    if fmt not in OUTPUT_FORMATS:
+        raise Exception(f"The '--format' option of '{cmd}' must be one of: {', '.join(OUTPUT_FORMATS)}")
+    return fmt
+
+
+def iter_source_entries(project: str, src_type: str, language: str, *, classes: bool = True):
+    # Packages are directories relative to src/<src_type>/<language>
+    # Classes are sources of the language, wherever they live in the source set
+    for kind, name, path in scan_source_set(project, src_type).iter_entries(language, classes=classes):
+        yield {"type": kind, "project": project, "src_type": src_type,
+               "language": language, "name": name, "path": path}
+
+
+def project_record(project: str, *, included: list[str], src_types: list[str] | None = None,
+                   languages: list[str] | None = None, contents: bool = False, classes: bool = True) -> dict:
+    record = {
+        "type"        : "project",
+        "name"        : project,
+        "path"        : CONTEXT.projects[project],
+        "included"    : project in included,
+        "root"        : CONTEXT.projects[project] == CONTEXT.root_project,
+        "source_sets" : [],
+    }
+    for src_type in (src_types or ["main", "test"]):
+        listing = scan_source_set(project, src_type)
+        for language in (languages or listing.roots):
+            roots = listing.language_roots(language)
+            if not roots:
+                continue
+            path = os.path.join(CONTEXT.projects[project], "src", src_type, roots[0])
+            source_set = {"src_type": src_type, "language": language, "path": path}
+            if contents:
+                source_set["packages"] = []
+                if classes:
+                    source_set["classes"] = []
+                    source_set["files"] = []
+                for entry in iter_source_entries(project, src_type, language, classes=classes):
+                    source_set[_ENTRY_KEYS[entry["type"]]].append(entry["name"])
+            record["source_sets"].append(source_set)
+    return record
+
+
+def iter_project_records(projects: list[str], *, included: list[str], src_types: list[str] | None = None,
+                         languages: list[str] | None = None, contents: bool = False, classes: bool = True):
+    # Flat counterpart of project_record() used for streaming output
+    for project in projects:
+        record = project_record(project, included=included, src_types=src_types, languages=languages)
+        yield record
+        if contents:
+            for source_set in record["source_sets"]:
+                yield from iter_source_entries(project, source_set["src_type"], source_set["language"], classes=classes)
+
+
+def emit_records(records, fmt: str) -> None:
+    import json
+
+    out = sys.stdout
+    if fmt == "json":
+        json.dump(list(records), out, indent=2, ensure_ascii=False)
+        out.write("\n")
+    elif fmt == "jsonl":
+        for record in records:
+            out.write(json.dumps(record, ensure_ascii=False))
+            out.write("\n")
+    else:
+        for record in records:
+            value = record["name"] if record["type"] == "project" else record["path"]
+            if value:
+                out.write(value)
+                out.write("\0")
+    out.flush()
+
+
+def emit_project_listing(projects: list[str], fmt: str, *, included: list[str], **options) -> None:
+    if fmt == "json":
+        records = (project_record(p, included=included, **options) for p in projects)
+    else:
+        records = iter_project_records(projects, included=included, **options)
+        if fmt == "nul" and options.get("contents"):
+            # Only the paths of the listed entries are wanted
+            records = (r for r in records if r["type"] != "project")
+    emit_records(records, fmt)
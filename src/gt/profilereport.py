@@ -0,0 +1,182 @@
+# Aggregation of the reports written by 'gradle --profile'
+#
+# Every profiled build writes build/reports/profile/profile-<timestamp>.html
+# below the root project, with one tab per phase of the build. Each report
+# is parsed once: the build phases, the configuration time of each
+# subproject and the execution time of each task are cached per report in
+# <root>/.gradle/gt, keyed by (mtime, size), and only new or modified
+# reports are read on the next run.
+import os, os.path, re
+from html.parser import HTMLParser
+from . import *
+from .cache import load_cache, save_cache
+from .utils import map_jobs
+
+PROFILE_REPORTS_CACHE = "profile-reports"
+
+# Sections of a report, by the heading of their tab
+_SUMMARY = "Summary"
+_CONFIGURATION = "Configuration"
+_TASK_EXECUTION = "Task Execution"
+
+# Durations are printed like '0.123s', '1m2.35s' or '1h0m3.00s'
+_DURATION = re.compile(r"^(?:(\d+)d)?(?:(\d+)h)?(?:(\d+)m)?(?:([0-9.]+)s)?$")
+
+
+def profile_dir() -> str:
+    return os.path.join(CONTEXT.root_project, "build", "reports", "profile")
+
+
+def parse_duration(text: str) -> float | None:
+    match = _DURATION.match(text.strip())
+    if not match or not any(match.groups()):
+        return None
+    days, hours, minutes, seconds = (float(g) if g else 0.0 for g in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+class _ProfileReportParser(HTMLParser):
+    # Collects the rows of every table as lists of cell texts, by section heading
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.sections: dict[str, list[list[str]]] = {}
+        self.started = ""
+        self._section = ""
+        self._text: list[str] | None = None
+        self._row: list[str] | None = None
+        self._in_heading = False
+        self._in_paragraph = False
+
+    def handle_starttag(self, tag, attrs) -> None:
+        if tag == "h2":
+            self._in_heading = True
+            self._text = []
+        elif tag == "p":
+            self._in_paragraph = True
+            self._text = []
+        elif tag == "tr":
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._text = []
+
+    def handle_endtag(self, tag) -> None:
+        if tag == "h2" and self._in_heading:
+            self._section = "".join(self._text).strip()
+            self._in_heading = False
+            self._text = None
+        elif tag == "p" and self._in_paragraph:
+            text = "".join(self._text).strip()
+            if text.startswith("Started on:"):
+                self.started = text.partition(":")[2].strip()
+            self._in_paragraph = False
+            self._text = None
+        elif tag in ("td", "th") and self._row is not None and self._text is not None:
+            self._row.append("".join(self._text).strip())
+            self._text = None
+        elif tag == "tr" and self._row is not None:
+            if self._row:
+                self.sections.setdefault(self._section, []).append(self._row)
+            self._row = None
+
+    def handle_data(self, data) -> None:
+        if self._text is not None:
+            self._text.append(data)
+
+
+def parse_profile_report(path: str) -> dict | None:
+    # Returns {"started", "phases", "configuration", "tasks"}, or None if the file
+    # cannot be read; durations are in seconds
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            text = file.read()
+    except OSError:
+        return None
+    parser = _ProfileReportParser()
+    parser.feed(text)
+    parser.close()
+
+    def durations(section: str, skip) -> dict[str, float]:
+        values = {}
+        for row in parser.sections.get(section, []):
+            if len(row) < 2 or skip(row):
+                continue
+            seconds = parse_duration(row[1])
+            if seconds is not None:
+                values[row[0]] = seconds
+        return values
+
+    return {
+        "started"       : parser.started,
+        "phases"        : durations(_SUMMARY, lambda row: row[0] == "Description"),
+        # 'All projects' is the sum of the others
+        "configuration" : durations(_CONFIGURATION, lambda row: row[0] in ("Project", "All projects")),
+        # Rows whose result is '(total)' sum up the tasks of a subproject
+        "tasks"         : durations(_TASK_EXECUTION, lambda row: row[0] == "Task" or row[2:3] == ["(total)"]),
+    }
+
+
+def load_profile_reports(*, jobs: int) -> list[tuple[str, dict]]:
+    # Returns [(report file name, parsed report)] in the order the builds ran
+    # The file names embed the start time of the build, so they sort chronologically
+    directory = profile_dir()
+    try:
+        with os.scandir(directory) as it:
+            files = {e.name: e.stat() for e in it
+                     if e.name.startswith("profile-") and e.name.endswith(".html") and e.is_file()}
+    except OSError:
+        files = {}
+
+    cache = load_cache(PROFILE_REPORTS_CACHE, {})
+    reports = {}
+    pending = []
+    for name, st in files.items():
+        entry = cache.get(name)
+        if entry and entry[:2] == (st.st_mtime_ns, st.st_size):
+            reports[name] = entry
+        else:
+            pending.append(name)
+
+    with span("profile-reports parse", files=len(pending), jobs=jobs):
+        paths = [os.path.join(directory, name) for name in pending]
+        # Every report is a whole HTML page
+        parsed = map_jobs(parse_profile_report, paths, jobs=jobs, min_items=16)
+    for name, report in zip(pending, parsed):
+        count("profile_reports_parsed")
+        if report is not None:
+            reports[name] = (files[name].st_mtime_ns, files[name].st_size, report)
+
+    # Reports that were deleted are forgotten
+    if pending or reports.keys() != cache.keys():
+        save_cache(PROFILE_REPORTS_CACHE, reports)
+    return [(name, reports[name][2]) for name in sorted(reports)]
+
+
+def percentile(values: list[float], q: float) -> float:
+    # Nearest-rank percentile of sorted values
+    index = max(0, min(len(values) - 1, int(-(-q * len(values) // 100)) - 1))
+    return values[index]
+
+
+def summarize(series: list[float]) -> dict:
+    # 'series' holds the durations of one item, oldest run first. The trend
+    # compares the median of the latest runs with that of the runs before them
+    ordered = sorted(series)
+    summary = {"runs": len(series), "p50": percentile(ordered, 50), "p90": percentile(ordered, 90),
+               "max": ordered[-1], "last": series[-1], "trend": None}
+    if len(series) >= 2:
+        window = min(5, len(series) // 2)
+        recent = sorted(series[-window:])
+        earlier = sorted(series[:-window])
+        before = percentile(earlier, 50)
+        if before > 0:
+            summary["trend"] = (percentile(recent, 50) - before) / before
+    return summary
+
+
+def aggregate(reports: list[tuple[str, dict]], key: str) -> dict[str, dict]:
+    # Summaries of every phase, subproject or task found under 'key'
+    series: dict[str, list[float]] = {}
+    for _, report in reports:
+        for name, seconds in report[key].items():
+            series.setdefault(name, []).append(seconds)
+    return {name: summarize(values) for name, values in series.items()}
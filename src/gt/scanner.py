@@ -0,0 +1,168 @@
+# Single-pass scanner for JVM source sets
+#
+# One walk over src/<src_type>/ classifies every file by extension, so
+# mixed Java/Kotlin/Groovy/Scala subprojects are listed for all languages
+# without re-walking the tree once per language.
+import os, os.path
+from . import *
+
+# Extensions identifying the sources of each language
+LANGUAGE_EXTENSIONS = {
+    "java"   : (".java",),
+    "kotlin" : (".kt",),
+    "groovy" : (".groovy",),
+    "scala"  : (".scala",),
+}
+
+LANGUAGE_BY_EXTENSION = {ext: language for language, exts in LANGUAGE_EXTENSIONS.items() for ext in exts}
+
+
+class SourceSetListing:
+    # Entries are (kind, root, language, name, path) tuples where
+    #   kind     - "package", "class" or "file"
+    #   root     - the directory directly below src/<src_type> (e.g. "java"),
+    #              empty for the files directly in src/<src_type>
+    #   language - the language of a class, otherwise the root
+    #   name     - dotted name relative to the root
+    def __init__(self, project: str, src_type: str) -> None:
+        self.project = project
+        self.src_type = src_type
+        self.path = os.path.join(CONTEXT.projects[project], "src", src_type)
+        self.exists = False
+        self.roots: list[str] = []
+        self.entries: list[tuple[str, str, str, str, str]] = []
+
+    def packages(self, language: str) -> list[tuple[str, str]]:
+        return [(name, path) for kind, root, _, name, path in self.entries
+                if kind == "package" and root == language]
+
+    def classes(self, language: str) -> list[tuple[str, str]]:
+        # Classes are found in any root; Kotlin sources may live under src/<src_type>/java
+        return [(name, path) for kind, _, lang, name, path in self.entries
+                if kind == "class" and lang == language]
+
+    def language_roots(self, language: str) -> list[str]:
+        # The root named after the language, then the other roots holding classes of the language
+        others = {root for kind, root, lang, _, _ in self.entries
+                  if kind == "class" and lang == language and root != language}
+        return ([language] if language in self.roots else []) + sorted(others)
+
+    def has_language(self, language: str) -> bool:
+        # Every source set has all languages
+        if language == "all":
+            return self.exists
+        return bool(self.language_roots(language))
+
+    def iter_entries(self, language: str, *, classes: bool = True):
+        # Sources of other languages under this root are reported as plain files
+        # Under the roots of other languages, only the packages leading to classes of this one are reported
+        enclosing = set()
+        for kind, root, lang, name, _ in self.entries:
+            if kind == "class" and lang == language and root != language:
+                parts = name.split(".")[:-1]
+                enclosing.update((root, ".".join(parts[:i])) for i in range(1, len(parts) + 1))
+        for kind, root, lang, name, path in self.entries:
+            if kind == "package":
+                if root == language or (root, name) in enclosing:
+                    yield kind, name, path
+            elif not classes:
+                continue
+            elif kind == "class" and lang == language:
+                yield kind, name, path
+            elif root == language:
+                yield "file", name if kind == "file" else name + os.path.splitext(path)[1], path
+
+
+_listings: dict[tuple[str, str], SourceSetListing] = {}
+
+
+def scan_source_set(project: str, src_type: str) -> SourceSetListing:
+    key = (project, src_type)
+    if key not in _listings:
+        with span("scan_source_set", project=project, src_type=src_type):
+            _listings[key] = _scan(SourceSetListing(project, src_type))
+    return _listings[key]
+
+
+def invalidate(project: str = "") -> None:
+    # Forget cached listings after the tree has been modified
+    if not project:
+        _listings.clear()
+    else:
+        for key in [k for k in _listings if k[0] == project]:
+            del _listings[key]
+
+
+def _scan(listing: SourceSetListing) -> SourceSetListing:
+    entries = listing.entries
+    try:
+        with os.scandir(listing.path) as it:
+            children = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return listing
+    count("dirs_scanned")
+    listing.exists = True
+    roots = listing.roots = [entry.name for entry in children if entry.is_dir(follow_symlinks=False)]
+    # Such files belong to no language, e.g. the AndroidManifest.xml of Android builds
+    entries.extend(("file", "", "", entry.name, entry.path) for entry in children
+                   if not entry.is_dir(follow_symlinks=False))
+
+    for root in roots:
+        pending = [(os.path.join(listing.path, root), "")]
+        while pending:
+            directory, pkgname = pending.pop()
+            count("dirs_scanned")
+            try:
+                with os.scandir(directory) as it:
+                    children = sorted(it, key=lambda e: e.name)
+            except OSError:
+                continue
+            subdirs = []
+            for entry in children:
+                if entry.is_dir(follow_symlinks=False):
+                    name = f"{pkgname}.{entry.name}" if pkgname else entry.name
+                    entries.append(("package", root, root, name, entry.path))
+                    subdirs.append((entry.path, name))
+                    continue
+                stem, ext = os.path.splitext(entry.name)
+                language = LANGUAGE_BY_EXTENSION.get(ext)
+                if language:
+                    name = f"{pkgname}.{stem}" if pkgname else stem
+                    entries.append(("class", root, language, name, entry.path))
+                else:
+                    name = f"{pkgname}.{entry.name}" if pkgname else entry.name
+                    entries.append(("file", root, root, name, entry.path))
+            pending.extend(reversed(subdirs))
+    return listing
+
+
+def print_source_tree(listing: SourceSetListing, language: str, *, dirs_only: bool = False) -> None:
+    # Renders the same layout as 'tree --noreport [-d] <src_type>/<language>',
+    # or as 'tree --noreport [-d] <src_type>' for "all"
+    # Classes of the language under other roots are shown within those roots
+    children: dict[str, list[tuple[str, bool]]] = {}
+    if language == "all":
+        for root in listing.roots:
+            children.setdefault(listing.path, []).append((os.path.join(listing.path, root), True))
+        entries = ((kind, path) for kind, _, _, _, path in listing.entries if not dirs_only or kind == "package")
+    else:
+        entries = ((kind, path) for kind, _, path in listing.iter_entries(language, classes=not dirs_only))
+    for kind, path in entries:
+        children.setdefault(os.path.dirname(path), []).append((path, kind == "package"))
+    if language == "all":
+        print(listing.src_type)
+        _print_subtree(children, listing.path, "")
+        return
+    for root in listing.language_roots(language):
+        print(os.path.join(listing.src_type, root))
+        _print_subtree(children, os.path.join(listing.path, root), "")
+
+
+def _print_subtree(children: dict[str, list[tuple[str, bool]]], directory: str, prefix: str) -> None:
+    # Hidden files and directories are left out, as 'tree' does
+    items = sorted(item for item in children.get(directory, []) if not os.path.basename(item[0]).startswith("."))
+    for index, (path, is_dir) in enumerate(items):
+        last = index == len(items) - 1
+        print(f"{prefix}{'└── ' if last else '├── '}{os.path.basename(path)}")
+        if is_dir:
+            _print_subtree(children, path, prefix + ("    " if last else "│   "))
@@ -0,0 +1,86 @@
+# Running many gt command lines in one process
+#
+# 'gt batch' and 'gt shell' pay for interpreter start-up, module imports
+# and project discovery once. Every command line goes through the same
+# dispatch as 'gt' itself. After a command that can modify the tree, the
+# state kept in memory is forgotten: the source set listings always, and
+# the discovered layout and interned packages when subprojects come or go,
+# so that the next command sees the tree as it is.
+import os, shlex, sys
+from . import *
+
+# Subcommands that add, remove or rewrite sources
+MUTATING_COMMANDS = ("add-", "rm-", "sync-tests", "check-packages", "clone-project", "exec")
+# Subcommands that add or remove subprojects
+PROJECT_COMMANDS = ("add-project", "rm-project", "clone-project", "exec")
+
+SESSION_COMMANDS = ("batch", "shell")
+
+
+def invalidate(*, projects: bool) -> None:
+    from . import scanner
+
+    scanner.invalidate()
+    if projects:
+        CONTEXT.refresh()
+        # Interned packages hold the paths of their subprojects
+        java = sys.modules.get("gt.languages.java")
+        if java is not None:
+            java.JavaPackage._interned.clear()
+
+
+class Session:
+    def __init__(self, *, fail_fast: bool = False) -> None:
+        self.fail_fast = fail_fast
+        self.commands = 0
+        self.failures = 0
+
+    def execute(self, line: str) -> bool:
+        # Runs one command line, with or without the leading 'gt'; returns False if it failed
+        from .actions import start
+
+        try:
+            args = shlex.split(line, comments=True)
+        except ValueError as e:
+            return self._failed(f"✘ Unable to parse '{line.strip()}': {e}")
+        if args[:1] == ["gt"]:
+            args.pop(0)
+        if not args:
+            return True
+        if args[0] in SESSION_COMMANDS:
+            return self._failed(f"✘ 'gt {args[0]}' cannot run inside a session")
+
+        # <language> <subcommand>, possibly after --profile
+        words = args[1:] if args[0].startswith("--profile") else args
+        subcommand = words[1] if len(words) > 1 else ""
+        cwd = os.getcwd()
+        ok = True
+        self.commands += 1
+        try:
+            start(args)
+        except SystemExit as e:
+            ok = e.code in (None, 0)
+        except KeyboardInterrupt:
+            print()
+            print("KeyboardInterrupt signal received.")
+            ok = False
+        except Exception as e:
+            # An empty message follows the list of subcommands of a language
+            if str(e):
+                print(e)
+                ok = False
+        finally:
+            # Some subcommands change into the directories they list
+            os.chdir(cwd)
+            sys.stdout.flush()
+            if subcommand and subcommand.startswith(MUTATING_COMMANDS):
+                invalidate(projects=subcommand.startswith(PROJECT_COMMANDS))
+        if not ok:
+            self.failures += 1
+        return ok
+
+    def _failed(self, message: str) -> bool:
+        print(message)
+        self.commands += 1
+        self.failures += 1
+        return False
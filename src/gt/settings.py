@@ -0,0 +1,250 @@
+# Batched, atomic edits of the include statements of a settings file
+#
+# All includes and excludes of one command are applied to the text in
+# memory and written back once through a temp file + fsync + rename, so
+# an interrupted run never leaves a half-written settings file behind.
+# Formatting is preserved: only the arguments of include statements are
+# touched, and new entries join an existing multi-project include(...)
+# block when there is one.
+import os, os.path
+from . import *
+
+
+class IncludeArgument:
+    def __init__(self, *, value: str, start: int, end: int, quote: str) -> None:
+        self.value = value # as written, e.g. ":app"
+        self.start = start # span of the literal, quotes included
+        self.end   = end
+        self.quote = quote
+
+    def project(self) -> str:
+        # include(":app") and include("app") both refer to 'app'
+        return self.value[1:] if self.value.startswith(":") else self.value
+
+
+class IncludeStatement:
+    def __init__(self, *, start: int, end: int, parens: bool, args: list[IncludeArgument]) -> None:
+        self.start  = start
+        self.end    = end
+        self.parens = parens
+        self.args   = args
+
+
+def parse_include_statements(text: str, *, keyword: str = "include") -> list[IncludeStatement]:
+    # keyword="includeBuild" finds the builds of a composite instead
+    statements = []
+    n = len(text)
+    i = 0
+    while i < n:
+        c = text[i]
+        if text.startswith("//", i):
+            i = text.find("\n", i)
+            if i < 0:
+                break
+        elif text.startswith("/*", i):
+            i = text.find("*/", i + 2)
+            i = n if i < 0 else i + 2
+        elif c in "\"'":
+            i = _skip_string(text, i)
+        elif c.isalpha() or c == "_":
+            j = i
+            while j < n and (text[j].isalnum() or text[j] in "_$"):
+                j += 1
+            if text[i:j] == keyword and (i == 0 or text[i - 1] not in "."):
+                statement = _parse_include(text, i, j)
+                if statement:
+                    statements.append(statement)
+                    j = statement.end
+            i = j
+        else:
+            i += 1
+    return statements
+
+
+def _skip_string(text: str, i: int) -> int:
+    quote = text[i]
+    i += 1
+    while i < len(text) and text[i] != quote:
+        if text[i] == "\\":
+            i += 1
+        i += 1
+    return i + 1
+
+
+def _skip_blanks(text: str, i: int, *, newlines: bool) -> int:
+    while i < len(text):
+        if text[i] in " \t\r" or (newlines and text[i] == "\n"):
+            i += 1
+        elif text.startswith("//", i) and newlines:
+            i = text.find("\n", i)
+            if i < 0:
+                return len(text)
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = len(text) if end < 0 else end + 2
+        else:
+            break
+    return i
+
+
+def _parse_include(text: str, start: int, i: int) -> IncludeStatement | None:
+    # Handles include("a"), include("a", "b") spread over several lines,
+    # and the Groovy command form include 'a', 'b'. Anything else, such
+    # as include(someVariable), is left alone.
+    n = len(text)
+    i = _skip_blanks(text, i, newlines=False)
+    parens = i < n and text[i] == "("
+    if parens:
+        i += 1
+    args = []
+    while True:
+        i = _skip_blanks(text, i, newlines=parens or bool(args))
+        if parens and i < n and text[i] == ")":
+            # include() is not an include; include("a",) has a trailing comma
+            return IncludeStatement(start=start, end=i + 1, parens=True, args=args) if args else None
+        if i >= n or text[i] not in "\"'":
+            return None
+        end = _skip_string(text, i)
+        if end > n:
+            return None
+        args.append(IncludeArgument(value=text[i + 1:end - 1], start=i, end=end, quote=text[i]))
+        i = _skip_blanks(text, end, newlines=parens)
+        if i < n and text[i] == ",":
+            i += 1
+            continue
+        if parens:
+            # Allow a trailing comma before the closing parenthesis
+            if i < n and text[i] == ")":
+                return IncludeStatement(start=start, end=i + 1, parens=True, args=args)
+            return None
+        return IncludeStatement(start=start, end=end, parens=False, args=args)
+
+
+class SettingsFile:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "r") as file:
+            self.text = file.read()
+        self.statements = parse_include_statements(self.text)
+
+    def included(self) -> list[str]:
+        return [arg.project() for s in self.statements for arg in s.args]
+
+    def included_builds(self) -> list[str]:
+        # Directories of includeBuild(...), also within pluginManagement, relative to the settings file
+        return [arg.value for s in parse_include_statements(self.text, keyword="includeBuild") for arg in s.args]
+
+    def apply(self, *, includes: list[str] = (), excludes: list[str] = ()) -> tuple[list[str], list[str]]:
+        # Returns the projects actually added and removed
+        included = set(self.included())
+        to_remove = set(excludes) & included
+        to_add = []
+        for project in includes:
+            if project not in included and project not in to_add and project not in to_remove:
+                to_add.append(project)
+        if not to_add and not to_remove:
+            return ([], [])
+
+        # New entries join the largest multi-project include block, if any
+        block = None
+        for statement in self.statements:
+            if len(statement.args) > 1 and (block is None or len(statement.args) >= len(block.args)):
+                block = statement
+
+        edits: list[tuple[int, int, str]] = []
+        for statement in self.statements:
+            kept = [arg for arg in statement.args if arg.project() not in to_remove]
+            new_args = []
+            if statement is block:
+                quote = block.args[-1].quote
+                colon = ":" if block.args[-1].value.startswith(":") else ""
+                new_args = [f"{quote}{colon}{project}{quote}" for project in to_add]
+            if len(kept) == len(statement.args) and not new_args:
+                continue
+            if not kept and not new_args:
+                edits.append(self._remove_statement(statement))
+                continue
+            # Reuse the original separators so that the layout is preserved
+            args = statement.args
+            separators = [self.text[a.end:b.start] for a, b in zip(args, args[1:])] or [", "]
+            items = [self.text[arg.start:arg.end] for arg in kept] + new_args
+            region = items[0]
+            for index, item in enumerate(items[1:]):
+                region += separators[min(index, len(separators) - 1)] + item
+            edits.append((args[0].start, args[-1].end, region))
+
+        if to_add and block is None:
+            edits.append(self._append_statements(to_add))
+
+        text = self.text
+        for start, end, replacement in sorted(edits, reverse=True):
+            text = text[:start] + replacement + text[end:]
+        self.text = text
+        self.statements = parse_include_statements(text)
+        return (to_add, sorted(to_remove))
+
+    def _remove_statement(self, statement: IncludeStatement) -> tuple[int, int, str]:
+        # Drop the whole line when the statement is the only thing on it
+        line_start = self.text.rfind("\n", 0, statement.start) + 1
+        line_end = self.text.find("\n", statement.end)
+        line_end = len(self.text) if line_end < 0 else line_end
+        before = self.text[line_start:statement.start]
+        after = self.text[statement.end:line_end]
+        if not before.strip() and (not after.strip() or after.strip().startswith("//")):
+            return (line_start, min(line_end + 1, len(self.text)), "")
+        return (statement.start, statement.end, "")
+
+    def _append_statements(self, projects: list[str]) -> tuple[int, int, str]:
+        # Follow the style of the last include statement, if any
+        if self.statements:
+            last = self.statements[-1]
+            quote = last.args[-1].quote
+            template = "include({q}{c}{p}{q})" if last.parens else "include {q}{c}{p}{q}"
+            position = self.text.find("\n", last.end)
+            position = len(self.text) if position < 0 else position + 1
+        else:
+            quote = "\""
+            template = "include({q}{c}{p}{q})"
+            position = len(self.text)
+        colon = ":" if self.statements and self.statements[-1].args[-1].value.startswith(":") else ""
+        lines = "".join(template.format(q=quote, c=colon, p=project) + "\n" for project in projects)
+        if position > 0 and not self.text[:position].endswith("\n"):
+            lines = "\n" + lines
+        return (position, position, lines)
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        partial = os.path.join(directory, f".{os.path.basename(self.path)}.{os.getpid()}.tmp")
+        try:
+            with open(partial, "w") as file:
+                file.write(self.text)
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(partial, os.stat(self.path).st_mode & 0o7777)
+            os.replace(partial, self.path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        # Make the rename itself durable
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def update_settings_file(path: str, *, includes: list[str] = (), excludes: list[str] = ()) -> tuple[list[str], list[str]]:
+    import fcntl
+
+    # The file is replaced by rename, so the lock is taken on its directory
+    fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        with span("update_settings_file", includes=len(includes), excludes=len(excludes)):
+            settings = SettingsFile(path)
+            added, removed = settings.apply(includes=includes, excludes=excludes)
+            if added or removed:
+                settings.save()
+        return (added, removed)
+    finally:
+        os.close(fd)
@@ -0,0 +1,95 @@
+# gt shell: an interactive prompt that runs gt command lines in one process
+import importlib, os, os.path, sys
+from . import *
+from .utils import *
+from .session import Session, SESSION_COMMANDS
+
+HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".gt_history")
+HISTORY_LENGTH = 1000
+
+LANGUAGES = ("-", "java", "kotlin", "groovy", "scala")
+
+
+def _completions(words: list[str]) -> list[str]:
+    # Languages and top-level commands first, then the subcommands of the language
+    from .actions import TOP_LEVEL_COMMANDS
+
+    if len(words) <= 1:
+        return [w for w in LANGUAGES + tuple(TOP_LEVEL_COMMANDS) + ("help", "exit") if w not in SESSION_COMMANDS]
+    if len(words) == 2 and words[0] in LANGUAGES:
+        mod = importlib.import_module(f"gt.languages.{language_resolver(words[0])}")
+        return list(mod.COMMANDS)
+    return []
+
+
+def _enable_readline():
+    # Returns the readline module, or None where it is unavailable
+    try:
+        import readline
+    except ImportError:
+        return None
+    try:
+        readline.read_history_file(HISTORY_FILE)
+    except OSError:
+        pass
+    readline.set_history_length(HISTORY_LENGTH)
+
+    def complete(text: str, state: int) -> str | None:
+        words = readline.get_line_buffer()[:readline.get_endidx()].split()
+        if not text:
+            words.append("")
+        try:
+            matches = [w for w in _completions(words) if w.startswith(text)]
+        except Exception:
+            matches = []
+        return matches[state] + " " if state < len(matches) else None
+
+    readline.set_completer_delims(" \t")
+    readline.set_completer(complete)
+    readline.parse_and_bind("tab: complete")
+    return readline
+
+
+def run(args: list[str]) -> None:
+    # Syntax: gt shell [--fail-fast]
+    fail_fast = False
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt == "--fail-fast":
+            fail_fast = True
+        else:
+            unrecognized_opts.add(opt)
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt shell")
+
+    from .actions import print_usage
+
+    readline = _enable_readline() if sys.stdin.isatty() else None
+    session = Session(fail_fast=fail_fast)
+    try:
+        while True:
+            try:
+                line = input("gt> ")
+            except EOFError:
+                print()
+                break
+            except KeyboardInterrupt:
+                # Discards the line being typed
+                print()
+                continue
+            if line.strip() in ("exit", "quit"):
+                break
+            if line.strip() == "help":
+                print_usage()
+                continue
+            if not session.execute(line) and fail_fast:
+                sys.stdout.flush()
+                sys.exit(1)
+    finally:
+        if readline is not None:
+            try:
+                readline.write_history_file(HISTORY_FILE)
+            except OSError:
+                pass
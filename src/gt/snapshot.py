@@ -0,0 +1,193 @@
+# Merkle-tree snapshots of the source sets of every subproject
+#
+# A file node is (hash, inode, mtime, size) and a directory node is
+# (hash, {name: node}), where a directory hash covers the names, kinds and
+# hashes of its children. The tree is rooted at the build, with one level
+# for subprojects and one for source sets below it.
+#
+# File hashes are reused from the previous snapshot when (mtime, size,
+# inode) match, so that only new and modified files are read; and a diff
+# never descends into subtrees whose hashes are equal.
+import os, os.path, time
+from . import *
+from .cache import RACY_NS, load_cache, save_cache
+from .scanner import LANGUAGE_BY_EXTENSION
+
+
+def snapshot_cache_name(name: str) -> str:
+    if not name or not all(c.isalnum() or c in "._-" for c in name):
+        raise Exception(f"Invalid snapshot name '{name}': use letters, digits, '.', '_' and '-' only.")
+    return f"snapshot-{name}"
+
+
+def load_snapshot(name: str) -> tuple | None:
+    return load_cache(snapshot_cache_name(name), None)
+
+
+def save_snapshot(name: str, tree: tuple) -> None:
+    save_cache(snapshot_cache_name(name), tree)
+
+
+def _is_dir(node: tuple) -> bool:
+    return len(node) == 2
+
+
+def _dir_node(children: dict[str, tuple]) -> tuple:
+    import hashlib
+
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(children):
+        child = children[name]
+        digest.update(name.encode("utf-8", "surrogateescape"))
+        digest.update(b"\0d" if _is_dir(child) else b"\0f")
+        digest.update(child[0])
+    return (digest.digest(), children)
+
+
+def _hash_file(path: str) -> bytes | None:
+    import hashlib
+
+    try:
+        with open(path, "rb") as file:
+            return hashlib.file_digest(file, lambda: hashlib.blake2b(digest_size=16)).digest()
+    except OSError:
+        return None
+
+
+def _build_dir(directory: str, previous: tuple | None, now: int) -> tuple:
+    previous_children = previous[1] if previous and _is_dir(previous) else {}
+    children = {}
+    count("dirs_scanned")
+    try:
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except OSError:
+        entries = []
+    for entry in entries:
+        old = previous_children.get(entry.name)
+        if entry.is_dir(follow_symlinks=False):
+            children[entry.name] = _build_dir(entry.path, old, now)
+            continue
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        count("files_stated")
+        mtime = st.st_mtime_ns if now - st.st_mtime_ns > RACY_NS else 0
+        if old and not _is_dir(old) and mtime and old[1:] == (st.st_ino, mtime, st.st_size):
+            children[entry.name] = old
+            continue
+        count("files_hashed")
+        digest = _hash_file(entry.path)
+        if digest is not None:
+            children[entry.name] = (digest, st.st_ino, mtime, st.st_size)
+    return _dir_node(children)
+
+
+def build_snapshot(previous: tuple | None = None) -> tuple:
+    # Root -> subprojects -> source sets (src/<src_type>) -> files
+    now = time.time_ns()
+    previous_projects = previous[1] if previous else {}
+    projects = {}
+    for project, path in CONTEXT.projects.items():
+        with span("snapshot build", project=project):
+            previous_src_types = previous_projects.get(project, (b"", {}))[1]
+            src_types = {}
+            src_root = os.path.join(path, "src")
+            try:
+                with os.scandir(src_root) as it:
+                    names = [e.name for e in it if e.is_dir(follow_symlinks=False)]
+            except OSError:
+                names = []
+            for src_type in names:
+                src_types[src_type] = _build_dir(os.path.join(src_root, src_type),
+                                                 previous_src_types.get(src_type), now)
+            projects[project] = _dir_node(src_types)
+    return _dir_node(projects)
+
+
+def diff_snapshots(old: tuple, new: tuple):
+    # Streams {"type", "change", "project", "src_type", "language", "name"} records
+    # Subtrees with equal hashes are skipped without being visited
+    if old[0] == new[0]:
+        return
+    for project, old_node, new_node in _changed_children(old, new):
+        if old_node is None or new_node is None:
+            yield {"type": "project", "change": "added" if old_node is None else "removed",
+                   "project": project, "src_type": None, "language": None, "name": project}
+            continue
+        for src_type, old_set, new_set in _changed_children(old_node, new_node):
+            if old_set is None or new_set is None:
+                yield {"type": "source_set", "change": "added" if old_set is None else "removed",
+                       "project": project, "src_type": src_type, "language": None, "name": src_type}
+                continue
+            for root, old_root, new_root in _changed_children(old_set, new_set):
+                # Files directly below src/<src_type> keep their own name
+                node = new_root if new_root is not None else old_root
+                location = {"project": project, "src_type": src_type, "root": root if _is_dir(node) else ""}
+                yield from _diff_nodes(old_root, new_root, location, "" if _is_dir(node) else root)
+
+
+def _changed_children(old: tuple, new: tuple):
+    # Yields (name, old child, new child) for children that differ; a missing child is None
+    count("snapshot_nodes_compared")
+    old_children = old[1]
+    new_children = new[1]
+    for name in sorted(old_children.keys() | new_children.keys()):
+        old_child = old_children.get(name)
+        new_child = new_children.get(name)
+        if old_child is None or new_child is None or old_child[0] != new_child[0]:
+            yield name, old_child, new_child
+
+
+def _diff_nodes(old: tuple | None, new: tuple | None, location: dict, name: str):
+    # 'name' is the dotted name of the node relative to its language root
+    if old is not None and new is not None and _is_dir(old) != _is_dir(new):
+        # A file replaced by a directory or the other way round
+        yield from _diff_nodes(old, None, location, name)
+        yield from _diff_nodes(None, new, location, name)
+        return
+    node = new if new is not None else old
+    change = "added" if old is None else "removed" if new is None else "modified"
+    if _is_dir(node):
+        if change == "modified":
+            changed = list(_changed_children(old, new))
+            # Only packages whose own classes or subpackages changed count as
+            # modified, not every ancestor of a modified class
+            report = any(o is None or n is None or not _is_dir(n) for _, o, n in changed)
+        elif change == "added":
+            changed = [(child, None, c) for child, c in sorted(node[1].items())]
+            report = True
+        else:
+            changed = [(child, c, None) for child, c in sorted(node[1].items())]
+            report = True
+        if name and report:
+            yield _record("package", change, location, name)
+        for child, old_child, new_child in changed:
+            yield from _diff_nodes(old_child, new_child, location, f"{name}.{child}" if name else child)
+        return
+    base, ext = os.path.splitext(name)
+    language = LANGUAGE_BY_EXTENSION.get(ext)
+    if language:
+        yield _record("class", change, location, base, language=language)
+    else:
+        yield _record("file", change, location, name)
+
+
+def _record(kind: str, change: str, location: dict, name: str, *, language: str = "") -> dict:
+    return {"type": kind, "change": change, "project": location["project"], "src_type": location["src_type"],
+            "language": language or location["root"], "name": name}
+
+
+def snapshot_size(tree: tuple) -> int:
+    # Number of files in a snapshot
+    pending = [tree]
+    files = 0
+    while pending:
+        node = pending.pop()
+        for child in node[1].values():
+            if _is_dir(child):
+                pending.append(child)
+            else:
+                files += 1
+    return files
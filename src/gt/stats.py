@@ -0,0 +1,125 @@
+# Files, lines and bytes of the sources of each subproject
+#
+# Line counts are cached per file in <root>/.gradle/gt, keyed by
+# (inode, mtime, size), so that a re-run only reads the files that
+# changed since the previous one.
+import os, os.path, time
+from . import *
+from .cache import RACY_NS, load_cache, save_cache
+from .scanner import LANGUAGE_BY_EXTENSION
+from .utils import map_jobs
+
+STATS_CACHE = "stats"
+
+# Files at least this large are mapped and counted chunk by chunk
+# instead of being read into memory at once
+MMAP_THRESHOLD = 1 << 20
+_MMAP_CHUNK = 1 << 24
+
+
+def count_lines(path: str) -> int | None:
+    # Returns None if the file cannot be read
+    import mmap
+
+    try:
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < MMAP_THRESHOLD:
+                data = file.read()
+                return data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                lines = 0
+                for offset in range(0, size, _MMAP_CHUNK):
+                    lines += mm[offset:offset + _MMAP_CHUNK].count(b"\n")
+                return lines + (0 if mm[size - 1:size] == b"\n" else 1)
+    except (OSError, ValueError):
+        return None
+
+
+def source_set_types(project: str) -> list[str]:
+    try:
+        with os.scandir(os.path.join(CONTEXT.projects[project], "src")) as it:
+            return sorted(e.name for e in it if e.is_dir())
+    except OSError:
+        return []
+
+
+def _iter_source_dirs(project: str):
+    # Streams (src_type, package, directory, [(language, file name)]) for
+    # every directory of every source set, like the scanner but unsorted
+    for src_type in source_set_types(project):
+        src_dir = os.path.join(CONTEXT.projects[project], "src", src_type)
+        try:
+            with os.scandir(src_dir) as it:
+                pending = [(e.path, "") for e in it if e.is_dir(follow_symlinks=False)]
+        except OSError:
+            continue
+        while pending:
+            directory, pkgname = pending.pop()
+            count("dirs_scanned")
+            files = []
+            try:
+                with os.scandir(directory) as it:
+                    for e in it:
+                        name = e.name
+                        if e.is_dir(follow_symlinks=False):
+                            pending.append((e.path, f"{pkgname}.{name}" if pkgname else name))
+                            continue
+                        dot = name.rfind(".")
+                        language = LANGUAGE_BY_EXTENSION.get(name[dot:]) if dot > 0 else None
+                        if language:
+                            files.append((language, name))
+            except OSError:
+                continue
+            if files:
+                yield src_type, pkgname, directory, files
+
+
+def collect_source_stats(projects: list[str], *, jobs: int):
+    # Returns (rows, unreadable) where rows are
+    # (project, src_type, language, package, lines, bytes) tuples, one per source file
+    cache = load_cache(STATS_CACHE, {})
+    now = time.time_ns()
+    rows = []
+    pending = []
+    updated = False
+    for project in projects:
+        cached = cache.get(project, {})
+        entries = {}
+        with span("stats scan", project=project):
+            for src_type, pkgname, directory, files in _iter_source_dirs(project):
+                for language, name in files:
+                    path = os.path.join(directory, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    count("files_stated")
+                    mtime = st.st_mtime_ns if now - st.st_mtime_ns > RACY_NS else 0
+                    entry = cached.get(path)
+                    if entry and mtime and entry[0] == st.st_ino and entry[1] == mtime \
+                            and entry[2] == st.st_size and entry[3] is not None:
+                        entries[path] = entry
+                        rows.append((project, src_type, language, pkgname, entry[3], st.st_size))
+                    else:
+                        pending.append(((project, src_type, language, pkgname), (st.st_ino, mtime, st.st_size), path))
+        if entries.keys() != cached.keys():
+            updated = True
+        cache[project] = entries
+
+    with span("stats count", files=len(pending), jobs=jobs):
+        paths = [path for _, _, path in pending]
+        counts = map_jobs(count_lines, paths, jobs=jobs)
+
+    unreadable = []
+    for (location, key, path), lines in zip(pending, counts):
+        cache[location[0]][path] = key + (lines,)
+        if lines is None:
+            unreadable.append(path)
+        else:
+            rows.append(location + (lines, key[2]))
+        updated = True
+
+    if updated:
+        save_cache(STATS_CACHE, cache)
+    return rows, unreadable
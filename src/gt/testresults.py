@@ -0,0 +1,143 @@
+# Failed tests from the JUnit XML results of the last Gradle run
+#
+# Every test task writes build/test-results/<task>/TEST-<class>.xml. The
+# counts on the <testsuite> element are read from the first few KB of a
+# file, so that the files of passing suites are never parsed; the others
+# are streamed with iterparse and cleared as they go.
+import os, os.path, re
+from . import *
+from .utils import map_jobs
+
+_SUITE_HEADER_BYTES = 4096
+_SUITE_COUNTS = re.compile(rb"""\b(failures|errors)\s*=\s*["'](\d+)["']""")
+
+# Keep every Gradle invocation well below the argv limit of the system
+MAX_COMMAND_BYTES = 64 * 1024
+
+
+def iter_result_files(project: str):
+    # Streams (task, path) for every XML result file of the subproject
+    results_dir = os.path.join(CONTEXT.projects[project], "build", "test-results")
+    try:
+        with os.scandir(results_dir) as it:
+            tasks = sorted(e.name for e in it if e.is_dir())
+    except OSError:
+        return
+    for task in tasks:
+        try:
+            with os.scandir(os.path.join(results_dir, task)) as it:
+                files = sorted(e.path for e in it if e.name.endswith(".xml") and e.is_file())
+        except OSError:
+            continue
+        for path in files:
+            yield task, path
+
+
+def failed_tests(path: str) -> list[tuple[str, str]] | None:
+    # Returns the (class, test name) pairs that failed or errored, None if unreadable
+    import xml.etree.ElementTree as ET
+
+    try:
+        with open(path, "rb") as file:
+            header = file.read(_SUITE_HEADER_BYTES)
+            start = header.find(b"<testsuite")
+            end = header.find(b">", start)
+            if start >= 0 and end >= 0:
+                counts = dict(_SUITE_COUNTS.findall(header[start:end]))
+                if counts.get(b"failures") == b"0" and counts.get(b"errors") == b"0":
+                    return []
+            file.seek(0)
+            failures = []
+            for event, element in ET.iterparse(file, events=("end",)):
+                if element.tag == "testcase":
+                    if element.find("failure") is not None or element.find("error") is not None:
+                        failures.append((element.get("classname", ""), element.get("name", "")))
+                    element.clear()
+            return failures
+    except (OSError, ET.ParseError):
+        return None
+
+
+def collect_failures(projects: list[str], *, jobs: int):
+    # Returns ({(project, task): {class: set of methods, empty for the whole class}}, unreadable)
+    tasks = [(project, task, path) for project in projects for task, path in iter_result_files(project)]
+    paths = [path for _, _, path in tasks]
+    with span("rerun-failed parse", files=len(paths), jobs=jobs):
+        results = map_jobs(failed_tests, paths, jobs=jobs)
+    count("files_read", len(paths))
+
+    failures: dict[tuple[str, str], dict[str, set[str]]] = {}
+    unreadable = []
+    for (project, task, path), result in zip(tasks, results):
+        if result is None:
+            unreadable.append(path)
+            continue
+        for classname, name in result:
+            if not classname:
+                continue
+            classes = failures.setdefault((project, task), {})
+            method = test_method(name)
+            if method is None:
+                # Failures of the class itself, or names a filter cannot match: rerun the class
+                classes[classname] = set()
+            elif classes.get(classname) != set():
+                classes.setdefault(classname, set()).add(method)
+    return failures, unreadable
+
+
+def test_method(name: str) -> str | None:
+    # 'shouldWork()[2]' and 'shouldWork(int)' become 'shouldWork'
+    # Class-level failures and display names cannot be matched by a method filter
+    method = re.split(r"[(\[]", name, 1)[0].strip()
+    if not method or method in ("initializationError", "classMethod", "executionError") \
+            or not re.fullmatch(r"[\w$]+", method):
+        return None
+    return method
+
+
+def task_path(project: str, task: str) -> str:
+    # The path of a test task, as accepted on the command line of the root build
+    # Tasks of included builds are addressed through the name of their build
+    build, name = CONTEXT.project_build(project)
+    segments = [] if build.root == CONTEXT.root_project else [build.name]
+    if CONTEXT.projects[project] != build.root:
+        segments.append(name)
+    return ":" + ":".join(segments + [task])
+
+
+def gradle_command() -> list[str]:
+    wrapper = os.path.join(CONTEXT.root_project, "gradlew")
+    return [wrapper] if os.access(wrapper, os.X_OK) else ["gradle"]
+
+
+def build_invocations(failures: dict, *, extra_args: list[str], limit: int = MAX_COMMAND_BYTES) -> list[list[str]]:
+    # One invocation of every test task with a '--tests' filter per failed test,
+    # split into several invocations when the arguments would exceed 'limit' bytes
+    base = gradle_command() + extra_args
+    base_size = sum(len(arg) + 1 for arg in base)
+    invocations = []
+    current: list[str] = []
+    current_task = None
+    size = base_size
+    for (project, task), classes in sorted(failures.items()):
+        path = task_path(project, task)
+        filters = []
+        for classname in sorted(classes):
+            methods = classes[classname]
+            filters += [f"{classname}.{m}" for m in sorted(methods)] if methods else [classname]
+        for pattern in filters:
+            cost = len("--tests") + len(pattern) + 2
+            needed = cost if current_task == path else cost + len(path) + 1
+            if current and size + needed > limit:
+                invocations.append(base + current)
+                current, current_task, size = [], None, base_size
+                needed = cost + len(path) + 1
+            # '--tests' applies to the task right before it, so the task is repeated in every chunk
+            if current_task != path:
+                current.append(path)
+                current_task = path
+            current += ["--tests", pattern]
+            size += needed
+    if current:
+        invocations.append(base + current)
+    return invocations
@@ -1,51 +1,58 @@
-import sys, os, os.path, re, shutil, subprocess
+import sys, os, os.path
 from . import *
-from typing import Dict, List
 
 
 class SourceFile:
+    # Slotted, as bulk operations may hold hundreds of thousands of them
+    __slots__ = ("name", "project", "language", "src_type", "_directory", "_path")
+
     def __init__(self, *, name: str, project: str, language: str, src_type: str="main") -> None:
         self.name     = name
         self.project  = project
         self.language = language
         self.src_type = src_type # "test" or "main"
+        self._directory = None
+        self._path      = None
 
     def directory(self) -> str:
-        return os.path.join(PROJECTS[self.project], os.sep.join(["src", self.src_type, self.language]))
+        if self._directory is None:
+            self._directory = os.path.join(CONTEXT.projects[self.project], "src", self.src_type, self.language)
+        return self._directory
 
     def path(self) -> str:
-        return os.path.join(self.directory(), f"{self.name}.{SourceFile.get_extension(self.language)}")
+        if self._path is None:
+            self._path = os.path.join(self.directory(), f"{self.name}.{SourceFile.get_extension(self.language)}")
+        return self._path
 
     def exists(self) -> bool:
+        count("files_stated")
         return os.path.isfile(self.path())
 
     def create(self) -> None:
         pth = self.path()
-        dir = self.directory()
-        if not os.path.exists(pth):
-            ensure_dirs_exist(directories=dir)
-            open(self.path(), "w").close()
-            print(f"✔ Created {pth}")
-        else:
-            print(f"✘ Skipped {pth}")
+        ensure_dirs_exist(directories=os.path.dirname(pth))
+        print(_create_file(pth)[1])
 
     def remove(self) -> None:
-        pth = self.path()
-        if self.exists():
-            os.remove(pth)
-            print(f"󰆴 Removed {pth}")
-        else:
-            print(f"✘ Skipped {pth}")
+        print(_remove_file(self.path())[1])
 
     @staticmethod
-    def create_all(files: List["SourceFile"]) -> None:
-        for file in files:
-            file.create()
+    def create_all(files: "list[SourceFile] | SourceFileBatch", *, quiet: bool = False) -> None:
+        with span("SourceFile.create_all", files=len(files)):
+            paths = files.paths() if isinstance(files, SourceFileBatch) else [file.path() for file in files]
+            # Parent directories first, then every file at once
+            run_batch({os.path.dirname(p): None for p in paths}, lambda d, _: _make_dirs(d))
+            done = run_batch(dict.fromkeys(paths), lambda p, _: _create_file(p))
+            results = _batch_results(paths, done, lambda p: ("skipped", f"✘ Skipped {p}"))
+        report_batch(results, noun="file", quiet=quiet)
 
     @staticmethod
-    def remove_all(files: List["SourceFile"]) -> None:
-        for file in files:
-            file.remove()
+    def remove_all(files: "list[SourceFile] | SourceFileBatch", *, quiet: bool = False) -> None:
+        with span("SourceFile.remove_all", files=len(files)):
+            paths = files.paths() if isinstance(files, SourceFileBatch) else [file.path() for file in files]
+            done = run_batch(dict.fromkeys(paths), lambda p, _: _remove_file(p))
+            results = _batch_results(paths, done, lambda p: ("skipped", f"✘ Skipped {p}"))
+        report_batch(results, noun="file", quiet=quiet)
 
     @staticmethod
     def get_extension(language: str):
@@ -55,53 +62,122 @@ class SourceFile:
             return "cpp"
         elif language == "kotlin":
             return "kt"
+        elif language == "groovy":
+            return "groovy"
+        elif language == "scala":
+            return "scala"
+
+
+class SourceFileBatch:
+    # Columnar form of many source files of one language: the directory and
+    # name of every file in two parallel lists, where files of the same
+    # package share one directory string instead of one object each
+    __slots__ = ("language", "directories", "names")
+
+    def __init__(self, *, language: str) -> None:
+        self.language    = language
+        self.directories = []
+        self.names       = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, directory: str, name: str) -> None:
+        self.directories.append(directory)
+        self.names.append(name)
+
+    def extend(self, other: "SourceFileBatch") -> None:
+        self.directories.extend(other.directories)
+        self.names.extend(other.names)
+
+    def paths(self) -> list[str]:
+        suffix = f".{SourceFile.get_extension(self.language)}"
+        return [os.path.join(d, name + suffix) for d, name in zip(self.directories, self.names)]
 
 
 class Package:
+    __slots__ = ("name", "project", "src_type", "language", "_path")
+
     def __init__(self, *, name: str, project: str, language: str, src_type: str) -> None:
         self.name       = name # can be fully qualified e.g: example.package
-        self.project = project
+        self.project    = project
         self.src_type   = src_type
         self.language   = language
+        self._path      = None
 
     def name_to_rel_path(self) -> str:
         return self.name.replace(".", os.sep)
 
     def rel_path(self) -> str:
-        head = os.sep.join(["src", self.src_type, self.language])
-        tail = self.name_to_rel_path()
-        return os.path.join(head, tail)
+        return os.path.join("src", self.src_type, self.language, self.name_to_rel_path())
 
     def path(self) -> str:
-        return os.path.join(PROJECTS[self.project], self.rel_path())
+        if self._path is None:
+            self._path = os.path.join(CONTEXT.projects[self.project], self.rel_path())
+        return self._path
 
     def exists(self) -> bool:
+        count("files_stated")
         return os.path.isdir(self.path())
 
     def create(self) -> None:
-        path = self.path()
-        if os.path.exists(path):
-            print(f"✘ Skipped package '{self.name}' in the {self.src_type} source tree of '{self.project}'")
-        else:
-            os.makedirs(path)
-            print(f"✔ Created package '{self.name}' in the {self.src_type} source tree of '{self.project}'")
+        print(self._create(self.path())[1])
 
     def remove(self) -> None:
-        if self.exists():
-            shutil.rmtree(self.path())            
-            print(f"󰆴 Removed package '{self.name}' from the {self.src_type} source tree of '{self.project}'")
-        else:
-            print(f"✘ Skipped nonexistence package '{self.name}' in the {self.src_type} source tree of '{self.project}'")
+        print(self._remove(self.path())[1])
+
+    def _create(self, path: str) -> tuple[str, str]:
+        try:
+            os.makedirs(path)
+        except FileExistsError:
+            return ("skipped", f"✘ Skipped package '{self.name}' in the {self.src_type} source tree of '{self.project}'")
+        except OSError as e:
+            return ("failed", f"✘ Unable to create package '{self.name}' in the {self.src_type} source tree "
+                              f"of '{self.project}': {e.strerror}")
+        return ("created", f"✔ Created package '{self.name}' in the {self.src_type} source tree of '{self.project}'")
+
+    def _remove(self, path: str) -> tuple[str, str]:
+        import shutil
+        try:
+            shutil.rmtree(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return ("skipped", f"✘ Skipped nonexistence package '{self.name}' in the {self.src_type} source tree "
+                               f"of '{self.project}'")
+        except OSError as e:
+            return ("failed", f"✘ Unable to remove package '{self.name}' from the {self.src_type} source tree "
+                              f"of '{self.project}': {e.strerror}")
+        return ("removed", f"󰆴 Removed package '{self.name}' from the {self.src_type} source tree of '{self.project}'")
+
+    @staticmethod
+    def create_all(packages: list["Package"], *, quiet: bool = False) -> None:
+        with span("Package.create_all", packages=len(packages)):
+            # Parents are created before their subpackages, so that they are not skipped
+            results = Package._run_all(packages, lambda p, path: p._create(path), parents_first=True)
+        report_batch(results, noun="package", quiet=quiet)
 
     @staticmethod
-    def create_all(packages: List["Package"]) -> None:
-        for p in packages:
-            p.create()
+    def remove_all(packages: list["Package"], *, quiet: bool = False) -> None:
+        with span("Package.remove_all", packages=len(packages)):
+            # Subpackages are removed before their parents, so that they are not skipped
+            results = Package._run_all(packages, lambda p, path: p._remove(path), parents_first=False)
+        report_batch(results, noun="package", quiet=quiet)
 
     @staticmethod
-    def remove_all(packages: List["Package"]) -> None:
-        for p in packages:
-            p.remove()
+    def _run_all(packages: list["Package"], action, *, parents_first: bool) -> list[tuple[str, str]]:
+        paths = [p.path() for p in packages]
+        jobs = {}
+        for p, path in zip(packages, paths):
+            jobs.setdefault(path, p)
+        # Packages of the same depth cannot contain each other and run concurrently
+        levels: dict[int, dict] = {}
+        for path, p in jobs.items():
+            levels.setdefault(p.name.count("."), {})[path] = p
+        done = {}
+        for depth in sorted(levels, reverse=not parents_first):
+            done.update(run_batch(levels[depth], lambda path, p: action(p, path)))
+        # Repeated packages are skipped like those that already exist
+        return _batch_results(paths, done, lambda path: ("skipped", f"✘ Skipped package '{jobs[path].name}' "
+                              f"in the {jobs[path].src_type} source tree of '{jobs[path].project}'"))
 
     @staticmethod
     def ensure_exist(pkg: "Package") -> None:
@@ -109,93 +185,112 @@ class Package:
             raise Exception(f"The package {pkg.name} does not exist.")
 
 
-def ensure_sufficient_args(*, args: List[str], err_msg:str) -> None:
+def ensure_sufficient_args(*, args: list[str], err_msg:str) -> None:
     if not args:
         raise Exception(err_msg)
 
 
-def extract_and_validate_project_from_args(*, args: List[str]) -> str:
-    if SINGLE_PROJECT_BUILD:
-        project = os.path.basename(ROOT_PROJECT)
+def extract_jobs_from_opt(*, args: list[str], cmd: str) -> int:
+    # The number of jobs following '-j'
+    if not args or not args[0].isdigit() or int(args[0]) < 1:
+        raise Exception(f"The '-j' option of '{cmd}' must be followed by a positive number of jobs.")
+    return int(args.pop(0))
+
+
+def extract_and_validate_project_from_args(*, args: list[str]) -> str:
+    if CONTEXT.single_project_build:
+        project = os.path.basename(CONTEXT.root_project)
     else:
         project = args.pop(0)
 
     # Validate
-    if project not in PROJECTS:
+    if project not in CONTEXT.projects:
         raise Exception("'{}' is not a valid subproject".format(project))
 
     return project
 
 
-def generate_subprojects(*, project_names: List[str], project_type: str="", package_name: str=""):
+def generate_subprojects(*, project_names: list[str], project_type: str="", package_name: str=""):
+    import shutil, subprocess, tempfile
+
     # Perform validation
     valid_subproject_names = []
     invalid_subproject_names = []
     for subproject in project_names:
-        if subproject in PROJECTS:
+        if subproject in CONTEXT.projects:
             print(f"✘ Skipped existing subproject '{subproject}'")
-        if is_valid_project_name(subproject):
+        elif is_valid_project_name(subproject):
             valid_subproject_names.append(subproject)
         else:
             invalid_subproject_names.append(subproject)
 
     if valid_subproject_names:
-        # Set up the temp directory to run gradle init
-        temp_dir = "/tmp/temp_gradle_project"
-        if os.path.exists(temp_dir):
-            if os.path.isdir(temp_dir):
-                shutil.rmtree(temp_dir)
-            else:
-                os.remove(temp_dir)
-        os.makedirs(temp_dir)
-        
-        # Run gradle init from inside temp directory
-        os.chdir(temp_dir)
+        # Every invocation gets a private temp directory to run gradle init in,
+        # so that concurrent runs cannot clobber each other
+        temp_dir = tempfile.mkdtemp(prefix="gt-gradle-init-")
         options = ["--no-split-project", "--project-name", "temp_gradle_project", "--type", f"{project_type}"]
         if package_name:
             options += ["--package", f"{package_name}"]
         cmd = ["gradle", "init"] + options
         try:
-            subprocess.run(cmd, stdout=sys.stdout, stdin=sys.stdin)
+            count("subprocesses_spawned")
+            with span("gradle init", project_type=project_type):
+                subprocess.run(cmd, stdout=sys.stdout, stdin=sys.stdin, cwd=temp_dir)
             print()
 
             # Identify the subproject directory in the newly initialized project
             # Usually, this directory is 'app'
-            _, dirnames, _ = next(os.walk("."))
+            _, dirnames, _ = next(os.walk(temp_dir))
             temp_subproject = ""
             for dir in dirnames:
-                if (os.path.isfile(f"{dir}/build.gradle") or
-                    os.path.isfile(f"{dir}/build.gradle.kts")):
-                    temp_subproject = dir
+                if (os.path.isfile(os.path.join(temp_dir, dir, "build.gradle")) or
+                    os.path.isfile(os.path.join(temp_dir, dir, "build.gradle.kts"))):
+                    temp_subproject = os.path.join(temp_dir, dir)
                     break
 
             # Create subproject by copying the subproject inside temp dir into the actual root project
+            created_subprojects = []
             if temp_subproject:
                 for subproject in valid_subproject_names:
-                    dest = os.path.join(ROOT_PROJECT, f"{subproject}")
-                    shutil.copytree(temp_subproject, dest)
+                    dest = os.path.join(CONTEXT.root_project, f"{subproject}")
+                    try:
+                        shutil.copytree(temp_subproject, dest)
+                    except FileExistsError:
+                        # Created by a concurrent invocation in the meantime
+                        print(f"✘ Skipped existing subproject '{subproject}'")
+                        continue
                     print(f"✔ Created subproject '{subproject}' of type '{project_type}'")
-                    include_subproject_in_settings_file(subproject)
-
-            # Also copy libs.versions.toml into ROOT_PROJECT/gradle if it doesn't already exist
-            libs_versions_toml_root = os.path.join(ROOT_PROJECT, "gradle/libs.versions.toml")
-            if not os.path.isfile(libs_versions_toml_root):
-                shutil.copy2("gradle/libs.versions.toml", libs_versions_toml_root)
+                    created_subprojects.append(subproject)
+            include_subprojects_in_settings_file(created_subprojects)
+
+            # Also copy libs.versions.toml into CONTEXT.root_project/gradle if it doesn't already exist
+            # Copy under a private name first so that readers never see a partial file
+            libs_versions_toml = os.path.join(temp_dir, "gradle", "libs.versions.toml")
+            libs_versions_toml_root = os.path.join(CONTEXT.root_project, "gradle", "libs.versions.toml")
+            if os.path.isfile(libs_versions_toml) and not os.path.isfile(libs_versions_toml_root):
+                ensure_dirs_exist(directories=os.path.dirname(libs_versions_toml_root))
+                partial = f"{libs_versions_toml_root}.{os.getpid()}.tmp"
+                shutil.copy2(libs_versions_toml, partial)
+                os.replace(partial, libs_versions_toml_root)
         except KeyboardInterrupt:
             print()
             print("KeyboardInterrupt signal received.")
             print("No subprojects were created.")
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
     if invalid_subproject_names:
         print(f"The following are not valid subproject names: {', '.join(invalid_subproject_names)}")
 
 
-def generate_springboot_subprojects(*, project_names: List[str], user_specified_parameters: Dict[str, str]) -> None:
+def generate_springboot_subprojects(*, project_names: list[str], user_specified_parameters: dict[str, str]) -> None:
+    import shutil
+
     # Perform validation
     valid_subproject_names = []
     invalid_subproject_names = []
     for project in project_names:
-        if project in PROJECTS:
+        if project in CONTEXT.projects:
             print(f"✘ Skipped existing subproject '{project}'")
         else:
             if is_valid_project_name(project):
@@ -204,9 +299,10 @@ def generate_springboot_subprojects(*, project_names: List[str], user_specified_
                 invalid_subproject_names.append(project)
 
     # Generate subprojects
+    created_subprojects = []
     for subproject_name in valid_subproject_names:
         # Opinionated defaults
-        parameters_with_default_value: Dict[str, str] = {
+        parameters_with_default_value: dict[str, str] = {
             "applicationName": f"{str.upper(subproject_name[0]) + subproject_name[1:]}Application",
             "artifactId"     : subproject_name,
             "baseDir"        : subproject_name,
@@ -241,14 +337,17 @@ def generate_springboot_subprojects(*, project_names: List[str], user_specified_
 
         # Generate a springboot project template using the SpringInitializr API
         cmd= f"curl -sG https://start.spring.io/starter.tgz {parameter_string} | tar -xzf -"
-        os.chdir(ROOT_PROJECT)
-        ret_val = os.popen(cmd)
-        if ret_val.close(): # Should be None if subprocess exits without errors
+        os.chdir(CONTEXT.root_project)
+        count("subprocesses_spawned")
+        with span("spring initializr", project=subproject_name):
+            ret_val = os.popen(cmd)
+            failed = ret_val.close()
+        if failed: # Should be None if subprocess exits without errors
             # An error occurred.
             print(f"✘ Failed to create SpringBoot subproject '{subproject_name}'")
         else:
             # Perform clean-up
-            subproject_dir = os.path.join(ROOT_PROJECT, subproject_name)
+            subproject_dir = os.path.join(CONTEXT.root_project, subproject_name)
             files_to_remove = ("settings.gradle.kts", "settings.gradle", "gradlew", "gradlew.bat", "gradle")
             for file in files_to_remove:
                 path = os.path.join(subproject_dir, file)
@@ -257,34 +356,44 @@ def generate_springboot_subprojects(*, project_names: List[str], user_specified_
                 elif os.path.isdir(path):
                     shutil.rmtree(path)
             print(f"✔ Created SpringBoot subproject '{subproject_name}'")
-            include_subproject_in_settings_file(subproject_name)
+            created_subprojects.append(subproject_name)
+    include_subprojects_in_settings_file(created_subprojects)
 
     if invalid_subproject_names:
         print(f"The following are not valid subproject names: {', '.join(invalid_subproject_names)}")
 
 
-def get_included_subprojects() -> List[str]:
-    included_projects: List[str] = []
-    include_patterns = (
-        "include\((\"(?P<project>.+)\")\)", # Double quotes style
-        "include\('(?P<project>.+)'\)" # Single quotes style
-    )
-    if SETTINGS_FILE:
-        with open(SETTINGS_FILE, "r") as file:
-            for line in file:
-                for p in include_patterns:
-                    m = re.search(p, line)
-                    if m:
-                        included_projects.append(m.group("project"))
-                        break
+def get_included_subprojects() -> list[str]:
+    from .settings import SettingsFile
+
+    included_projects: list[str] = []
+    if CONTEXT.settings_file:
+        with span("get_included_subprojects", settings_file=CONTEXT.settings_file):
+            included_projects = SettingsFile(CONTEXT.settings_file).included()
+
+    # Subprojects of included builds are included by the settings files of their own builds
+    included_by_build = {}
+    for build in CONTEXT.builds.values():
+        if build.root != CONTEXT.root_project and build.settings_file:
+            with span("get_included_subprojects", settings_file=build.settings_file):
+                included_by_build[build.name] = set(SettingsFile(build.settings_file).included())
+    for project in CONTEXT.projects:
+        build, name = CONTEXT.project_build(project)
+        if name in included_by_build.get(build.name, ()):
+            included_projects.append(project)
     return included_projects
 
 
+def include_subprojects_in_settings_file(subprojects: list[str]) -> None:
+    from .settings import update_settings_file
+
+    # All subprojects are added in one locked, atomic rewrite of the settings file
+    if subprojects:
+        update_settings_file(CONTEXT.settings_file, includes=subprojects)
+
+
 def include_subproject_in_settings_file(subproject: str) -> None:
-    if subproject not in get_included_subprojects():
-        with open(SETTINGS_FILE, "a") as file:
-            include_statement = f"include(\"{subproject}\")\n"
-            file.write(include_statement)
+    include_subprojects_in_settings_file([subproject])
 
 
 def language_resolver(arg: str) -> str:
@@ -297,13 +406,19 @@ def language_resolver(arg: str) -> str:
     if arg in ("-k", "-kt", "-kot", "-ktl", "-kotlin", "kt", "kot", "ktl", "kotlin"):
         return "kotlin"
 
+    if arg in ("-g", "-gv", "-groovy", "gv", "groovy"):
+        return "groovy"
+
+    if arg in ("-s", "-sc", "-scala", "sc", "scala"):
+        return "scala"
+
     if arg in ("cpp"):
         return "cpp"
 
     return arg
 
 
-def ensure_dirs_exist(*, directories: List[str] | str) -> None:
+def ensure_dirs_exist(*, directories: list[str] | str) -> None:
     # Create all the necessary directories if they don't already exist
     dirs_to_check = []
     if type(directories) == list:
@@ -317,6 +432,96 @@ def ensure_dirs_exist(*, directories: List[str] | str) -> None:
             os.makedirs(d)
 
 
+# Bulk creates and removes are bound by the latency of every call on network
+# filesystems, so they run on a bounded pool of threads
+BATCH_WORKERS = 16
+
+
+def run_batch(jobs: dict, action) -> dict:
+    # Returns {key: action(key, value)} for every entry of 'jobs'
+    if len(jobs) < 4:
+        return {key: action(key, value) for key, value in jobs.items()}
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(BATCH_WORKERS, len(jobs))) as executor:
+        return dict(zip(jobs, executor.map(action, jobs, jobs.values())))
+
+
+# Starting a process pool costs more than reading this many small files
+POOL_MIN_ITEMS = 1000
+
+
+def map_jobs(fn, *iterables, jobs: int, min_items: int = POOL_MIN_ITEMS) -> list:
+    # Returns list(map(fn, *iterables)), spread over 'jobs' processes when there is enough work
+    # 'fn' runs inside worker processes, so it must be a module-level function
+    size = len(iterables[0])
+    if jobs == 1 or size < min_items:
+        return list(map(fn, *iterables))
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(jobs, size)) as executor:
+        return list(executor.map(fn, *iterables, chunksize=max(1, min(512, size // (jobs * 4)))))
+
+
+def _batch_results(keys: list, done: dict, repeated) -> list:
+    # Results in the order of 'keys'; keys seen before get repeated(key)
+    results = []
+    seen = set()
+    for key in keys:
+        if key in seen:
+            results.append(repeated(key))
+        else:
+            seen.add(key)
+            results.append(done[key])
+    return results
+
+
+def _make_dirs(path: str) -> None:
+    # Failures show up when the files inside are created
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError:
+        pass
+
+
+def _create_file(path: str) -> tuple[str, str]:
+    # Exclusive creation checks for an existing file in the same call
+    try:
+        open(path, "x").close()
+    except FileExistsError:
+        return ("skipped", f"✘ Skipped {path}")
+    except OSError as e:
+        return ("failed", f"✘ Unable to create {path}: {e.strerror}")
+    return ("created", f"✔ Created {path}")
+
+
+def _remove_file(path: str) -> tuple[str, str]:
+    try:
+        os.remove(path)
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return ("skipped", f"✘ Skipped {path}")
+    except OSError as e:
+        return ("failed", f"✘ Unable to remove {path}: {e.strerror}")
+    return ("removed", f"󰆴 Removed {path}")
+
+
+def report_batch(results: list[tuple[str, str]], *, noun: str, quiet: bool = False) -> None:
+    # Prints the (status, line) results in one write; quiet mode only prints
+    # failures followed by a summary
+    if quiet:
+        lines = [line for status, line in results if status == "failed"]
+        counts = {}
+        for status, _ in results:
+            counts[status] = counts.get(status, 0) + 1
+        summary = ", ".join(f"{counts[status]:,} {status}" for status in ("created", "removed", "skipped", "failed")
+                            if status in counts)
+        lines.append(f"{'✘' if 'failed' in counts else '✔'} {len(results):,} {noun}{'s' if len(results) != 1 else ''}"
+                     + (f": {summary}" if summary else ""))
+    else:
+        lines = [line for _, line in results]
+    if lines:
+        sys.stdout.write("".join(f"{line}\n" for line in lines))
+        sys.stdout.flush()
+
+
 def is_valid_project_name(name: str) -> bool:
     if ((os.sep in name) or
         ("." in name)    or
@@ -325,7 +530,7 @@ def is_valid_project_name(name: str) -> bool:
     return True
 
 
-def report_nonexisting_projects(projects: List[str]) -> None:
+def report_nonexisting_projects(projects: list[str], *, file=None) -> None:
     if not projects:
         return
 
@@ -338,10 +543,10 @@ def report_nonexisting_projects(projects: List[str]) -> None:
         be = "is"
         article = " a"
         plural_modifier = ""
-    print(f"{', '.join(quoted)} {be} not{article} valid subproject{plural_modifier}.")
+    print(f"{', '.join(quoted)} {be} not{article} valid subproject{plural_modifier}.", file=file)
 
 
-def report_incomplete_or_missing_src_sets(projects: List[str], *, src_language: str) -> None:
+def report_incomplete_or_missing_src_sets(projects: list[str], *, src_language: str, file=None) -> None:
     if not projects:
         return
 
@@ -354,10 +559,10 @@ def report_incomplete_or_missing_src_sets(projects: List[str], *, src_language:
         plural_modifier = ""
 
     language_specifier = f"{src_language} languages" if src_language == "all" else f"the {src_language} language"
-    print(f"The source set{plural_modifier} for {language_specifier} in {', '.join(quoted)} {be} incomplete/missing.")
+    print(f"The source set{plural_modifier} for {language_specifier} in {', '.join(quoted)} {be} incomplete/missing.", file=file)
 
 
-def raise_unrecognized_opts_error(*, opts: List[str], cmd: str) -> None:
+def raise_unrecognized_opts_error(*, opts: list[str], cmd: str) -> None:
     if not opts:
         return
     quoted = [f"'{opt}'" for opt in opts]
@@ -0,0 +1,407 @@
+# gt watch: keep an in-memory index of projects, packages and classes
+# up to date and stream every change to stdout as JSON lines.
+#
+# Both backends (inotify and polling) only report *which directories*
+# changed. The index then re-lists those directories and diffs them
+# against what it knew, which keeps it correct under renames, event
+# queue overflows and the event storms caused by 'git checkout'.
+import os, os.path, sys, time, json
+from . import *
+from .utils import *
+
+SRC_TYPES = ("main", "test")
+SETTINGS_NAMES = ("settings.gradle", "settings.gradle.kts")
+BUILD_SCRIPT_NAMES = ("build.gradle", "build.gradle.kts")
+
+# inotify(7) constants
+IN_MODIFY      = 0x00000002
+IN_ATTRIB      = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM  = 0x00000040
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_DELETE      = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF   = 0x00000800
+IN_Q_OVERFLOW  = 0x00004000
+IN_IGNORED     = 0x00008000
+IN_ONLYDIR     = 0x01000000
+IN_ISDIR       = 0x40000000
+
+WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CLOSE_WRITE | IN_MODIFY | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+
+class InotifyWatcher:
+    name = "inotify"
+
+    def __init__(self) -> None:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.path_by_wd: dict[int, str] = {}
+        self.wd_by_path: dict[str, int] = {}
+
+    def add(self, path: str) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            # Most likely vanished already; the parent's rescan covers it
+            return
+        # Watching an inode that moved hands back the same descriptor
+        self.path_by_wd[wd] = path
+        self.wd_by_path[path] = wd
+
+    def add_file(self, path: str) -> None:
+        # Files are covered by the watch on their parent directory
+        pass
+
+    def discard(self, path: str) -> None:
+        wd = self.wd_by_path.pop(path, None)
+        if wd is not None and self.path_by_wd.get(wd) == path:
+            del self.path_by_wd[wd]
+
+    def wait(self, timeout: float | None) -> list[tuple[str, str]] | None:
+        # Returns (directory, name) pairs, or None if the queue overflowed
+        import select, struct
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        changes = []
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+            offset += 16
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                path = self.path_by_wd.pop(wd, None)
+                if path is not None and self.wd_by_path.get(path) == wd:
+                    del self.wd_by_path[path]
+                continue
+            path = self.path_by_wd.get(wd)
+            if path is not None:
+                changes.append((path, name))
+        return changes
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    name = "poll"
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.mtimes: dict[str, int] = {}
+
+    def _mtime(self, path: str) -> int:
+        count("files_stated")
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return -1
+
+    def add(self, path: str) -> None:
+        self.mtimes[path] = self._mtime(path)
+
+    def add_file(self, path: str) -> None:
+        self.add(path)
+
+    def discard(self, path: str) -> None:
+        self.mtimes.pop(path, None)
+
+    def wait(self, timeout: float | None) -> list[tuple[str, str]] | None:
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        changes = []
+        for path, mtime in list(self.mtimes.items()):
+            current = self._mtime(path)
+            if current != mtime:
+                self.mtimes[path] = current
+                changes.append((os.path.dirname(path), os.path.basename(path)))
+                changes.append((path, ""))
+        return changes
+
+    def close(self) -> None:
+        pass
+
+
+class SourceIndex:
+    def __init__(self, watcher) -> None:
+        self.watcher = watcher
+        self.projects: dict[str, str] = {}
+        self.included: set[str] = set()
+        self.src_roots: dict[str, str] = {} # <project>/src -> project
+        self.dirs: dict[str, tuple[set[str], set[str]]] = {} # dir -> (subdirs, files)
+
+    # Records share the shape used by 'gt - tree --format jsonl'
+    def _record(self, path: str, is_dir: bool) -> dict | None:
+        src_root = os.path.dirname(path)
+        while src_root not in self.src_roots:
+            parent = os.path.dirname(src_root)
+            if parent == src_root:
+                return None
+            src_root = parent
+        parts = os.path.relpath(path, src_root).split(os.sep)
+        if len(parts) < 3 or parts[0] not in SRC_TYPES:
+            return None
+        src_type, language, components = parts[0], parts[1], parts[2:]
+        kind = "package"
+        if not is_dir:
+            kind = "file"
+            extension = SourceFile.get_extension(language)
+            if extension and components[-1].endswith(f".{extension}"):
+                kind = "class"
+                components[-1] = components[-1][:-len(extension) - 1]
+        return {"type": kind, "project": self.src_roots[src_root], "src_type": src_type,
+                "language": language, "name": ".".join(components), "path": path}
+
+    def _emit_entry(self, event: str, path: str, is_dir: bool, changes: list[dict]) -> None:
+        record = self._record(path, is_dir)
+        if record:
+            changes.append({"event": event, **record})
+
+    def _list(self, directory: str) -> tuple[set[str], set[str]] | None:
+        count("dirs_scanned")
+        subdirs, files = set(), set()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.add(entry.name)
+                    else:
+                        files.add(entry.name)
+        except OSError:
+            return None
+        if directory in self.src_roots:
+            # Only src/main and src/test are of interest
+            return (subdirs & set(SRC_TYPES), set())
+        return (subdirs, files)
+
+    def scan_tree(self, directory: str, changes: list[dict]) -> None:
+        # Watch before listing so that nothing created in between is missed
+        self.watcher.add(directory)
+        listing = self._list(directory)
+        if listing is None:
+            self.watcher.discard(directory)
+            return
+        self.dirs[directory] = listing
+        subdirs, files = listing
+        for name in sorted(files):
+            self._emit_entry("added", os.path.join(directory, name), False, changes)
+        for name in sorted(subdirs):
+            path = os.path.join(directory, name)
+            self._emit_entry("added", path, True, changes)
+            self.scan_tree(path, changes)
+
+    def drop_tree(self, directory: str, changes: list[dict]) -> None:
+        listing = self.dirs.pop(directory, None)
+        self.watcher.discard(directory)
+        if listing is None:
+            return
+        subdirs, files = listing
+        for name in sorted(files):
+            self._emit_entry("removed", os.path.join(directory, name), False, changes)
+        for name in sorted(subdirs):
+            path = os.path.join(directory, name)
+            self.drop_tree(path, changes)
+            self._emit_entry("removed", path, True, changes)
+
+    def rescan_dir(self, directory: str, changes: list[dict]) -> None:
+        old = self.dirs.get(directory)
+        if old is None:
+            return
+        new = self._list(directory)
+        if new is None:
+            # The directory itself is gone; its parent's rescan reports it
+            # unless the parent is not indexed (e.g. a removed src root)
+            if os.path.dirname(directory) not in self.dirs:
+                self.drop_tree(directory, changes)
+            return
+        self.dirs[directory] = new
+        old_subdirs, old_files = old
+        new_subdirs, new_files = new
+        for name in sorted(old_files - new_files):
+            self._emit_entry("removed", os.path.join(directory, name), False, changes)
+        for name in sorted(old_subdirs - new_subdirs):
+            path = os.path.join(directory, name)
+            self.drop_tree(path, changes)
+            self._emit_entry("removed", path, True, changes)
+        for name in sorted(new_files - old_files):
+            self._emit_entry("added", os.path.join(directory, name), False, changes)
+        for name in sorted(new_subdirs - old_subdirs):
+            path = os.path.join(directory, name)
+            self._emit_entry("added", path, True, changes)
+            self.scan_tree(path, changes)
+
+    def sync_src_root(self, project: str, changes: list[dict]) -> None:
+        src_root = os.path.join(self.projects[project], "src")
+        self.src_roots[src_root] = project
+        if src_root in self.dirs:
+            if not os.path.isdir(src_root):
+                self.drop_tree(src_root, changes)
+        elif os.path.isdir(src_root):
+            self.scan_tree(src_root, changes)
+
+    def sync_projects(self, changes: list[dict]) -> None:
+        CONTEXT.refresh()
+        current = dict(CONTEXT.projects)
+        for project, path in list(self.projects.items()):
+            if current.get(project) != path:
+                src_root = os.path.join(path, "src")
+                self.drop_tree(src_root, changes)
+                del self.src_roots[src_root]
+                if path != CONTEXT.root_project:
+                    self.watcher.discard(path)
+                del self.projects[project]
+                changes.append({"event": "removed", "type": "project", "name": project, "path": path})
+        for project, path in current.items():
+            if project not in self.projects:
+                self.projects[project] = path
+                changes.append({"event": "added", "type": "project", "name": project, "path": path})
+                if path != CONTEXT.root_project:
+                    self.watcher.add(path)
+            self.sync_src_root(project, changes)
+
+    def sync_settings(self, changes: list[dict]) -> None:
+        included = set(get_included_subprojects())
+        for project in sorted(self.included - included):
+            changes.append({"event": "excluded", "type": "project", "name": project})
+        for project in sorted(included - self.included):
+            changes.append({"event": "included", "type": "project", "name": project})
+        self.included = included
+
+    def summary(self) -> dict:
+        packages = classes = 0
+        for directory, (subdirs, files) in self.dirs.items():
+            for name in subdirs:
+                if self._record(os.path.join(directory, name), True):
+                    packages += 1
+            for name in files:
+                record = self._record(os.path.join(directory, name), False)
+                if record and record["type"] == "class":
+                    classes += 1
+        return {"projects": len(self.projects), "packages": packages, "classes": classes}
+
+
+def _emit(changes: list[dict]) -> None:
+    out = sys.stdout
+    for change in changes:
+        out.write(json.dumps(change, ensure_ascii=False))
+        out.write("\n")
+    out.flush()
+
+
+def run(args: list[str]) -> None:
+    # Syntax: gt watch [--poll] [--interval <seconds>] [--debounce <milliseconds>]
+    use_polling = False
+    interval = 1.0
+    debounce = 0.2
+    unrecognized_opts = set()
+    while args:
+        opt = args.pop(0)
+        if opt == "--poll":
+            use_polling = True
+        elif opt in ("--interval", "--debounce"):
+            if not args:
+                raise Exception(f"The '{opt}' option must be followed by a number.")
+            try:
+                value = float(args.pop(0))
+            except ValueError:
+                raise Exception(f"The '{opt}' option must be followed by a number.")
+            if opt == "--interval":
+                interval = value
+            else:
+                debounce = value / 1000
+        else:
+            unrecognized_opts.add(opt)
+
+    if unrecognized_opts:
+        raise_unrecognized_opts_error(opts=unrecognized_opts, cmd="gt watch")
+
+    watcher = None
+    if not use_polling:
+        try:
+            watcher = InotifyWatcher()
+        except OSError:
+            watcher = None
+    if watcher is None:
+        watcher = PollingWatcher(interval)
+
+    root = CONTEXT.root_project
+    index = SourceIndex(watcher)
+    watcher.add(root)
+    if CONTEXT.settings_file:
+        watcher.add_file(CONTEXT.settings_file)
+
+    with span("watch initial scan"):
+        initial: list[dict] = []
+        index.sync_projects(initial)
+        index.sync_settings(initial)
+    _emit([{"event": "ready", "backend": watcher.name, **index.summary()}])
+
+    # A burst of events is coalesced until it has been quiet for
+    # 'debounce' seconds, but never held back for more than 'max_delay'
+    max_delay = max(debounce * 10, 1.0)
+    try:
+        while True:
+            events = watcher.wait(None)
+            overflow = events is None
+            pending = list(events or [])
+            started = time.monotonic()
+            while not overflow and time.monotonic() - started < max_delay:
+                more = watcher.wait(debounce)
+                if more is None:
+                    overflow = True
+                elif not more:
+                    break
+                else:
+                    pending.extend(more)
+            if not pending and not overflow:
+                continue
+
+            dirty_dirs: set[str] = set()
+            projects_dirty = overflow
+            settings_dirty = overflow
+            project_paths = set(index.projects.values())
+            for directory, name in pending:
+                if directory in index.dirs:
+                    dirty_dirs.add(directory)
+                if directory == root and name in SETTINGS_NAMES:
+                    settings_dirty = True
+                elif directory == root or directory in project_paths:
+                    if name in ("", "src") or name in BUILD_SCRIPT_NAMES or name in SETTINGS_NAMES:
+                        projects_dirty = True
+                    elif directory == root and os.path.isdir(os.path.join(root, name)):
+                        projects_dirty = True
+                    elif directory == root and os.path.join(root, name) in project_paths:
+                        projects_dirty = True
+            if overflow:
+                dirty_dirs = set(index.dirs)
+
+            changes: list[dict] = []
+            with span("watch sync", dirs=len(dirty_dirs)):
+                if projects_dirty:
+                    index.sync_projects(changes)
+                # Parents first, so that a removed subtree is dropped once
+                for directory in sorted(dirty_dirs, key=lambda d: d.count(os.sep)):
+                    index.rescan_dir(directory, changes)
+                if settings_dirty:
+                    index.sync_settings(changes)
+            if changes:
+                changes.append({"event": "sync", "changes": len(changes)})
+                _emit(changes)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
@@ -0,0 +1,4 @@
+# The gt package lives in src/, next to the main.py that runs it
+import os.path, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,60 @@
+# Streaming analysis of build logs by 'gt - log'
+import io
+
+import pytest
+
+from gt import buildlog
+from gt.buildlog import LogAnalyzer
+
+LOG = b"""> Task :app:compileJava
+/root/app/src/main/java/A.java:3: error: cannot find symbol
+> Task :lib:compileJava UP-TO-DATE
+> Task :lib:test FROM-CACHE
+\x1b[1m> Task :app:test FAILED\x1b[0m
+:app:test (Thread[Execution worker,5,main]) completed. Took 1.5 secs.
+BUILD FAILED in 3s
+"""
+
+
+def analyze(data: bytes) -> LogAnalyzer:
+    analyzer = LogAnalyzer(projects={"app": "/root/app", "lib": "/root/lib"}, root_project="/root")
+    analyzer.feed(io.BytesIO(data))
+    return analyzer
+
+
+def summary(analyzer: LogAnalyzer) -> tuple:
+    return (analyzer.lines, analyzer.builds, analyzer.failed_tasks, analyzer.slowest,
+            {name: (stats.outcomes, stats.errors) for name, stats in analyzer.projects.items()})
+
+
+def test_log_summary():
+    analyzer = analyze(LOG)
+    assert analyzer.lines == 7
+    assert analyzer.builds == [("FAILED", "3s")]
+    assert analyzer.failed_tasks == [":app:test"]
+    assert analyzer.slowest == [(1.5, ":app:test")]
+    assert analyzer.projects["app"].errors == 1
+    assert analyzer.projects["app"].outcomes["EXECUTED"] == 1
+    assert analyzer.projects["lib"].outcomes["FROM-CACHE"] == 1
+
+
+@pytest.mark.parametrize("chunk", [1, 2, 7, 64, 1 << 22])
+def test_chunk_size_does_not_matter(monkeypatch, chunk):
+    expected = summary(analyze(LOG))
+    monkeypatch.setattr(buildlog, "READ_BUFFER_SIZE", chunk)
+    assert summary(analyze(LOG)) == expected
+    # Without the last newline
+    assert summary(analyze(LOG.rstrip(b"\n"))) == expected
+
+
+@pytest.mark.parametrize("chunk", [3, 16, 100, 1 << 22])
+def test_long_lines_are_cut(monkeypatch, chunk):
+    monkeypatch.setattr(buildlog, "READ_BUFFER_SIZE", chunk)
+    monkeypatch.setattr(buildlog, "MAX_LINE_LENGTH", 64)
+    # The task at the end of the long line lies beyond the cut, whichever chunk it falls in
+    long_line = b"x" * 200 + b" > Task :lib:jar\n"
+    analyzer = analyze(long_line + LOG + long_line)
+    assert analyzer.lines == 9
+    assert summary(analyzer)[1:] == summary(analyze(LOG))[1:]
+    # The same happens to a long last line that never ends
+    assert analyze(LOG + long_line.rstrip(b"\n")).projects.get("lib").outcomes["EXECUTED"] == 0
@@ -0,0 +1,43 @@
+# gt java dupes on a multi-module JPMS build
+#
+# module-info.java and package-info.java are descriptors, not classes:
+# several subprojects may each have one without duplicating anything.
+import json, os, os.path, subprocess, sys
+
+import pytest
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "main.py")
+
+
+def dupes(cwd: str) -> list[dict]:
+    result = subprocess.run([sys.executable, MAIN, "java", "dupes", "--format", "jsonl"], cwd=cwd,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    assert result.returncode == 0, result.stderr
+    return [json.loads(line) for line in result.stdout.splitlines()]
+
+
+@pytest.fixture
+def jpms_build(tmp_path):
+    (tmp_path / "settings.gradle.kts").write_text('rootProject.name = "fixture"\ninclude("a", "b")\n')
+    for project in ("a", "b"):
+        (tmp_path / project).mkdir()
+        (tmp_path / project / "build.gradle.kts").write_text("")
+        java = tmp_path / project / "src" / "main" / "java"
+        (java / project / "api").mkdir(parents=True)
+        (java / "module-info.java").write_text(f"module {project} {{\n    exports {project}.api;\n}}\n")
+        (java / project / "api" / "Api.java").write_text(f"package {project}.api;\n\npublic class Api {{}}\n")
+        # The same documented package in both subprojects, without classes
+        (java / "shared").mkdir()
+        (java / "shared" / "package-info.java").write_text("package shared;\n")
+    return tmp_path
+
+
+def test_descriptors_are_not_reported(jpms_build):
+    assert dupes(str(jpms_build)) == []
+
+
+def test_duplicates_are_still_reported(jpms_build):
+    for project in ("a", "b"):
+        (jpms_build / project / "src" / "main" / "java" / "shared" / "Util.java").write_text("package shared;\n")
+    records = dupes(str(jpms_build))
+    assert [(r["type"], r["name"]) for r in records] == [("class", "shared.Util"), ("package", "shared")]
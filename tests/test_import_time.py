@@ -0,0 +1,54 @@
+# Start-up cost of the commands that do not need a Gradle project
+#
+# 'gt', 'gt - ls-cmd' and 'gt java ls-cmd' must neither discover the
+# project nor import the modules that only some commands need. The total
+# of 'python -X importtime' is checked against a fixed budget; -S leaves
+# out the site packages of the interpreter, which gt does not control.
+import os, os.path, subprocess, sys
+
+import pytest
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "main.py")
+
+# Microseconds, several times the cost measured on a laptop
+IMPORT_TIME_BUDGET_US = 60_000
+
+# Modules that only the commands using them may import
+DEFERRED_MODULES = {"re", "shutil", "subprocess", "typing", "json", "hashlib", "tomllib",
+                    "concurrent.futures", "xml.etree.ElementTree", "html.parser"}
+
+
+def import_times(args: list[str], cwd: str) -> dict[str, int]:
+    # Returns {module: self time in microseconds}
+    result = subprocess.run([sys.executable, "-S", "-X", "importtime", MAIN] + args, cwd=cwd,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    assert result.returncode == 0, result.stderr
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.partition(":")[2].split("|")
+        times[name.strip()] = int(self_us)
+    return times
+
+
+@pytest.fixture
+def gradle_build(tmp_path):
+    (tmp_path / "settings.gradle.kts").write_text('rootProject.name = "fixture"\ninclude("app")\n')
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / "build.gradle.kts").write_text("")
+    return tmp_path
+
+
+@pytest.mark.parametrize("args", [[], ["-", "ls-cmd"], ["java", "ls-cmd"]])
+def test_commands_without_project(tmp_path, args):
+    # tmp_path is not a Gradle project: these commands must not look for one
+    times = import_times(args, str(tmp_path))
+    assert not DEFERRED_MODULES & times.keys()
+    assert sum(times.values()) < IMPORT_TIME_BUDGET_US
+
+
+def test_root_in_build(gradle_build):
+    times = import_times(["-", "root"], str(gradle_build))
+    assert not DEFERRED_MODULES & times.keys()
+    assert sum(times.values()) < IMPORT_TIME_BUDGET_US
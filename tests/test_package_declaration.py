@@ -0,0 +1,53 @@
+# Package declarations found by 'gt java check-packages'
+from gt.languages.java import PACKAGE_HEADER_BYTES, check_package_header, find_package_declaration
+
+
+def test_plain_declaration():
+    assert find_package_declaration(b"package com.example;\n\nclass A {}\n", complete=True) == ("com.example", 0, 20)
+
+
+def test_comments_and_annotations_before_declaration():
+    header = (b"/*\n * Licensed under the Apache License, package foo;\n */\n"
+              b"// package bar;\n"
+              b"@Deprecated(since = \"1.0 ) package baz;\")\n"
+              b"package com . example ;\n")
+    name, start, end = find_package_declaration(header, complete=True)
+    assert name == "com.example"
+    assert header[start:end] == b"package com . example ;"
+
+
+def test_missing_declaration():
+    assert find_package_declaration(b"import java.util.List;\n\nclass A {}\n", complete=True) == ("", 0, 0)
+    assert find_package_declaration(b"// only a comment\n", complete=True) == ("", 0, 0)
+    assert find_package_declaration(b"packageless = 1;\n", complete=True) == ("", 0, 0)
+
+
+def test_cut_off_header_is_undecided():
+    assert find_package_declaration(b"/* a comment that goes on", complete=False) is None
+    assert find_package_declaration(b"// hdr\n", complete=False) is None
+    assert find_package_declaration(b"package com.exa", complete=False) is None
+    # Cut within the keyword itself
+    for cut in range(1, 8):
+        assert find_package_declaration(b"// hdr\n" + b"package"[:cut], complete=False) is None
+
+
+def test_declaration_past_the_header(tmp_path):
+    # The license comment fills the header, and the keyword straddles its end
+    comment = b"// " + b"x" * (PACKAGE_HEADER_BYTES - 7) + b"\n"
+    path = tmp_path / "A.java"
+    path.write_bytes(comment + b"package com.example;\n\nclass A {}\n")
+    assert len(comment) < PACKAGE_HEADER_BYTES < len(comment) + len(b"package")
+    assert check_package_header(str(path), "com.example", False) == (str(path), "com.example", "com.example", False)
+
+
+def test_missing_declaration_past_the_header(tmp_path):
+    path = tmp_path / "A.java"
+    path.write_bytes(b"/*" + b" " * PACKAGE_HEADER_BYTES + b"*/\nclass A {}\n")
+    assert check_package_header(str(path), "com.example", False) == (str(path), "com.example", "", False)
+
+
+def test_fix_inserts_the_declaration(tmp_path):
+    path = tmp_path / "A.java"
+    path.write_bytes(b"package wrong;\n\nclass A {}\n")
+    assert check_package_header(str(path), "com.example", True)[3]
+    assert path.read_bytes() == b"package com.example;\n\nclass A {}\n"
@@ -0,0 +1,61 @@
+# Include statements of settings files, as read and rewritten by gt
+from gt.settings import SettingsFile, parse_include_statements, update_settings_file
+
+
+def included(text: str, keyword: str = "include") -> list[str]:
+    return [arg.project() for s in parse_include_statements(text, keyword=keyword) for arg in s.args]
+
+
+def test_kotlin_and_groovy_forms():
+    assert included('include("a")\ninclude(":b", "c")\n') == ["a", "b", "c"]
+    assert included("include 'a', ':b'\ninclude 'c'\n") == ["a", "b", "c"]
+
+
+def test_multi_line_block_with_comments():
+    text = 'include(\n    "a", // first\n    /* second */ "b",\n    "c",\n)\n'
+    assert included(text) == ["a", "b", "c"]
+
+
+def test_ignored_statements():
+    text = ('// include("commented")\n'
+            '/* include("blocked") */\n'
+            'val name = "include(\\"quoted\\")"\n'
+            'include(dynamic)\n'
+            'include()\n'
+            'gradle.include("member")\n'
+            'includeBuild("build-logic")\n')
+    assert included(text) == []
+    assert included(text, keyword="includeBuild") == ["build-logic"]
+
+
+def test_unterminated_statements():
+    assert included('include("a"') == []
+    assert included('include("a') == []
+    assert included("/* include('a')") == []
+
+
+def test_new_projects_join_the_largest_block(tmp_path):
+    path = tmp_path / "settings.gradle.kts"
+    path.write_text('rootProject.name = "x"\ninclude("solo")\ninclude(\n    ":a",\n    ":b",\n)\n')
+    settings = SettingsFile(str(path))
+    assert settings.apply(includes=["c", "a"], excludes=["solo"]) == (["c"], ["solo"])
+    assert settings.text == 'rootProject.name = "x"\ninclude(\n    ":a",\n    ":b",\n    ":c",\n)\n'
+
+
+def test_new_statements_follow_the_last_one(tmp_path):
+    path = tmp_path / "settings.gradle"
+    path.write_text("include 'a'\n// end\n")
+    settings = SettingsFile(str(path))
+    settings.apply(includes=["b"])
+    assert settings.text == "include 'a'\ninclude 'b'\n// end\n"
+
+
+def test_update_is_written_once(tmp_path):
+    path = tmp_path / "settings.gradle.kts"
+    path.write_text('include("a", "b")\n')
+    path.chmod(0o640)
+    assert update_settings_file(str(path), includes=["c"], excludes=["a"]) == (["c"], ["a"])
+    assert path.read_text() == 'include("b", "c")\n'
+    assert path.stat().st_mode & 0o777 == 0o640
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["settings.gradle.kts"]
+    assert update_settings_file(str(path), includes=["b"]) == ([], [])